@@ -0,0 +1,278 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+from startup import LazyModule
+
+cv2 = LazyModule("cv2")
+np = LazyModule("numpy")
+
+INDEX_FILE = "index.bin"
+MANIFEST_FILE = "manifest.jsonl"
+CONDITIONS_FILE = "conditions.json"
+# 16 bytes per sample: 64-bit perceptual hash and sample id
+INDEX_DTYPE = [("hash", "<u8"), ("id", "<u8")]
+
+SUN_CLASS_NAME = "sun"
+
+
+def dhash(frame, size=8, margin=2.0):
+    """64-bit difference hash: signs of horizontal gradients on a tiny greyscale thumbnail.
+
+    Steps smaller than margin grey levels count as flat, so sensor noise over open sky does not
+    flip bits the way a plain sign test would.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+    bits = (small[:, 1:] - small[:, :-1] > margin).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hamming_distances(hashes, value):
+    """Bit distances between every hash in a uint64 array and one hash"""
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def load_samples(root):
+    """Samples stored under a collector root, oldest first"""
+    samples = []
+    if os.path.exists(os.path.join(root, MANIFEST_FILE)):
+        with open(os.path.join(root, MANIFEST_FILE)) as f:
+            samples = [json.loads(line) for line in f if line.strip()]
+    # The index is the source of truth for which samples exist; the manifest may have a torn last line
+    if os.path.exists(os.path.join(root, INDEX_FILE)):
+        ids = set(np.fromfile(os.path.join(root, INDEX_FILE), dtype=INDEX_DTYPE)["id"].tolist())
+        samples = [sample for sample in samples if sample["id"] in ids]
+    return samples
+
+
+def yolo_label_lines(detections, width, height, class_id=0):
+    """YOLO label lines (class cx cy w h, normalised) for detection dicts with pixel bboxes"""
+    lines = []
+    for detection in detections:
+        x1, y1, x2, y2 = detection["bbox"]
+        lines.append(f"{class_id} {(x1 + x2) / 2 / width:.6f} {(y1 + y2) / 2 / height:.6f} "
+                     f"{(x2 - x1) / width:.6f} {(y2 - y1) / height:.6f}")
+    return lines
+
+
+class ActiveLearningCollector:
+    """Keeps the frames worth labelling under a fixed storage budget.
+
+    A frame is kept when the detector was unsure, when it disagreed with the tracker's prediction,
+    or when it was taken in a weather/sun-elevation condition not seen before, and only if no
+    stored frame is within hash_threshold bits of its perceptual hash. Each sample is a JPEG plus a
+    YOLO label file holding the detector's own boxes as pre-labels for review. When the budget is
+    reached the oldest samples are evicted.
+    """
+
+    def __init__(self, root, max_bytes=500 * 1024 * 1024, hash_threshold=6, low_confidence=0.5,
+                 disagreement_degrees=2.0, jpeg_quality=90):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hash_threshold = hash_threshold
+        self.low_confidence = low_confidence
+        self.disagreement_degrees = disagreement_degrees
+        self.jpeg_quality = jpeg_quality
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(root, "images"), exist_ok=True)
+        os.makedirs(os.path.join(root, "labels"), exist_ok=True)
+        self._samples = load_samples(root)  # Oldest first
+        self._hashes = np.array([sample["hash"] for sample in self._samples], dtype=np.uint64)
+        self._bytes = sum(sample["bytes"] for sample in self._samples)
+        self._next_id = max((sample["id"] for sample in self._samples), default=-1) + 1
+        self._conditions = set(self._load_conditions())
+
+        # Stats
+        self.considered = 0
+        self.duplicates = 0
+        self.evicted = 0
+        self.kept = {}
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _load_conditions(self):
+        try:
+            with open(self._path(CONDITIONS_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def select(self, detections, condition=None, tracker_error=None):
+        """Reason a frame is informative, or None; tracker_error is the detector-vs-tracker angle in degrees.
+
+        Only callers running a tracker can pass tracker_error; without it frames are never kept for disagreement.
+        """
+        if detections and max(detection["confidence"] for detection in detections) < self.low_confidence:
+            return "low_confidence"
+        if tracker_error is not None and tracker_error > self.disagreement_degrees:
+            return "disagreement"
+        if condition is not None and condition not in self._conditions:
+            return "new_condition"
+        return None
+
+    def observe(self, frame, detections, condition=None, tracker_error=None, now=None):
+        """Store the frame if it is informative and not a near duplicate; returns the reason it was kept, or None"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self.considered += 1
+            reason = self.select(detections, condition, tracker_error)
+            if reason is None:
+                return None
+
+            value = dhash(frame)
+            if len(self._hashes) and hamming_distances(self._hashes, value).min() <= self.hash_threshold:
+                # A look-alike frame is already stored, so the condition counts as covered
+                self._remember_condition(condition)
+                self.duplicates += 1
+                return None
+
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                return None
+            height, width = frame.shape[:2]
+            label = "\n".join(yolo_label_lines(detections, width, height))
+            size = encoded.nbytes + len(label)
+            if size > self.max_bytes:
+                return None
+            self._evict(self.max_bytes - size)
+
+            sample_id = self._next_id
+            self._next_id += 1
+            name = f"{sample_id:08d}"
+            encoded.tofile(self._path(f"images/{name}.jpg"))
+            with open(self._path(f"labels/{name}.txt"), "w") as f:
+                f.write(label + "\n" if label else "")
+
+            sample = {
+                "id": sample_id,
+                "name": name,
+                "t": now,
+                "reason": reason,
+                "hash": value,
+                "bytes": size,
+                "condition": condition,
+                "confidence": max((detection["confidence"] for detection in detections), default=None),
+            }
+            self._samples.append(sample)
+            self._hashes = np.append(self._hashes, np.uint64(value))
+            self._bytes += size
+            with open(self._path(MANIFEST_FILE), "a") as f:
+                f.write(json.dumps(sample) + "\n")
+            with open(self._path(INDEX_FILE), "ab") as f:
+                np.array([(value, sample_id)], dtype=INDEX_DTYPE).tofile(f)
+
+            self._remember_condition(condition)
+            self.kept[reason] = self.kept.get(reason, 0) + 1
+            return reason
+
+    def _remember_condition(self, condition):
+        if condition is not None and condition not in self._conditions:
+            self._conditions.add(condition)
+            self._write_atomic(CONDITIONS_FILE, json.dumps(sorted(self._conditions)).encode())
+
+    def _evict(self, budget):
+        """Drop the oldest samples until at most budget bytes are stored"""
+        count = 0
+        while count < len(self._samples) and self._bytes > budget:
+            sample = self._samples[count]
+            for path in (f"images/{sample['name']}.jpg", f"labels/{sample['name']}.txt"):
+                try:
+                    os.remove(self._path(path))
+                except FileNotFoundError:
+                    pass
+            self._bytes -= sample["bytes"]
+            count += 1
+        if not count:
+            return
+        self._samples = self._samples[count:]
+        self._hashes = self._hashes[count:]
+        self.evicted += count
+        # Rewrite the index first so a crash in between only leaves stale manifest lines, which are ignored
+        index = np.array([(sample["hash"], sample["id"]) for sample in self._samples], dtype=INDEX_DTYPE)
+        self._write_atomic(INDEX_FILE, index.tobytes())
+        self._write_atomic(MANIFEST_FILE, "".join(json.dumps(sample) + "\n" for sample in self._samples).encode())
+
+    def _write_atomic(self, name, data):
+        tmp = self._path(name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(name))
+
+    def samples(self):
+        with self._lock:
+            return list(self._samples)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "samples": len(self._samples),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "considered": self.considered,
+                "kept": dict(self.kept),
+                "duplicates": self.duplicates,
+                "evicted": self.evicted,
+                "conditions": len(self._conditions),
+            }
+
+
+def export_shard(root, output_dir, val_fraction=0.2, args_template=None, model=None, max_bytes=None):
+    """Write the collected samples as a YOLO dataset (images/ and labels/ split into train and val).
+
+    The split is taken from the perceptual hash, so a sample stays on the same side across exports.
+    With args_template (a training args.yaml) a copy pointing at this dataset, and at model if
+    given, is written next to it.
+    max_bytes caps the shard size, newest samples first. Returns the path of dataset.yaml.
+    """
+    selected, total = [], 0
+    for sample in reversed(load_samples(root)):
+        if max_bytes is not None and total + sample["bytes"] > max_bytes:
+            break
+        selected.append(sample)
+        total += sample["bytes"]
+
+    val_buckets = round(val_fraction * 100)
+    for split in ("train", "val"):
+        os.makedirs(os.path.join(output_dir, "images", split), exist_ok=True)
+        os.makedirs(os.path.join(output_dir, "labels", split), exist_ok=True)
+    counts = {"train": 0, "val": 0}
+    for sample in selected:
+        split = "val" if sample["hash"] % 100 < val_buckets else "train"
+        name = sample["name"]
+        shutil.copyfile(os.path.join(root, "images", f"{name}.jpg"),
+                        os.path.join(output_dir, "images", split, f"{name}.jpg"))
+        shutil.copyfile(os.path.join(root, "labels", f"{name}.txt"),
+                        os.path.join(output_dir, "labels", split, f"{name}.txt"))
+        counts[split] += 1
+
+    dataset_path = os.path.abspath(os.path.join(output_dir, "dataset.yaml"))
+    with open(dataset_path, "w") as f:
+        f.write(f"path: {os.path.abspath(output_dir)}\n"
+                "train: images/train\n"
+                "val: images/val\n"
+                "nc: 1\n"
+                f"names: ['{SUN_CLASS_NAME}']\n")
+
+    if args_template is not None:
+        # Line-based so the template's layout and comments survive; only run-specific keys change
+        overrides = {"data": dataset_path, "resume": "false", "name": "active_learning", "exist_ok": "true"}
+        if model is not None:
+            overrides["model"] = model
+        with open(args_template) as f:
+            lines = f.read().splitlines()
+        with open(os.path.join(output_dir, "args.yaml"), "w") as f:
+            for line in lines:
+                key = line.split(":", 1)[0]
+                if not line.startswith((" ", "-")) and key in overrides:
+                    line = f"{key}: {overrides[key]}"
+                f.write(line + "\n")
+
+    print(f"Exported {counts['train']} train and {counts['val']} val samples ({total} bytes) to {output_dir}")
+    return dataset_path
@@ -0,0 +1,177 @@
+import socket
+import threading
+import time
+from collections import deque
+
+
+def format_command(pan_steps, tilt_steps):
+    """Line protocol understood by the motor microcontroller"""
+    return f"PAN {pan_steps} TILT {tilt_steps}\n"
+
+
+class ActuatorOutput:
+    """Base class for a channel that delivers pan/tilt step commands to the motors"""
+
+    def send(self, pan_steps, tilt_steps):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SerialActuator(ActuatorOutput):
+    """Sends commands over a serial port to the motor microcontroller (requires pyserial)"""
+
+    def __init__(self, port, baudrate=115200, timeout=1.0):
+        try:
+            import serial
+        except ImportError as e:
+            raise RuntimeError("pyserial is required for serial actuator output (pip install pyserial)") from e
+        self._serial = serial.Serial(port, baudrate=baudrate, timeout=timeout)
+
+    def send(self, pan_steps, tilt_steps):
+        self._serial.write(format_command(pan_steps, tilt_steps).encode("ascii"))
+        self._serial.flush()
+
+    def close(self):
+        self._serial.close()
+
+
+class SocketActuator(ActuatorOutput):
+    """Sends commands over TCP, reconnecting on the next command if the connection drops"""
+
+    def __init__(self, host, port, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._sock = None
+
+    def send(self, pan_steps, tilt_steps):
+        try:
+            if self._sock is None:
+                self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._sock.sendall(format_command(pan_steps, tilt_steps).encode("ascii"))
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+
+class LoopbackActuator(ActuatorOutput):
+    """In-process stand-in that records commands and integrates them into a simulated position"""
+
+    def __init__(self, history=1000):
+        self._lock = threading.Lock()
+        self.commands = deque(maxlen=history)
+        self.pan_position = 0
+        self.tilt_position = 0
+
+    def send(self, pan_steps, tilt_steps):
+        with self._lock:
+            self.commands.append((time.time(), pan_steps, tilt_steps))
+            self.pan_position += pan_steps
+            self.tilt_position += tilt_steps
+
+    def position(self):
+        with self._lock:
+            return self.pan_position, self.tilt_position
+
+
+class PanTiltController:
+    """Turns angular pointing errors into rate-limited pan/tilt step commands"""
+
+    def __init__(self, output, steps_per_degree=10.0, deadband=0.2, max_steps=200, min_interval=0.5):
+        self.output = output
+        self.steps_per_degree = steps_per_degree
+        # Errors smaller than this (degrees) are ignored to avoid hunting around the target
+        self.deadband = deadband
+        # Largest single move, so one bad detection cannot swing the panel far
+        self.max_steps = max_steps
+        # Minimum seconds between commands
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last_command_time = None
+
+        # Stats
+        self.commands_sent = 0
+        self.commands_rate_limited = 0
+        self.send_errors = 0
+        self.last_command = None
+
+    def _to_steps(self, error):
+        if abs(error) < self.deadband:
+            return 0
+        steps = int(round(error * self.steps_per_degree))
+        return max(-self.max_steps, min(self.max_steps, steps))
+
+    def update(self, azimuth_error, elevation_error, now=None):
+        """Send a correction for the given errors in degrees, returning the command dict or None"""
+        if now is None:
+            now = time.time()
+        pan_steps = self._to_steps(azimuth_error)
+        tilt_steps = self._to_steps(elevation_error)
+        if pan_steps == 0 and tilt_steps == 0:
+            return None
+
+        with self._lock:
+            if self._last_command_time is not None and now - self._last_command_time < self.min_interval:
+                self.commands_rate_limited += 1
+                return None
+            self._last_command_time = now
+
+        try:
+            self.output.send(pan_steps, tilt_steps)
+        except Exception as e:
+            print(f"Actuator command error: {e}")
+            self.send_errors += 1
+            return None
+
+        command = {
+            "pan_steps": pan_steps,
+            "tilt_steps": tilt_steps,
+            "azimuth_error": azimuth_error,
+            "elevation_error": elevation_error,
+            "timestamp": now,
+        }
+        self.commands_sent += 1
+        self.last_command = command
+        return command
+
+    def stats(self):
+        return {
+            "commands_sent": self.commands_sent,
+            "commands_rate_limited": self.commands_rate_limited,
+            "send_errors": self.send_errors,
+            "last_command": self.last_command,
+        }
+
+
+def create_actuator(spec="none"):
+    """Build an actuator output from a spec string.
+
+    Supported specs: "none", "loopback", "serial:<port>[:<baud>]" and "socket:<host>:<port>".
+    """
+    kind, _, arg = spec.partition(":")
+    kind = kind.strip().lower()
+
+    if kind in ("", "none"):
+        return None
+    if kind == "loopback":
+        return LoopbackActuator()
+    if kind == "serial":
+        port, baudrate = arg, 115200
+        head, _, tail = arg.rpartition(":")
+        if head and tail.isdigit():
+            port, baudrate = head, int(tail)
+        return SerialActuator(port, baudrate)
+    if kind == "socket":
+        host, _, port = arg.rpartition(":")
+        return SocketActuator(host, int(port))
+
+    raise ValueError(f"Unknown actuator output '{spec}'")
@@ -0,0 +1,106 @@
+import atexit
+import os
+from datetime import datetime
+
+from flask import Flask, jsonify, request
+from flask_cors import CORS
+
+from fleet import FleetAggregator, create_store
+
+app = Flask(__name__)
+CORS(app)
+
+# Where aged-out buckets go: "memory" (local stand-in), "jsonl:<path>" or "firestore:<credentials.json>"
+FLEET_STORE = os.environ.get("FLEET_STORE", "memory")
+FLEET_BUCKET_SECONDS = int(os.environ.get("FLEET_BUCKET_SECONDS", "300"))
+FLEET_HISTORY_BUCKETS = int(os.environ.get("FLEET_HISTORY_BUCKETS", "288"))
+FLEET_OFFLINE_AFTER = float(os.environ.get("FLEET_OFFLINE_AFTER", "600"))
+MAX_BATCH_RECORDS = 5000
+
+aggregator = FleetAggregator(
+    bucket_seconds=FLEET_BUCKET_SECONDS,
+    history_buckets=FLEET_HISTORY_BUCKETS,
+    offline_after=FLEET_OFFLINE_AFTER,
+    store=create_store(FLEET_STORE),
+)
+atexit.register(aggregator.flush)
+
+
+@app.route('/ingest', methods=['POST'])
+def ingest():
+    """Endpoint for devices to push a batch of detection/telemetry records"""
+    try:
+        data = request.get_json(silent=True) or {}
+        device_id = data.get('device_id')
+        records = data.get('records')
+        if not device_id or not isinstance(records, list):
+            return jsonify({
+                "status": "error",
+                "message": "Expected 'device_id' and a 'records' list",
+                "timestamp": datetime.now().isoformat()
+            }), 400
+        if len(records) > MAX_BATCH_RECORDS:
+            return jsonify({
+                "status": "error",
+                "message": f"Batch too large, at most {MAX_BATCH_RECORDS} records",
+                "timestamp": datetime.now().isoformat()
+            }), 413
+
+        accepted = aggregator.ingest(str(device_id), records)
+        return jsonify({
+            "status": "success",
+            "accepted": accepted,
+            "rejected": len(records) - accepted,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "timestamp": datetime.now().isoformat()
+        }), 500
+
+
+@app.route('/fleet/status', methods=['GET'])
+def fleet_status():
+    """Endpoint for fleet-wide status with per-device rolling aggregates"""
+    window = request.args.get('window', default=3600.0, type=float)
+    return jsonify(dict(aggregator.status(window=window), timestamp=datetime.now().isoformat()))
+
+
+@app.route('/fleet/devices/<device_id>', methods=['GET'])
+def fleet_device(device_id):
+    """Endpoint for one device's latest values and rolling aggregates"""
+    window = request.args.get('window', default=3600.0, type=float)
+    summary = aggregator.device_summary(device_id, window=window)
+    if summary is None:
+        return jsonify({
+            "status": "error",
+            "message": f"Unknown device '{device_id}'",
+            "timestamp": datetime.now().isoformat()
+        }), 404
+    return jsonify(dict(summary, timestamp=datetime.now().isoformat()))
+
+
+@app.route('/fleet/devices/<device_id>/history', methods=['GET'])
+def fleet_device_history(device_id):
+    """Endpoint for one device's bucketed history, optionally downsampled with ?resolution=seconds"""
+    since = request.args.get('since', default=None, type=float)
+    resolution = request.args.get('resolution', default=None, type=int)
+    history = aggregator.device_history(device_id, since=since, resolution=resolution)
+    if history is None:
+        return jsonify({
+            "status": "error",
+            "message": f"Unknown device '{device_id}'",
+            "timestamp": datetime.now().isoformat()
+        }), 404
+    return jsonify({
+        "device_id": device_id,
+        "buckets": history,
+        "timestamp": datetime.now().isoformat()
+    })
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=int(os.environ.get("FLEET_PORT", "5100")), use_reloader=False)
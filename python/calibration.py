@@ -0,0 +1,184 @@
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+
+from startup import LazyModule
+
+cv2 = LazyModule("cv2")
+np = LazyModule("numpy")
+
+DEFAULT_CALIBRATION_FILE = "camera_calibration.json"
+
+
+class CameraCalibration:
+    """Camera intrinsics and lens distortion, with precomputed pixel-to-angle lookup maps"""
+
+    def __init__(self, camera_matrix, dist_coeffs, image_size, rms_error=None):
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64).reshape(3, 3)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).ravel()
+        self.image_size = (int(image_size[0]), int(image_size[1]))  # (width, height)
+        self.rms_error = rms_error
+        # (width, height) -> (azimuth_map, elevation_map)
+        self._angle_maps = {}
+
+    @classmethod
+    def from_fov(cls, width, height, horizontal_fov=60.0):
+        """Distortion-free pinhole model from a nominal horizontal field of view, used when uncalibrated"""
+        focal = (width / 2) / math.tan(math.radians(horizontal_fov) / 2)
+        camera_matrix = [[focal, 0, width / 2], [0, focal, height / 2], [0, 0, 1]]
+        return cls(camera_matrix, [0, 0, 0, 0, 0], (width, height))
+
+    # Persistence
+    def save(self, path):
+        """Cache the calibration to a JSON file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "camera_matrix": self.camera_matrix.tolist(),
+                "dist_coeffs": self.dist_coeffs.tolist(),
+                "image_size": list(self.image_size),
+                "rms_error": self.rms_error,
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Load a calibration previously written by save"""
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["camera_matrix"], data["dist_coeffs"], data["image_size"], data.get("rms_error"))
+
+    # Pixel to angle conversion
+    def _scaled_matrix(self, width, height):
+        """Camera matrix rescaled for frames captured at a different resolution than the calibration"""
+        sx = width / self.image_size[0]
+        sy = height / self.image_size[1]
+        matrix = self.camera_matrix.copy()
+        matrix[0, :] *= sx
+        matrix[1, :] *= sy
+        matrix[2, :] = [0, 0, 1]
+        return matrix
+
+    def angle_maps(self, width, height):
+        """Return per-pixel (azimuth, elevation) offset maps in degrees, built once per frame size"""
+        key = (int(width), int(height))
+        maps = self._angle_maps.get(key)
+        if maps is None:
+            xs, ys = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+            pixels = np.stack([xs.ravel(), ys.ravel()], axis=1).reshape(-1, 1, 2)
+
+            # Undistort every pixel once to normalized camera coordinates
+            normalized = cv2.undistortPoints(pixels, self._scaled_matrix(width, height), self.dist_coeffs)
+            xn = normalized[:, 0, 0].reshape(height, width)
+            yn = normalized[:, 0, 1].reshape(height, width)
+
+            # Positive azimuth is to the right of centre, positive elevation is above centre
+            azimuth = np.degrees(np.arctan(xn)).astype(np.float32)
+            elevation = np.degrees(-np.arctan2(yn, np.sqrt(1 + xn * xn))).astype(np.float32)
+            maps = (azimuth, elevation)
+            self._angle_maps[key] = maps
+        return maps
+
+    def pixel_to_angles(self, x, y, width, height):
+        """Convert a (sub)pixel position to (azimuth, elevation) offsets from the optical axis in degrees"""
+        azimuth_map, elevation_map = self.angle_maps(width, height)
+
+        # Bilinear interpolation between the four surrounding lookup entries
+        x = min(max(float(x), 0.0), width - 1.0)
+        y = min(max(float(y), 0.0), height - 1.0)
+        x0, y0 = int(x), int(y)
+        x1, y1 = min(x0 + 1, width - 1), min(y0 + 1, height - 1)
+        fx, fy = x - x0, y - y0
+
+        def sample(m):
+            top = m[y0, x0] * (1 - fx) + m[y0, x1] * fx
+            bottom = m[y1, x0] * (1 - fx) + m[y1, x1] * fx
+            return float(top * (1 - fy) + bottom * fy)
+
+        return sample(azimuth_map), sample(elevation_map)
+
+    def detection_angles(self, detection, width, height):
+        """Return the (azimuth_error, elevation_error) in degrees of a detection's bbox centre"""
+        x1, y1, x2, y2 = detection["bbox"]
+        return self.pixel_to_angles((x1 + x2) / 2, (y1 + y2) / 2, width, height)
+
+
+def calibrate_from_checkerboard(image_paths, pattern_size=(9, 6), square_size=1.0):
+    """Estimate intrinsics and distortion from checkerboard images, returning a CameraCalibration or None"""
+    # 3D corner positions of the board in its own plane
+    object_corners = np.zeros((pattern_size[0] * pattern_size[1], 3), np.float32)
+    object_corners[:, :2] = np.mgrid[0:pattern_size[0], 0:pattern_size[1]].T.reshape(-1, 2) * square_size
+
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+    object_points = []
+    image_points = []
+    image_size = None
+
+    for path in image_paths:
+        image = cv2.imread(path)
+        if image is None:
+            print(f"Error loading image: {path}")
+            continue
+        grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if image_size is None:
+            image_size = (grey.shape[1], grey.shape[0])
+        elif image_size != (grey.shape[1], grey.shape[0]):
+            print(f"Skipping {path}: size differs from the first calibration image")
+            continue
+
+        found, corners = cv2.findChessboardCorners(grey, pattern_size, None)
+        if not found:
+            print(f"Checkerboard not found in {path}")
+            continue
+        corners = cv2.cornerSubPix(grey, corners, (11, 11), (-1, -1), criteria)
+        object_points.append(object_corners)
+        image_points.append(corners)
+
+    if len(image_points) < 3:
+        print(f"Calibration needs at least 3 usable checkerboard images, found {len(image_points)}")
+        return None
+
+    rms, camera_matrix, dist_coeffs, _, _ = cv2.calibrateCamera(
+        object_points, image_points, image_size, None, None
+    )
+    print(f"Calibrated from {len(image_points)} images, RMS reprojection error {rms:.3f} px")
+    return CameraCalibration(camera_matrix, dist_coeffs, image_size, rms_error=float(rms))
+
+
+def load_calibration(path=DEFAULT_CALIBRATION_FILE, width=640, height=480, horizontal_fov=60.0):
+    """Load the cached calibration, falling back to a pinhole model from the nominal field of view"""
+    try:
+        if os.path.exists(path):
+            calibration = CameraCalibration.load(path)
+            print(f"Camera calibration loaded from {path}")
+            return calibration
+    except Exception as e:
+        print(f"Calibration loading error: {e}")
+    print(f"No camera calibration at {path}, using a {horizontal_fov} degree pinhole model")
+    return CameraCalibration.from_fov(width, height, horizontal_fov)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the camera from checkerboard images")
+    parser.add_argument("images", help="Directory or glob pattern of checkerboard images")
+    parser.add_argument("--pattern", default="9x6", help="Inner corners per row x column, e.g. 9x6")
+    parser.add_argument("--square-size", type=float, default=1.0, help="Checkerboard square size (any unit)")
+    parser.add_argument("--output", default=DEFAULT_CALIBRATION_FILE, help="Where to cache the calibration")
+    args = parser.parse_args()
+
+    pattern = os.path.join(args.images, "*") if os.path.isdir(args.images) else args.images
+    image_paths = sorted(glob.glob(pattern))
+    columns, rows = (int(v) for v in args.pattern.lower().split("x"))
+
+    calibration = calibrate_from_checkerboard(image_paths, (columns, rows), args.square_size)
+    if calibration is None:
+        return 1
+    calibration.save(args.output)
+    print(f"Saved calibration to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
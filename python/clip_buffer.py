@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from startup import LazyModule
+
+cv2 = LazyModule("cv2")
+np = LazyModule("numpy")
+
+
+class ClipBuffer:
+    """Circular buffer of the last N seconds of frames, kept as JPEG bytes, dumped to a clip on events.
+
+    At least min_frames frames are kept however old they are, so a source capturing less often
+    than the window still has some pre-roll before the event.
+    """
+
+    def __init__(self, seconds=30.0, max_frames=600, jpeg_quality=80, output_dir="results/clips", cooldown=60.0,
+                 min_frames=10):
+        self.seconds = seconds
+        self.min_frames = min_frames
+        self.jpeg_quality = jpeg_quality
+        self.output_dir = output_dir
+        # Minimum seconds between exports so a flapping condition does not write a clip per frame
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._frames = deque(maxlen=max_frames)  # (timestamp, jpeg bytes)
+        self._bytes = 0
+        self._last_export = None
+        self._exporting = False
+
+        # Stats
+        self.clips_written = 0
+        self.triggers_skipped = 0
+        self.last_clip = None
+
+    def add(self, frame, timestamp=None):
+        """Compress a frame into the buffer and evict anything older than the window"""
+        if timestamp is None:
+            timestamp = time.time()
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return
+        data = encoded.tobytes()
+
+        with self._lock:
+            if len(self._frames) == self._frames.maxlen:
+                self._bytes -= len(self._frames[0][1])
+            self._frames.append((timestamp, data))
+            self._bytes += len(data)
+            while len(self._frames) > self.min_frames and timestamp - self._frames[0][0] > self.seconds:
+                self._bytes -= len(self._frames.popleft()[1])
+
+    def trigger(self, reason, details=None, now=None):
+        """Export the buffered frames to a clip in the background; returns False if skipped"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            cooling_down = self._last_export is not None and now - self._last_export < self.cooldown
+            if not self._frames or self._exporting or cooling_down:
+                self.triggers_skipped += 1
+                return False
+            # The bytes objects are immutable, so a shallow copy is a consistent snapshot
+            frames = list(self._frames)
+            self._exporting = True
+            self._last_export = now
+
+        thread = threading.Thread(target=self._export, args=(frames, reason, details, now), name="clip-export")
+        thread.daemon = True
+        thread.start()
+        return True
+
+    def _export(self, frames, reason, details, now):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            name = f"clip_{datetime.fromtimestamp(now).strftime('%Y%m%d_%H%M%S')}_{reason}"
+            output_path = os.path.join(self.output_dir, f"{name}.mp4")
+
+            first = cv2.imdecode(np.frombuffer(frames[0][1], dtype=np.uint8), cv2.IMREAD_COLOR)
+            height, width = first.shape[:2]
+            span = frames[-1][0] - frames[0][0]
+            # Play back at the rate the frames were captured, within sane bounds
+            fps = min(30.0, max(1.0, (len(frames) - 1) / span)) if span > 0 else 1.0
+
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+            try:
+                for _, data in frames:
+                    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                    if frame is not None and frame.shape[:2] == (height, width):
+                        out.write(frame)
+            finally:
+                out.release()
+
+            with open(os.path.join(self.output_dir, f"{name}.json"), "w") as f:
+                json.dump({
+                    "reason": reason,
+                    "details": details,
+                    "triggered_at": datetime.fromtimestamp(now).isoformat(),
+                    "frames": len(frames),
+                    "start": datetime.fromtimestamp(frames[0][0]).isoformat(),
+                    "end": datetime.fromtimestamp(frames[-1][0]).isoformat(),
+                }, f, indent=2)
+
+            print(f"Saved {reason} clip with {len(frames)} frames to: {output_path}")
+            with self._lock:
+                self.clips_written += 1
+                self.last_clip = output_path
+        except Exception as e:
+            print(f"Clip export error: {e}")
+        finally:
+            with self._lock:
+                self._exporting = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "frames": len(self._frames),
+                "bytes": self._bytes,
+                "seconds": self._frames[-1][0] - self._frames[0][0] if len(self._frames) > 1 else 0.0,
+                "clips_written": self.clips_written,
+                "triggers_skipped": self.triggers_skipped,
+                "last_clip": self.last_clip,
+            }
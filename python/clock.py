@@ -0,0 +1,41 @@
+import threading
+import time
+
+
+class SystemClock:
+    """Wall-clock time, used in normal operation"""
+
+    def time(self):
+        return time.time()
+
+    def wait(self, stop_event, seconds):
+        """Sleep for seconds or until stop_event is set, returning True if it was set"""
+        return stop_event.wait(seconds)
+
+
+class VirtualClock:
+    """Manually advanced clock for replays; waiting advances time instantly instead of sleeping"""
+
+    def __init__(self, start_time):
+        self._lock = threading.Lock()
+        self._now = float(start_time)
+
+    def time(self):
+        with self._lock:
+            return self._now
+
+    def advance(self, seconds):
+        with self._lock:
+            self._now += max(0.0, seconds)
+            return self._now
+
+    def set(self, timestamp):
+        with self._lock:
+            self._now = max(self._now, float(timestamp))
+            return self._now
+
+    def wait(self, stop_event, seconds):
+        if stop_event.is_set():
+            return True
+        self.advance(seconds)
+        return stop_event.is_set()
@@ -0,0 +1,64 @@
+import threading
+
+from runtime_state import RuntimeState
+
+DEFAULT_DEVICE_ID = "default"
+
+
+class Device:
+    """One camera/panel served by this process, with its own frame source, schedule and actuator"""
+
+    def __init__(self, device_id, source_spec, state=None, controller=None, source_key=None):
+        self.device_id = device_id
+        self.source_spec = source_spec
+        # Interval, next capture time and worker threads are per device
+        self.state = state if state is not None else RuntimeState(interval_time=60)
+        self.controller = controller
+        # Key used for inference stale-frame dropping, frame gates and clip events
+        self.source_key = source_key or f"camera:{device_id}"
+        # Exposure controller for the device's camera, created when the camera loop opens it
+        self.exposure = None
+        # Latest-frame thumbnail and MJPEG stream, created on first use
+        self.preview = None
+
+
+class DeviceRegistry:
+    """Thread-safe registry of the devices managed by the server"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._devices = {}
+
+    def add(self, device):
+        with self._lock:
+            if device.device_id in self._devices:
+                raise ValueError(f"Device '{device.device_id}' already exists")
+            self._devices[device.device_id] = device
+        return device
+
+    def remove(self, device_id):
+        with self._lock:
+            return self._devices.pop(device_id, None)
+
+    def get(self, device_id):
+        with self._lock:
+            return self._devices.get(device_id)
+
+    def all(self):
+        with self._lock:
+            return list(self._devices.values())
+
+
+def parse_devices_spec(spec):
+    """Parse "id=source[|actuator];..." into (device_id, source_spec, actuator_spec) tuples.
+
+    For example "east=webcam:0|serial:/dev/ttyUSB0;west=webcam:1|serial:/dev/ttyUSB1".
+    """
+    devices = []
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        device_id, sep, rest = entry.partition("=")
+        if not sep or not device_id.strip():
+            raise ValueError(f"Invalid device entry '{entry}', expected id=source")
+        source_spec, _, actuator_spec = rest.partition("|")
+        devices.append((device_id.strip(), source_spec.strip(), actuator_spec.strip() or "none"))
+    return devices
@@ -0,0 +1,117 @@
+import os
+
+from startup import LazyModule
+
+np = LazyModule("numpy")
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+IOU_THRESHOLDS = (0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95)
+
+
+def find_labeled_images(images_dir):
+    """(image path, label path) pairs of a YOLO dataset split; labels sit in the sibling labels/ directory"""
+    labels_dir = os.path.join(os.path.dirname(os.path.normpath(images_dir)), "labels")
+    pairs = []
+    for name in sorted(os.listdir(images_dir)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            label = os.path.join(labels_dir, os.path.splitext(name)[0] + ".txt")
+            pairs.append((os.path.join(images_dir, name), label))
+    return pairs
+
+
+def load_yolo_labels(path, width, height, class_id=0):
+    """Pixel xyxy boxes of one class from a YOLO label file; a missing file means no objects"""
+    boxes = []
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 5 or int(parts[0]) != class_id:
+                    continue
+                cx, cy, w, h = (float(value) for value in parts[1:5])
+                boxes.append([(cx - w / 2) * width, (cy - h / 2) * height,
+                              (cx + w / 2) * width, (cy + h / 2) * height])
+    return np.array(boxes, dtype=np.float64).reshape(-1, 4)
+
+
+def box_iou(boxes_a, boxes_b):
+    """(N, M) IoU matrix between two sets of xyxy boxes"""
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).prod(axis=1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).prod(axis=1)
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+
+def match_predictions(pred_boxes, gt_boxes, iou_thresholds=IOU_THRESHOLDS):
+    """(N, T) true-positive matrix: each ground truth matched to at most one prediction per IoU threshold.
+
+    Matching is greedy by IoU, done for all pairs above a threshold at once instead of per prediction.
+    """
+    tp = np.zeros((len(pred_boxes), len(iou_thresholds)), dtype=bool)
+    if not len(pred_boxes) or not len(gt_boxes):
+        return tp
+    iou = box_iou(pred_boxes, gt_boxes)
+    for t, threshold in enumerate(iou_thresholds):
+        pred_index, gt_index = np.nonzero(iou >= threshold)
+        if not len(pred_index):
+            continue
+        order = np.argsort(-iou[pred_index, gt_index], kind="stable")
+        pred_index, gt_index = pred_index[order], gt_index[order]
+        # Best pair per prediction, then best remaining pair per ground truth
+        _, first = np.unique(pred_index, return_index=True)
+        first.sort()
+        pred_index, gt_index = pred_index[first], gt_index[first]
+        _, first = np.unique(gt_index, return_index=True)
+        tp[pred_index[first], t] = True
+    return tp
+
+
+def average_precision(recall, precision):
+    """COCO-style 101-point interpolated area under a precision/recall curve"""
+    recall = np.concatenate(([0.0], recall, [1.0]))
+    precision = np.concatenate(([1.0], precision, [0.0]))
+    # Precision envelope: best precision at this recall or any higher one
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    points = np.linspace(0, 1, 101)
+    return float(precision[np.searchsorted(recall, points, side="left")].mean())
+
+
+def detection_metrics(tp, confidences, num_gt, operating_conf=0.3, iou_thresholds=IOU_THRESHOLDS):
+    """Precision and recall at operating_conf (IoU 0.5) and mAP50 / mAP50-95 over all predictions"""
+    if not len(confidences):
+        return {"precision": 0.0, "recall": 0.0, "map50": 0.0, "map50_95": 0.0,
+                "predictions": 0, "ground_truth": num_gt}
+    order = np.argsort(-confidences, kind="stable")
+    tp, confidences = tp[order], confidences[order]
+    tp_cumulative = np.cumsum(tp, axis=0)
+    fp_cumulative = np.cumsum(~tp, axis=0)
+    recall = tp_cumulative / max(num_gt, 1)
+    precision = tp_cumulative / (tp_cumulative + fp_cumulative)
+    ap = [average_precision(recall[:, t], precision[:, t]) for t in range(len(iou_thresholds))]
+
+    kept = int((confidences >= operating_conf).sum())
+    return {
+        "precision": float(tp_cumulative[kept - 1, 0] / kept) if kept else 0.0,
+        "recall": float(tp_cumulative[kept - 1, 0] / num_gt) if kept and num_gt else 0.0,
+        "map50": ap[0],
+        "map50_95": float(np.mean(ap)),
+        "predictions": kept,
+        "ground_truth": num_gt,
+    }
+
+
+def distribution(values):
+    """Summary of a sample distribution for reports"""
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return {"count": 0}
+    return {
+        "count": int(len(values)),
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p95": float(np.percentile(values, 95)),
+        "max": float(values.max()),
+    }
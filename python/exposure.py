@@ -0,0 +1,175 @@
+import math
+
+from startup import LazyModule
+
+cv2 = LazyModule("cv2")
+np = LazyModule("numpy")
+
+SATURATED_LEVEL = 250
+HISTOGRAM_SCALE = 0.25  # Histogram from a quarter-size nearest-neighbour thumbnail
+
+
+def exposure_stats(frame):
+    """Brightness histogram statistics of a BGR frame, computed on a small thumbnail"""
+    thumb = cv2.resize(frame, None, fx=HISTOGRAM_SCALE, fy=HISTOGRAM_SCALE, interpolation=cv2.INTER_NEAREST)
+    # The sun is white, so the brightest channel saturates first
+    gray = thumb.max(axis=2) if thumb.ndim == 3 else thumb
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+    total = float(hist.sum()) or 1.0
+
+    # Brightest level with a few pixels, so a single hot pixel does not count as the sun
+    counts_above = np.cumsum(hist[::-1])
+    peak = 255 - int(np.argmax(counts_above >= 3)) if counts_above[-1] >= 3 else 0
+
+    return {
+        "mean": float((hist * np.arange(256)).sum() / total),
+        "peak": peak,
+        "saturated_fraction": float(hist[SATURATED_LEVEL:].sum() / total),
+        "bright_fraction": float(hist[200:].sum() / total),
+    }
+
+
+def precheck(stats, min_peak=200, max_saturated=0.05):
+    """Fast pre-inference check; returns a reason to skip the frame, or None to run the detector.
+
+    Without any near-white pixels there is no visible sun to detect, and with a large blown-out
+    area the detector would box the glare rather than the disc.
+    """
+    if stats["peak"] < min_peak:
+        return "no_sun"
+    if stats["saturated_fraction"] > max_saturated:
+        return "overexposed"
+    return None
+
+
+class ExposureController:
+    """Keeps the sun disc tightly exposed by steering manual exposure (then gain) from the saturation histogram.
+
+    The target is a small saturated core: between target_low and target_high of the pixels at full
+    scale. Corrections are made in stops, damped, and only after settle_frames frames at the new setting.
+    """
+
+    def __init__(self, source, min_exposure=1.0, max_exposure=5000.0, min_gain=0.0, max_gain=100.0,
+                 target_low=0.0002, target_high=0.002, damping=0.5, max_stops=2.0, settle_frames=2,
+                 log_scale=False, manual_mode=1):
+        self.source = source
+        self.min_exposure = min_exposure
+        self.max_exposure = max_exposure
+        self.min_gain = min_gain
+        self.max_gain = max_gain
+        self.target_low = target_low
+        self.target_high = target_high
+        self.damping = damping
+        self.max_stops = max_stops
+        self.settle_frames = settle_frames
+        # Some backends (e.g. DirectShow) take exposure as log2 seconds rather than a linear value
+        self.log_scale = log_scale
+
+        self.manual_mode = manual_mode
+        self.enabled = False
+        self.exposure = None
+        self.gain = None
+        self._frames_since_change = settle_frames
+
+        # Stats
+        self.adjustments = 0
+        self.last_stats = None
+        self.skipped = {}
+
+        self.attach(source)
+
+    def attach(self, source):
+        """Take over a (re)opened camera: switch it to manual exposure and restore the settled exposure and gain.
+
+        Sources that cannot be controlled (files, synthetic, replays) leave the controller disabled.
+        """
+        self.source = source
+        # V4L2 through OpenCV uses 1 for manual exposure
+        self.enabled = hasattr(source, "set") and bool(source.set(cv2.CAP_PROP_AUTO_EXPOSURE, self.manual_mode))
+        if not self.enabled:
+            return False
+        if self.exposure is None:
+            default_exposure = self.min_exposure if self.log_scale else self.max_exposure / 10
+            self.exposure = self._get(cv2.CAP_PROP_EXPOSURE, default_exposure)
+            self.gain = self._get(cv2.CAP_PROP_GAIN, self.min_gain)
+        else:
+            source.set(cv2.CAP_PROP_EXPOSURE, self.exposure)
+            source.set(cv2.CAP_PROP_GAIN, self.gain)
+        self._frames_since_change = 0
+        return True
+
+    def _get(self, prop, default):
+        value = self.source.get(prop)
+        return default if value is None or value == -1 else value
+
+    def _stops_needed(self, stats):
+        """Exposure change in stops that would bring the saturated core into the target band"""
+        saturated = stats["saturated_fraction"]
+        if saturated > self.target_high:
+            return -min(self.max_stops, math.log2(saturated / self.target_high))
+        if saturated < self.target_low:
+            if stats["peak"] >= SATURATED_LEVEL:
+                return min(self.max_stops, math.log2(self.target_low / max(saturated, 1e-6)))
+            # Nothing saturated: brighten until the brightest object reaches full scale
+            return min(self.max_stops, math.log2(SATURATED_LEVEL / max(stats["peak"], 1)))
+        return 0.0
+
+    def update(self, stats):
+        """Feed one frame's stats; returns the new (exposure, gain) when a change was made"""
+        self.last_stats = stats
+        self._frames_since_change += 1
+        if not self.enabled or self._frames_since_change < self.settle_frames:
+            return None
+
+        stops = self.damping * self._stops_needed(stats)
+        if abs(stops) < 0.1:
+            return None
+
+        # Gain adds noise: brighten with exposure before gain, darken by dropping gain before exposure
+        gain = self.gain
+        if stops < 0:
+            gain, stops = self._apply_gain(stops)
+        exposure = self._clamp_exposure(stops)
+        if self.log_scale:
+            stops -= exposure - self.exposure
+        else:
+            stops -= math.log2(exposure / self.exposure)
+        if stops >= 0.1:
+            gain, _ = self._apply_gain(stops)
+        if exposure == self.exposure and gain == self.gain:
+            return None
+
+        if exposure != self.exposure:
+            self.source.set(cv2.CAP_PROP_EXPOSURE, exposure)
+        if gain != self.gain:
+            self.source.set(cv2.CAP_PROP_GAIN, gain)
+        self.exposure, self.gain = exposure, gain
+        self._frames_since_change = 0
+        self.adjustments += 1
+        return exposure, gain
+
+    def _apply_gain(self, stops):
+        """Gain after moving it by stops within its limits, and the stops it could not take"""
+        # Gain is in dB on most UVC cameras: 6 dB per stop
+        gain = min(self.max_gain, max(self.min_gain, self.gain + 6.0 * stops))
+        return gain, stops - (gain - self.gain) / 6.0
+
+    def _clamp_exposure(self, stops):
+        if abs(stops) < 0.1:
+            return self.exposure
+        if self.log_scale:
+            return min(self.max_exposure, max(self.min_exposure, self.exposure + stops))
+        return min(self.max_exposure, max(self.min_exposure, self.exposure * 2 ** stops))
+
+    def record_skip(self, reason):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "exposure": self.exposure,
+            "gain": self.gain,
+            "adjustments": self.adjustments,
+            "skipped_frames": dict(self.skipped),
+            "last": self.last_stats,
+        }
@@ -0,0 +1,301 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_BUCKET_SECONDS = 300  # 5 minute buckets
+DEFAULT_HISTORY_BUCKETS = 288  # 24 hours of 5 minute buckets
+DEFAULT_OFFLINE_AFTER = 600.0
+
+
+class Bucket:
+    """Downsampled detection and telemetry totals for one device over one time bucket"""
+
+    __slots__ = ("start", "frames", "detected", "confidence_sum", "error_sum", "error_count", "max_error",
+                 "telemetry", "cpu_sum", "memory_sum")
+
+    def __init__(self, start):
+        self.start = start
+        self.frames = 0
+        self.detected = 0
+        self.confidence_sum = 0.0
+        self.error_sum = 0.0
+        self.error_count = 0
+        self.max_error = 0.0
+        self.telemetry = 0
+        self.cpu_sum = 0.0
+        self.memory_sum = 0.0
+
+    def add(self, record):
+        if record.get("kind") == "telemetry":
+            self.telemetry += 1
+            self.cpu_sum += record.get("cpu_percent", 0.0)
+            self.memory_sum += record.get("memory_percent", 0.0)
+            return
+
+        self.frames += 1
+        confidence = record.get("confidence")
+        if confidence is not None:
+            self.detected += 1
+            self.confidence_sum += confidence
+        error = record.get("error_degrees")
+        if error is not None:
+            self.error_sum += error
+            self.error_count += 1
+            self.max_error = max(self.max_error, error)
+
+    def merge(self, other):
+        for name in self.__slots__[1:]:
+            if name == "max_error":
+                self.max_error = max(self.max_error, other.max_error)
+            else:
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def to_dict(self, seconds):
+        return {
+            "start": self.start,
+            "seconds": seconds,
+            "frames": self.frames,
+            "detection_rate": self.detected / self.frames if self.frames else None,
+            "mean_confidence": self.confidence_sum / self.detected if self.detected else None,
+            "mean_error_degrees": self.error_sum / self.error_count if self.error_count else None,
+            "max_error_degrees": self.max_error if self.error_count else None,
+            "cpu_percent": self.cpu_sum / self.telemetry if self.telemetry else None,
+            "memory_percent": self.memory_sum / self.telemetry if self.telemetry else None,
+        }
+
+
+class DeviceAggregate:
+    """Rolling per-device state: latest values plus a bounded history of time buckets"""
+
+    def __init__(self, device_id, bucket_seconds=DEFAULT_BUCKET_SECONDS, history_buckets=DEFAULT_HISTORY_BUCKETS):
+        self.device_id = device_id
+        self.bucket_seconds = bucket_seconds
+        self.history_buckets = history_buckets
+        self.buckets = OrderedDict()  # start -> Bucket, oldest first
+        self.last_seen = None
+        self.last_detection = None
+        self.last_telemetry = None
+        self.records = 0
+        self.late_records = 0
+
+    def add(self, record, received_at):
+        """Fold one record into its bucket; returns buckets that aged out of the history"""
+        t = record["t"]
+        start = t - t % self.bucket_seconds
+        bucket = self.buckets.get(start)
+        if bucket is None:
+            if self.buckets and start < next(iter(self.buckets)) and len(self.buckets) >= self.history_buckets:
+                # Older than anything still kept in memory
+                self.late_records += 1
+                return []
+            out_of_order = bool(self.buckets) and start < next(reversed(self.buckets))
+            bucket = self.buckets[start] = Bucket(start)
+            if out_of_order:
+                # A late record opened a bucket in the middle of the history; keep it ordered
+                self.buckets = OrderedDict(sorted(self.buckets.items()))
+        bucket.add(record)
+
+        self.records += 1
+        self.last_seen = max(self.last_seen or received_at, received_at)
+        if record.get("kind") == "telemetry":
+            if self.last_telemetry is None or t >= self.last_telemetry["t"]:
+                self.last_telemetry = record
+        elif record.get("confidence") is not None:
+            if self.last_detection is None or t >= self.last_detection["t"]:
+                self.last_detection = record
+
+        evicted = []
+        while len(self.buckets) > self.history_buckets:
+            evicted.append(self.buckets.popitem(last=False)[1])
+        return evicted
+
+    def history(self, since=None, resolution=None):
+        """Bucket dicts since a timestamp, optionally merged into coarser buckets of resolution seconds"""
+        resolution = max(self.bucket_seconds, resolution or self.bucket_seconds)
+        merged = OrderedDict()
+        for start, bucket in self.buckets.items():
+            if since is not None and start + self.bucket_seconds <= since:
+                continue
+            key = start - start % resolution
+            if key not in merged:
+                merged[key] = Bucket(key)
+            merged[key].merge(bucket)
+        return [bucket.to_dict(resolution) for bucket in merged.values()]
+
+    def summary(self, now, window=3600.0, offline_after=DEFAULT_OFFLINE_AFTER):
+        """Latest values plus totals over the last window seconds"""
+        recent = Bucket(now - window)
+        for start, bucket in self.buckets.items():
+            if start + self.bucket_seconds > now - window:
+                recent.merge(bucket)
+        rolling = recent.to_dict(window)
+        del rolling["start"], rolling["seconds"]
+        return {
+            "device_id": self.device_id,
+            "online": self.last_seen is not None and now - self.last_seen < offline_after,
+            "last_seen": self.last_seen,
+            "last_detection": self.last_detection,
+            "last_telemetry": self.last_telemetry,
+            "records": self.records,
+            "late_records": self.late_records,
+            "rolling": rolling,
+        }
+
+
+class FleetAggregator:
+    """In-memory aggregates for a fleet of trackers, flushing aged-out buckets to a store"""
+
+    def __init__(self, bucket_seconds=DEFAULT_BUCKET_SECONDS, history_buckets=DEFAULT_HISTORY_BUCKETS,
+                 offline_after=DEFAULT_OFFLINE_AFTER, store=None):
+        self.bucket_seconds = bucket_seconds
+        self.history_buckets = history_buckets
+        self.offline_after = offline_after
+        self.store = store
+        self._lock = threading.Lock()
+        self._devices = {}
+
+        # Stats
+        self.batches = 0
+        self.rejected = 0
+
+    def ingest(self, device_id, records, now=None):
+        """Fold a batch of records from one device in; returns the number accepted"""
+        if now is None:
+            now = time.time()
+        accepted = 0
+        evicted = []
+        with self._lock:
+            device = self._devices.get(device_id)
+            if device is None:
+                device = self._devices[device_id] = DeviceAggregate(
+                    device_id, self.bucket_seconds, self.history_buckets
+                )
+            for record in records:
+                if not isinstance(record, dict) or not isinstance(record.get("t"), (int, float)):
+                    self.rejected += 1
+                    continue
+                evicted.extend(device.add(record, now))
+                accepted += 1
+            self.batches += 1
+
+        # Aged-out buckets go to long-term storage outside the lock
+        if evicted and self.store is not None:
+            try:
+                self.store.write_buckets(device_id, [bucket.to_dict(self.bucket_seconds) for bucket in evicted])
+            except Exception as e:
+                print(f"Fleet store error: {e}")
+        return accepted
+
+    def flush(self):
+        """Write every in-memory bucket to the store, used on shutdown"""
+        if self.store is None:
+            return
+        with self._lock:
+            pending = {device_id: [bucket.to_dict(self.bucket_seconds) for bucket in device.buckets.values()]
+                       for device_id, device in self._devices.items()}
+        for device_id, buckets in pending.items():
+            if buckets:
+                self.store.write_buckets(device_id, buckets)
+
+    def device_ids(self):
+        with self._lock:
+            return sorted(self._devices)
+
+    def device_summary(self, device_id, now=None, window=3600.0):
+        if now is None:
+            now = time.time()
+        with self._lock:
+            device = self._devices.get(device_id)
+            return device.summary(now, window, self.offline_after) if device is not None else None
+
+    def device_history(self, device_id, since=None, resolution=None):
+        with self._lock:
+            device = self._devices.get(device_id)
+            return device.history(since, resolution) if device is not None else None
+
+    def status(self, now=None, window=3600.0):
+        """Fleet-wide status: per-device summaries plus fleet totals over the window"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            summaries = [device.summary(now, window, self.offline_after) for device in self._devices.values()]
+            batches, rejected = self.batches, self.rejected
+
+        frames = sum(s["rolling"]["frames"] for s in summaries)
+        detected = sum(s["rolling"]["frames"] * (s["rolling"]["detection_rate"] or 0.0) for s in summaries)
+        return {
+            "devices": len(summaries),
+            "online": sum(1 for s in summaries if s["online"]),
+            "offline": [s["device_id"] for s in summaries if not s["online"]],
+            "window_seconds": window,
+            "frames": frames,
+            "detection_rate": detected / frames if frames else None,
+            "batches": batches,
+            "rejected_records": rejected,
+            "device_summaries": sorted(summaries, key=lambda s: s["device_id"]),
+        }
+
+
+class MemoryStore:
+    """Keeps flushed buckets in memory; the stand-in when no durable storage is configured"""
+
+    def __init__(self, max_buckets=100000):
+        self._lock = threading.Lock()
+        self.max_buckets = max_buckets
+        self.buckets = []
+
+    def write_buckets(self, device_id, buckets):
+        with self._lock:
+            self.buckets.extend(dict(bucket, device_id=device_id) for bucket in buckets)
+            del self.buckets[:-self.max_buckets]
+
+
+class JsonlStore:
+    """Appends flushed buckets to a local JSON lines file, one bucket per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write_buckets(self, device_id, buckets):
+        with self._lock, open(self.path, "a") as f:
+            for bucket in buckets:
+                f.write(json.dumps(dict(bucket, device_id=device_id)) + "\n")
+
+
+class FirestoreStore:
+    """Writes flushed buckets to a Firestore collection in one batched commit per flush"""
+
+    def __init__(self, credentials_path, collection="FleetBuckets"):
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(credentials_path))
+        self._db = firestore.client()
+        self.collection = collection
+
+    def write_buckets(self, device_id, buckets):
+        batch = self._db.batch()
+        for bucket in buckets:
+            # Deterministic ids so a re-flushed bucket overwrites instead of duplicating
+            ref = self._db.collection(self.collection).document(f"{device_id}_{int(bucket['start'])}")
+            batch.set(ref, dict(bucket, device_id=device_id))
+        batch.commit()
+
+
+def create_store(spec):
+    """Create a bucket store from a spec like "memory", "jsonl:path" or "firestore:credentials.json" """
+    kind, _, arg = spec.partition(":")
+    if kind == "memory":
+        return MemoryStore()
+    if kind == "jsonl":
+        return JsonlStore(arg or "results/fleet_buckets.jsonl")
+    if kind == "firestore":
+        return FirestoreStore(arg or "../firebase/firebase-credentials.json")
+    raise ValueError(f"Unknown fleet store '{spec}'")
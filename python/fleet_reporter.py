@@ -0,0 +1,115 @@
+import threading
+from collections import deque
+
+import requests
+
+
+class FleetReporter:
+    """Buffers compact detection/telemetry records and pushes them to the fleet aggregator in batches"""
+
+    def __init__(self, url, batch_size=50, flush_interval=30.0, max_pending=5000, timeout=5.0):
+        self.url = url.rstrip("/")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # device_id -> records; the oldest records are dropped while the aggregator is unreachable
+        self._pending = {}
+        self._max_pending = max_pending
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._session = requests.Session()
+
+        # Stats
+        self.sent = 0
+        self.dropped = 0
+        self.failures = 0
+        self.last_error = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="fleet-reporter")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _add(self, device_id, record):
+        with self._lock:
+            records = self._pending.get(device_id)
+            if records is None:
+                records = self._pending[device_id] = deque(maxlen=self._max_pending)
+            if len(records) == records.maxlen:
+                self.dropped += 1
+            records.append(record)
+            full = len(records) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def record_detections(self, device_id, timestamp, detections):
+        """Record one processed frame, keeping only the best detection's confidence and error"""
+        record = {"t": timestamp, "kind": "frame"}
+        if detections:
+            best = max(detections, key=lambda d: d["confidence"])
+            record["confidence"] = round(best["confidence"], 3)
+            if "azimuth_error" in best:
+                error = (best["azimuth_error"] ** 2 + best["elevation_error"] ** 2) ** 0.5
+                record["error_degrees"] = round(error, 3)
+        self._add(device_id, record)
+
+    def record_telemetry(self, device_id, timestamp, system_info):
+        self._add(device_id, dict(system_info, t=timestamp, kind="telemetry"))
+
+    def flush(self):
+        """Send everything pending, one batch per device; failed batches are put back"""
+        with self._lock:
+            pending = {device_id: list(records) for device_id, records in self._pending.items() if records}
+            for records in self._pending.values():
+                records.clear()
+
+        for device_id, records in pending.items():
+            try:
+                response = self._session.post(f"{self.url}/ingest", json={
+                    "device_id": device_id,
+                    "records": records,
+                }, timeout=self.timeout)
+                response.raise_for_status()
+                self.sent += len(records)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                with self._lock:
+                    queue = self._pending[device_id]
+                    # Put the failed batch back in front of anything recorded meanwhile
+                    kept = deque(records, maxlen=queue.maxlen)
+                    kept.extend(queue)
+                    self.dropped += len(records) + len(queue) - len(kept)
+                    self._pending[device_id] = kept
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+        # Last attempt so a clean shutdown does not lose the tail
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = sum(len(records) for records in self._pending.values())
+        return {
+            "url": self.url,
+            "pending": pending,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,162 @@
+import math
+import threading
+import time
+from collections import deque
+
+from solar import solar_position
+
+
+def frame_brightness(frame, step=16):
+    """Mean pixel brightness (0-255) of a BGR frame, sampled on a sparse grid to stay cheap"""
+    return float(frame[::step, ::step].mean())
+
+
+def clear_sky_irradiance(elevation):
+    """Approximate clear-sky global horizontal irradiance in W/m^2 for a solar elevation in degrees"""
+    if elevation <= 0:
+        return 0.0
+    return 1098.0 * math.sin(math.radians(elevation)) * math.exp(-0.057 / math.sin(math.radians(elevation)))
+
+
+def cloudy_irradiance(elevation, cloud_fraction):
+    """Kasten-Czeplak cloud attenuation of the clear-sky irradiance"""
+    return clear_sky_irradiance(elevation) * (1.0 - 0.75 * cloud_fraction ** 3.4)
+
+
+class CloudForecaster:
+    """Short-horizon estimate of sun visibility from recent frames and the weather trend.
+
+    Recent frames say whether the sun is visible right now but that evidence fades as clouds
+    move (persistence time constant), while the weather report is coarse but extrapolates.
+    """
+
+    def __init__(self, lat, lon, frames=30, persistence=900.0, weather_window=7200.0, min_elevation=5.0):
+        self.lat = lat
+        self.lon = lon
+        self.persistence = persistence
+        self.weather_window = weather_window
+        self.min_elevation = min_elevation
+        self._lock = threading.Lock()
+        self._frames = deque(maxlen=frames)  # (t, visible, confidence, brightness)
+        self._weather = deque(maxlen=64)  # (t, cloud fraction)
+
+    def add_frame(self, timestamp, brightness, detections):
+        """Record image statistics of a processed frame: mean brightness (0-255) and sun detections"""
+        confidence = max((d["confidence"] for d in detections), default=0.0)
+        with self._lock:
+            self._frames.append((timestamp, 1.0 if detections else 0.0, confidence, brightness))
+
+    def add_weather(self, timestamp, clouds):
+        """Record a weather report's cloud coverage in percent"""
+        with self._lock:
+            if self._weather and timestamp <= self._weather[-1][0]:
+                return
+            self._weather.append((timestamp, min(100.0, max(0.0, clouds)) / 100.0))
+
+    def _image_evidence(self):
+        """Sun visibility from recent frames, weighted towards the newest; returns (p_sun, t) or None"""
+        if not self._frames:
+            return None
+        max_brightness = max(frame[3] for frame in self._frames) or 1.0
+        total = weight_sum = 0.0
+        weight = 1.0
+        for t, visible, confidence, brightness in reversed(self._frames):
+            # Detection is the main signal; brightness relative to the recent peak tells thin cloud from thick
+            score = 0.6 * visible + 0.2 * confidence + 0.2 * brightness / max_brightness
+            total += weight * score
+            weight_sum += weight
+            weight *= 0.7
+        return total / weight_sum, self._frames[-1][0]
+
+    def _cloud_trend(self, now):
+        """Least-squares (cloud fraction at now, slope per second) over the recent weather reports"""
+        points = [(t, c) for t, c in self._weather if now - t <= self.weather_window]
+        if not points:
+            if not self._weather:
+                return None
+            points = [self._weather[-1]]
+        if len(points) == 1:
+            return points[0][1], 0.0
+        mean_t = sum(t for t, _ in points) / len(points)
+        mean_c = sum(c for _, c in points) / len(points)
+        var = sum((t - mean_t) ** 2 for t, _ in points)
+        slope = sum((t - mean_t) * (c - mean_c) for t, c in points) / var if var > 0 else 0.0
+        return mean_c + slope * (now - mean_t), slope
+
+    def predict(self, timestamp, now=None):
+        """Estimate sun visibility probability, cloud fraction and irradiance at a future timestamp"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            image = self._image_evidence()
+            trend = self._cloud_trend(now)
+
+        _, elevation = solar_position(timestamp, self.lat, self.lon)
+        weather_cloud = None
+        if trend is not None:
+            cloud_now, slope = trend
+            weather_cloud = min(1.0, max(0.0, cloud_now + slope * (timestamp - now)))
+
+        if image is not None:
+            p_image, observed_at = image
+            # How much the last frames still say about the sky at timestamp
+            image_weight = math.exp(-max(0.0, timestamp - observed_at) / self.persistence)
+            prior = 1.0 - weather_cloud if weather_cloud is not None else 0.5
+            p_sun = image_weight * p_image + (1.0 - image_weight) * prior
+        elif weather_cloud is not None:
+            p_sun = 1.0 - weather_cloud
+        else:
+            p_sun = 0.5
+
+        # Clear-sky probability is about the clouds; the sun being too low makes it untrackable regardless
+        cloud_fraction = 1.0 - p_sun
+        if elevation < self.min_elevation:
+            p_sun = 0.0
+        return {
+            "t": timestamp,
+            "elevation": elevation,
+            "p_sun": p_sun,
+            "cloud_fraction": cloud_fraction,
+            "irradiance": cloudy_irradiance(elevation, cloud_fraction),
+        }
+
+    def plan(self, now=None, horizon=3600.0, min_interval=30.0, max_interval=600.0, skip_below=0.2):
+        """Plan capture times for the next horizon seconds.
+
+        The interval shrinks towards min_interval as the sun gets likely and captures are skipped
+        (checked again after max_interval) while the sun is unlikely to be trackable.
+        """
+        if now is None:
+            now = time.time()
+        schedule = []
+        t = now
+        while t < now + horizon:
+            prediction = self.predict(t, now=now)
+            p_sun = prediction["p_sun"]
+            if p_sun < skip_below:
+                action, interval = "skip", max_interval
+            else:
+                action = "capture"
+                interval = max_interval - (max_interval - min_interval) * (p_sun - skip_below) / (1.0 - skip_below)
+            schedule.append(dict(prediction, action=action, interval=interval))
+            t += interval
+        return schedule
+
+    def next_interval(self, now=None, min_interval=30.0, max_interval=600.0, **kwargs):
+        """Seconds until the next planned capture.
+
+        Skipped stretches still get a probe capture every max_interval, since without fresh frames
+        the forecast could not notice the sky clearing earlier than the weather report does.
+        """
+        if now is None:
+            now = time.time()
+        schedule = self.plan(now=now, min_interval=min_interval, max_interval=max_interval, **kwargs)
+        for slot in schedule:
+            if slot["action"] == "capture":
+                wait = slot["interval"] if slot["t"] <= now else slot["t"] - now
+                return min(wait, max_interval)
+        return max_interval
+
+    def stats(self):
+        with self._lock:
+            return {"frames": len(self._frames), "weather_reports": len(self._weather)}
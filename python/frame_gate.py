@@ -0,0 +1,98 @@
+import threading
+import time
+
+from startup import LazyModule
+
+# Lazy so importing the server does not pull in OpenCV before it is needed
+cv2 = LazyModule("cv2")
+np = LazyModule("numpy")
+
+
+class FrameChangeGate:
+    """Skips inference when a frame is nearly identical to the last frame that was inferred"""
+
+    def __init__(self, threshold=3.0, max_age=30.0, thumb_size=(32, 24)):
+        # Mean absolute grey-level difference (0-255) between thumbnails below which a frame counts as unchanged
+        self.threshold = threshold
+        # Cached results older than this are never reused, so the detector still runs periodically
+        self.max_age = max_age
+        self.thumb_size = thumb_size
+        self._lock = threading.Lock()
+
+        self._ref_thumb = None
+        self._ref_detections = None
+        self._ref_time = None
+        self._pending_thumb = None
+
+        # Stats
+        self._hits = 0
+        self._misses = 0
+        self._inferences = 0
+        self._total_inference = 0.0
+        self._last_difference = None
+
+    def thumbnail(self, frame):
+        """Downscale a frame to a tiny greyscale thumbnail used for comparison"""
+        grey = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(grey, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def lookup(self, frame, now=None, max_age=None):
+        """Return (detections, age_seconds) if the cached result can be reused for this frame, else None"""
+        if now is None:
+            now = time.time()
+        if max_age is None:
+            max_age = self.max_age
+        thumb = self.thumbnail(frame)
+        with self._lock:
+            self._pending_thumb = thumb
+            if self.threshold <= 0 or self._ref_thumb is None:
+                self._misses += 1
+                return None
+
+            age = now - self._ref_time
+            difference = float(np.mean(np.abs(thumb - self._ref_thumb)))
+            self._last_difference = difference
+            if difference >= self.threshold or age > max_age:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            return [dict(detection) for detection in self._ref_detections], age
+
+    def store(self, detections, inference_seconds, now=None):
+        """Record the result of a real inference for the frame last passed to lookup"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            if self._pending_thumb is None:
+                return
+            self._ref_thumb = self._pending_thumb
+            self._ref_detections = [dict(detection) for detection in detections]
+            self._ref_time = now
+            self._pending_thumb = None
+            self._inferences += 1
+            self._total_inference += inference_seconds
+
+    def reset(self):
+        """Forget the reference frame, forcing the next frame through the detector"""
+        with self._lock:
+            self._ref_thumb = None
+            self._ref_detections = None
+            self._ref_time = None
+            self._pending_thumb = None
+
+    def stats(self):
+        """Return hit/miss counts and the estimated inference time saved by reusing results"""
+        with self._lock:
+            total = self._hits + self._misses
+            # The mean cost of the inferences that actually ran estimates what each hit saved
+            avg_inference = self._total_inference / self._inferences if self._inferences else 0.0
+            return {
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "last_difference": self._last_difference,
+                "avg_inference_seconds": avg_inference,
+                "saved_inference_seconds": self._hits * avg_inference,
+            }
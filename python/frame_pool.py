@@ -0,0 +1,77 @@
+import threading
+
+from startup import LazyModule
+
+np = LazyModule("numpy")
+
+
+class FramePool:
+    """Fixed-size pool of preallocated frame buffers, reused across capture cycles instead of reallocated.
+
+    Buffers are grouped by (shape, dtype). At most max_buffers are ever owned by the pool; when all
+    are in use a plain array is handed out and counted as an overflow, and it is simply dropped
+    on release so the pool never grows.
+    """
+
+    def __init__(self, max_buffers=8):
+        self.max_buffers = max_buffers
+        self._lock = threading.Lock()
+        self._free = {}  # (shape, dtype) -> [arrays]
+        # id -> array; holding the arrays keeps their ids from being reused by unrelated objects,
+        # and lookups also compare identity so a foreign array with a recycled id is never taken in
+        self._owned = {}
+        self._in_use = {}
+
+        # Stats
+        self.hits = 0
+        self.allocations = 0
+        self.overflows = 0
+
+    def acquire(self, shape, dtype="uint8"):
+        """Borrow a buffer of the given shape; its contents are whatever the last user left there"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                array = free.pop()
+                self._in_use[id(array)] = array
+                self.hits += 1
+                return array
+            pooled = len(self._owned) < self.max_buffers
+            if not pooled:
+                self.overflows += 1
+
+        array = np.empty(shape, dtype=dtype)
+        with self._lock:
+            if pooled and len(self._owned) < self.max_buffers:
+                self._owned[id(array)] = array
+                self._in_use[id(array)] = array
+                self.allocations += 1
+        return array
+
+    def release(self, array):
+        """Return a buffer; arrays the pool does not own (overflows, foreign frames) are ignored"""
+        if array is None:
+            return
+        with self._lock:
+            if self._in_use.get(id(array)) is not array:
+                return
+            del self._in_use[id(array)]
+            self._free.setdefault((array.shape, array.dtype.str), []).append(array)
+
+    def owns(self, array):
+        with self._lock:
+            return array is not None and self._owned.get(id(array)) is array
+
+    def stats(self):
+        with self._lock:
+            free = sum(len(arrays) for arrays in self._free.values())
+            return {
+                "buffers": len(self._owned),
+                "free": free,
+                "in_use": len(self._in_use),
+                "free_bytes": sum(array.nbytes for arrays in self._free.values() for array in arrays),
+                "hits": self.hits,
+                "allocations": self.allocations,
+                "overflows": self.overflows,
+            }
@@ -0,0 +1,273 @@
+import os
+import time
+
+from startup import LazyModule
+from solar import solar_position
+
+cv2 = LazyModule("cv2")
+np = LazyModule("numpy")
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def _copy_into(frame, image):
+    """Copy frame into the caller's buffer when it fits, so callers can keep reusing one buffer"""
+    if image is None or frame is None or image.shape != frame.shape or image.dtype != frame.dtype:
+        return frame
+    np.copyto(image, frame)
+    return image
+
+
+class FrameSource:
+    """Base class for anything that yields frames; mirrors the cv2.VideoCapture read/isOpened/release API"""
+
+    def isOpened(self):
+        raise NotImplementedError
+
+    def read(self, image=None):
+        """Return (ret, frame) like cv2.VideoCapture.read, filling image in place when its shape matches"""
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class WebcamSource(FrameSource):
+    """Live camera by device index"""
+
+    def __init__(self, index=0):
+        self.index = index
+        self._cap = cv2.VideoCapture(index)
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def read(self, image=None):
+        # VideoCapture decodes straight into image when it has the right shape
+        return self._cap.read(image) if image is not None else self._cap.read()
+
+    def get(self, prop):
+        return self._cap.get(prop)
+
+    def set(self, prop, value):
+        return self._cap.set(prop, value)
+
+    def release(self):
+        self._cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """Recorded video file, optionally looped and paced to its native frame rate"""
+
+    def __init__(self, path, loop=False, realtime=False):
+        self.path = path
+        self.loop = loop
+        self.realtime = realtime
+        self._cap = cv2.VideoCapture(path)
+        self._fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._last_read = None
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def read(self, image=None):
+        if self.realtime:
+            _pace(self._last_read, 1.0 / self._fps)
+            self._last_read = time.time()
+
+        ret, frame = self._cap.read(image) if image is not None else self._cap.read()
+        if not ret and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read(image) if image is not None else self._cap.read()
+        return ret, frame
+
+    def release(self):
+        self._cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Still images from a directory in sorted order, e.g. the repo's test/ images"""
+
+    def __init__(self, directory, loop=True, fps=None):
+        self.directory = directory
+        self.loop = loop
+        self.fps = fps
+        self._paths = []
+        if os.path.isdir(directory):
+            self._paths = sorted(
+                os.path.join(directory, name) for name in os.listdir(directory)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        self._index = 0
+        self._last_read = None
+
+    def isOpened(self):
+        return len(self._paths) > 0
+
+    def read(self, image=None):
+        if self.fps:
+            _pace(self._last_read, 1.0 / self.fps)
+            self._last_read = time.time()
+
+        if self._index >= len(self._paths):
+            if not self.loop or not self._paths:
+                return False, None
+            self._index = 0
+
+        frame = cv2.imread(self._paths[self._index])
+        self._index += 1
+        return frame is not None, _copy_into(frame, image)
+
+
+class SyntheticSunSource(FrameSource):
+    """Deterministic simulated camera rendering the sun on its real path, with clouds and sensor noise.
+
+    The camera is fixed at (camera_azimuth, camera_elevation) with the given field of view. Each
+    frame advances a simulated clock by speed / fps seconds (speed seconds when fps is None), so
+    speed > 1 runs faster than real time. With fps=None frames are produced as fast as they are read.
+    """
+
+    def __init__(self, start_time=None, lat=37.7749, lon=-122.4194, width=640, height=480,
+                 fov=(60.0, 45.0), camera_azimuth=None, camera_elevation=None,
+                 fps=None, speed=1.0, cloud_cover=0.3, cloud_speed=20.0, noise=4.0,
+                 sun_radius=18, seed=0):
+        self.lat = lat
+        self.lon = lon
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self.fps = fps
+        self.speed = speed
+        self.cloud_cover = cloud_cover
+        self.cloud_speed = cloud_speed
+        self.noise = noise
+        self.sun_radius = sun_radius
+
+        self.sim_time = start_time if start_time is not None else time.time()
+        azimuth, elevation = solar_position(self.sim_time, lat, lon)
+        # Default to pointing at where the sun starts, like a panel that was aligned once
+        self.camera_azimuth = azimuth if camera_azimuth is None else camera_azimuth
+        self.camera_elevation = elevation if camera_elevation is None else camera_elevation
+
+        self._rng = np.random.default_rng(seed)
+        self._clouds = self._make_clouds()
+        self._last_read = None
+        self._frame_count = 0
+        self._open = True
+
+    def _make_clouds(self):
+        """Place cloud blobs on a sky strip twice the frame width so they can drift across"""
+        count = int(round(self.cloud_cover * 12))
+        return [
+            (
+                self._rng.uniform(-self.width, self.width),  # x offset
+                self._rng.uniform(0, self.height),  # y
+                self._rng.uniform(40, 140),  # radius
+                self._rng.uniform(0.4, 0.9),  # opacity
+            )
+            for _ in range(count)
+        ]
+
+    def sun_pixel(self, timestamp=None):
+        """Project the sun's position at a time onto (x, y) pixel coordinates and elevation"""
+        azimuth, elevation = solar_position(self.sim_time if timestamp is None else timestamp, self.lat, self.lon)
+        d_az = (azimuth - self.camera_azimuth + 180) % 360 - 180
+        d_el = elevation - self.camera_elevation
+        x = self.width / 2 + d_az / self.fov[0] * self.width
+        y = self.height / 2 - d_el / self.fov[1] * self.height
+        return x, y, elevation
+
+    def isOpened(self):
+        return self._open
+
+    def read(self, image=None):
+        if not self._open:
+            return False, None
+        if self.fps:
+            _pace(self._last_read, 1.0 / self.fps)
+            self._last_read = time.time()
+
+        frame = self.render()
+        self._frame_count += 1
+        self.sim_time += self.speed / (self.fps or 1.0)
+        return True, _copy_into(frame, image)
+
+    def render(self):
+        """Render one frame for the current simulated time"""
+        sun_x, sun_y, elevation = self.sun_pixel()
+
+        # Sky gradient darkens as the sun approaches the horizon
+        daylight = float(np.clip((elevation + 6) / 30, 0.05, 1.0))
+        rows = np.linspace(1.0, 0.6, self.height, dtype=np.float32)[:, None]
+        sky = np.empty((self.height, self.width, 3), dtype=np.float32)
+        sky[:, :, 0] = 200 * rows * daylight  # B
+        sky[:, :, 1] = 150 * rows * daylight  # G
+        sky[:, :, 2] = 90 * rows * daylight  # R
+
+        if elevation > 0:
+            cv2.circle(sky, (int(sun_x), int(sun_y)), int(self.sun_radius * 3), (180, 230, 250), -1, cv2.LINE_AA)
+            sky = cv2.GaussianBlur(sky, (0, 0), self.sun_radius)
+            cv2.circle(sky, (int(sun_x), int(sun_y)), int(self.sun_radius), (255, 255, 255), -1, cv2.LINE_AA)
+
+        # Clouds drift horizontally with the simulated clock
+        if self._clouds:
+            mask = np.zeros((self.height, self.width), dtype=np.float32)
+            drift = (self.sim_time * self.cloud_speed / 60) % (2 * self.width)
+            for x, y, radius, opacity in self._clouds:
+                cx = (x + drift) % (2 * self.width) - self.width / 2
+                cv2.circle(mask, (int(cx), int(y)), int(radius), float(opacity), -1)
+            mask = cv2.GaussianBlur(mask, (0, 0), 25)[:, :, None]
+            cloud_colour = np.array([215, 215, 215], dtype=np.float32) * daylight
+            sky = sky * (1 - mask) + cloud_colour * mask
+
+        if self.noise > 0:
+            sky += self._rng.normal(0, self.noise, sky.shape).astype(np.float32)
+
+        return np.clip(sky, 0, 255).astype(np.uint8)
+
+    def release(self):
+        self._open = False
+
+
+def _pace(last_read, period):
+    """Sleep so consecutive reads are at least period seconds apart"""
+    if last_read is None:
+        return
+    remaining = period - (time.time() - last_read)
+    if remaining > 0:
+        time.sleep(remaining)
+
+
+def create_frame_source(spec="webcam:0"):
+    """Build a frame source from a spec string.
+
+    Supported specs: "webcam:<index>", "video:<path>", "images:<directory>" and
+    "synthetic[:key=value,...]" where keys are SyntheticSunSource arguments
+    (e.g. "synthetic:fps=10,speed=60,cloud_cover=0.5,seed=1").
+    """
+    kind, _, arg = spec.partition(":")
+    kind = kind.strip().lower()
+
+    if kind == "webcam":
+        return WebcamSource(int(arg) if arg else 0)
+    if kind == "video":
+        return VideoFileSource(arg, loop=True)
+    if kind == "images":
+        return ImageDirectorySource(arg)
+    if kind == "synthetic":
+        kwargs = {}
+        for item in filter(None, arg.split(",")):
+            key, _, value = item.partition("=")
+            kwargs[key.strip()] = float(value)
+        for key in ("width", "height", "sun_radius", "seed"):
+            if key in kwargs:
+                kwargs[key] = int(kwargs[key])
+        return SyntheticSunSource(**kwargs)
+
+    raise ValueError(f"Unknown frame source '{spec}'")
@@ -0,0 +1,218 @@
+import subprocess
+import threading
+import time
+from collections import deque
+
+import psutil
+
+THERMAL_ZONE_FILE = "/sys/class/thermal/thermal_zone0/temp"
+
+# Bits of `vcgencmd get_throttled` that mean the SoC is being slowed right now
+THROTTLE_NOW_MASK = 0x1 | 0x2 | 0x4 | 0x8  # under-voltage, frequency capped, throttled, soft temperature limit
+
+
+def read_cpu_temperature():
+    """SoC temperature in degrees C, or None where it cannot be read"""
+    try:
+        with open(THERMAL_ZONE_FILE) as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        pass
+    try:
+        for entries in psutil.sensors_temperatures().values():
+            if entries:
+                return entries[0].current
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def read_throttle_flags():
+    """Raw `vcgencmd get_throttled` flags on a Raspberry Pi, or None elsewhere"""
+    try:
+        output = subprocess.run(["vcgencmd", "get_throttled"], capture_output=True, text=True, timeout=2).stdout
+        return int(output.strip().split("=")[1], 16)
+    except (OSError, subprocess.SubprocessError, IndexError, ValueError):
+        return None
+
+
+class DegradationLevel:
+    """Settings the pipeline runs with at one governor level; each level keeps the previous level's savings"""
+
+    def __init__(self, name, small_model=False, input_size=None, interval_scale=1.0, annotate=True):
+        self.name = name
+        self.small_model = small_model
+        self.input_size = input_size
+        self.interval_scale = interval_scale
+        self.annotate = annotate
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "small_model": self.small_model,
+            "input_size": self.input_size,
+            "interval_scale": self.interval_scale,
+            "annotate": self.annotate,
+        }
+
+
+def build_levels(small_model_available=False, reduced_input_size=None, interval_scale=2.0):
+    """Degradation ladder from full quality down, leaving out steps this deployment cannot take"""
+    levels = [DegradationLevel("full")]
+    small = False
+    size = None
+    if small_model_available:
+        small = True
+        levels.append(DegradationLevel("small_model", small_model=small))
+    if reduced_input_size:
+        size = reduced_input_size
+        levels.append(DegradationLevel("reduced_input", small_model=small, input_size=size))
+    levels.append(DegradationLevel("long_interval", small_model=small, input_size=size, interval_scale=interval_scale))
+    levels.append(DegradationLevel("minimal", small_model=small, input_size=size, interval_scale=interval_scale,
+                                   annotate=False))
+    return levels
+
+
+class ThermalGovernor:
+    """Steps down through degradation levels under heat, throttling or slow inference, and back up with hysteresis.
+
+    Stepping down needs one hot sample after down_hold seconds at the current level; stepping up
+    needs every sample over the last up_hold seconds to be below the lower thresholds.
+
+    Latency is judged as a slowdown against the best latency seen at each level. A level first
+    reached while inference was slowed down has not seen its normal latency yet, so its baseline
+    is estimated from its first samples and the slowdown at the time of the change; otherwise the
+    slow latency would pass as normal there and the governor would step straight back up.
+    """
+
+    def __init__(self, levels, temp_high=75.0, temp_low=65.0, latency_high=1.8, latency_low=1.3,
+                 down_hold=30.0, up_hold=180.0, on_change=None):
+        self.levels = levels
+        self.temp_high = temp_high
+        self.temp_low = temp_low
+        # Latency thresholds are ratios to the best latency seen at the current level
+        self.latency_high = latency_high
+        self.latency_low = latency_low
+        self.down_hold = down_hold
+        self.up_hold = up_hold
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._level = 0
+        self._changed_at = None  # No hold before the first change
+        self._cool_since = None
+        self._latency = None  # EWMA of inference seconds
+        self._baseline = {}  # level -> best latency EWMA seen there
+        self._slowdown = None  # Latency ratio when the level last changed, for seeding a new level's baseline
+        self._history = deque(maxlen=50)
+
+        # Last readings
+        self.temperature = None
+        self.throttle_flags = None
+        self.changes = 0
+
+    @property
+    def level(self):
+        with self._lock:
+            return self.levels[self._level]
+
+    def set_levels(self, levels):
+        """Swap in a new ladder, staying on the level of the same name or else the same step; returns (old, new)"""
+        with self._lock:
+            old = self.levels[self._level]
+            names = [level.name for level in levels]
+            self._level = names.index(old.name) if old.name in names else min(self._level, len(levels) - 1)
+            self.levels = levels
+            # Baselines are kept per step, and the steps have moved
+            self._baseline = {}
+            self._latency = None
+            self._slowdown = None
+            return old, self.levels[self._level]
+
+    def observe_latency(self, seconds):
+        """Feed an observed inference time in seconds"""
+        with self._lock:
+            self._latency = seconds if self._latency is None else 0.8 * self._latency + 0.2 * seconds
+            best = self._baseline.get(self._level)
+            if best is None:
+                self._baseline[self._level] = self._latency / (self._slowdown or 1.0)
+                self._slowdown = None
+            elif self._latency < best:
+                self._baseline[self._level] = self._latency
+
+    def _latency_ratio(self):
+        best = self._baseline.get(self._level)
+        if self._latency is None or not best:
+            return None
+        return self._latency / best
+
+    def update(self, now=None, temperature=None, throttle_flags=None):
+        """Take a reading and change level if needed; returns the new level on a change, else None"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self.temperature = temperature
+            self.throttle_flags = throttle_flags
+            throttled = throttle_flags is not None and bool(throttle_flags & THROTTLE_NOW_MASK)
+            ratio = self._latency_ratio()
+
+            hot_reasons = []
+            if temperature is not None and temperature >= self.temp_high:
+                hot_reasons.append(f"temperature {temperature:.1f}C")
+            if throttled:
+                hot_reasons.append(f"throttle flags {throttle_flags:#x}")
+            if ratio is not None and ratio >= self.latency_high:
+                hot_reasons.append(f"latency {ratio:.1f}x baseline")
+
+            cool = (not throttled
+                    and (temperature is None or temperature <= self.temp_low)
+                    and (ratio is None or ratio <= self.latency_low))
+            if not cool:
+                self._cool_since = None
+            elif self._cool_since is None:
+                self._cool_since = now
+
+            held = now - self._changed_at if self._changed_at is not None else float("inf")
+            target = self._level
+            if hot_reasons and self._level < len(self.levels) - 1 and held >= self.down_hold:
+                target = self._level + 1
+                reason = ", ".join(hot_reasons)
+            elif cool and self._level > 0 and min(held, now - self._cool_since) >= self.up_hold:
+                target = self._level - 1
+                reason = "cooled down"
+            if target == self._level:
+                return None
+
+            old = self.levels[self._level]
+            self._level = target
+            self._changed_at = now
+            self._cool_since = None
+            # Latency at the new level is compared against what that level achieves; the current
+            # slowdown stands in for it until that level has a baseline of its own
+            self._latency = None
+            self._slowdown = ratio if ratio is not None and ratio > 1.0 else None
+            self.changes += 1
+            new = self.levels[target]
+            self._history.append({"t": now, "from": old.name, "to": new.name, "reason": reason})
+
+        print(f"Governor: {old.name} -> {new.name} ({reason})")
+        if self.on_change is not None:
+            self.on_change(old, new, reason)
+        return new
+
+    def stats(self, now=None):
+        if now is None:
+            now = time.time()
+        with self._lock:
+            return {
+                "level": self._level,
+                "level_name": self.levels[self._level].name,
+                "settings": self.levels[self._level].to_dict(),
+                "levels": [level.name for level in self.levels],
+                "seconds_at_level": now - self._changed_at if self._changed_at is not None else None,
+                "temperature": self.temperature,
+                "throttle_flags": self.throttle_flags,
+                "latency_seconds": self._latency,
+                "latency_ratio": self._latency_ratio(),
+                "changes": self.changes,
+                "history": list(self._history),
+            }
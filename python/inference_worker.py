@@ -0,0 +1,203 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+from startup import LazyModule
+
+torch = LazyModule("torch")
+
+# Lower value is served first
+PRIORITY_LIVE = 0  # Live tracking frames from the camera loop
+PRIORITY_TEST = 1  # Continuous test-mode frames
+PRIORITY_BATCH = 2  # API-triggered, batch and re-analysis jobs
+
+PRIORITY_NAMES = {
+    PRIORITY_LIVE: "live",
+    PRIORITY_TEST: "test",
+    PRIORITY_BATCH: "batch",
+}
+
+
+class _Job:
+    """A single queued inference request"""
+
+    def __init__(self, frame, priority, source, predict_kwargs):
+        self.frame = frame
+        self.priority = priority
+        self.source = source
+        self.predict_kwargs = predict_kwargs
+        self.future = Future()
+        self.enqueued_at = time.time()
+
+
+class InferenceWorker:
+    """Single thread that owns all model.predict calls and serves them from a priority queue"""
+
+    def __init__(self, get_model, name="inference", preprocessor=None, on_inference=None):
+        # Callable returning the current model, so reloads are picked up without restarting the worker
+        self._get_model = get_model
+        self._name = name
+        # Optional FramePreprocessor; its buffers are only ever touched from the worker thread
+        self._preprocessor = preprocessor
+        # Called with the seconds each successful job took to run, excluding its time in the queue
+        self._on_inference = on_inference
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        # source -> newest pending job, used to drop stale frames
+        self._pending_by_source = {}
+        self._thread = None
+        self._running = False
+
+        # Metrics
+        self._processed = 0
+        self._dropped_stale = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+        self._total_inference = 0.0
+        self._last_inference = 0.0
+
+    # Lifecycle
+    def start(self):
+        """Start the worker thread if it is not already running"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self._name)
+            self._thread.daemon = True
+            self._thread.start()
+            return True
+
+    def stop(self, timeout=5.0):
+        """Stop the worker, cancelling anything still queued"""
+        with self._cond:
+            self._running = False
+            while self._heap:
+                _, _, job = heapq.heappop(self._heap)
+                job.future.cancel()
+            self._pending_by_source.clear()
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+            return not thread.is_alive()
+        return True
+
+    # Submission
+    def submit(self, frame, priority=PRIORITY_BATCH, source=None, **predict_kwargs):
+        """Queue a frame for inference and return a Future resolving to the first YOLO result.
+
+        If source is given, any frame from the same source still waiting in the queue is
+        cancelled, since only the newest frame from a live feed is worth running.
+        """
+        job = _Job(frame, priority, source, predict_kwargs)
+        with self._cond:
+            if not self._running:
+                job.future.set_exception(RuntimeError("Inference worker is not running"))
+                return job.future
+
+            if source is not None:
+                stale = self._pending_by_source.get(source)
+                if stale is not None and stale.future.cancel():
+                    self._dropped_stale += 1
+                self._pending_by_source[source] = job
+
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._cond.notify()
+        return job.future
+
+    def predict(self, frame, priority=PRIORITY_BATCH, source=None, timeout=None, **predict_kwargs):
+        """Blocking convenience wrapper around submit"""
+        return self.submit(frame, priority=priority, source=source, **predict_kwargs).result(timeout=timeout)
+
+    # Worker loop
+    def _next_job(self):
+        with self._cond:
+            while True:
+                while self._running and not self._heap:
+                    self._cond.wait()
+                if not self._running:
+                    return None
+                _, _, job = heapq.heappop(self._heap)
+                if job.source is not None and self._pending_by_source.get(job.source) is job:
+                    del self._pending_by_source[job.source]
+                # Skip jobs that were dropped as stale or cancelled by the caller
+                if job.future.set_running_or_notify_cancel():
+                    return job
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            started = time.time()
+            wait = started - job.enqueued_at
+            try:
+                model = self._get_model()
+                if model is None:
+                    raise RuntimeError("Model not loaded")
+                if self._preprocessor is None:
+                    result = model.predict(source=job.frame, verbose=False, **job.predict_kwargs)[0]
+                else:
+                    tensor, letterbox = self._preprocessor(job.frame)
+                    result = model.predict(source=torch.from_numpy(tensor), verbose=False, **job.predict_kwargs)[0]
+                    # Ultralytics leaves boxes of tensor inputs in model-input pixels; map a copy, since
+                    # the boxes are inference tensors and cannot be changed in place out here
+                    if result.boxes is not None:
+                        data = result.boxes.data.clone()
+                        letterbox.to_frame(data[:, :4])
+                        result.orig_shape = job.frame.shape[:2]
+                        result.boxes = type(result.boxes)(data, result.orig_shape)
+                job.future.set_result(result)
+                failed = False
+            except Exception as e:
+                job.future.set_exception(e)
+                failed = True
+            inference = time.time() - started
+
+            with self._cond:
+                self._processed += 1
+                self._failed += int(failed)
+                self._total_wait += wait
+                self._last_wait = wait
+                self._max_wait = max(self._max_wait, wait)
+                self._total_inference += inference
+                self._last_inference = inference
+            if not failed and self._on_inference is not None:
+                try:
+                    self._on_inference(inference)
+                except Exception as e:
+                    print(f"Inference callback error: {e}")
+
+    # Metrics
+    def metrics(self):
+        """Return queue depth, wait time and throughput counters"""
+        with self._cond:
+            depth_by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+            depth = 0
+            for priority, _, job in self._heap:
+                if job.future.cancelled():
+                    continue
+                depth += 1
+                depth_by_priority[PRIORITY_NAMES.get(priority, str(priority))] += 1
+
+            processed = self._processed
+            return {
+                "running": self._running and self._thread is not None and self._thread.is_alive(),
+                "queue_depth": depth,
+                "queue_depth_by_priority": depth_by_priority,
+                "processed": processed,
+                "failed": self._failed,
+                "dropped_stale": self._dropped_stale,
+                "avg_wait_seconds": self._total_wait / processed if processed else 0.0,
+                "max_wait_seconds": self._max_wait,
+                "last_wait_seconds": self._last_wait,
+                "avg_inference_seconds": self._total_inference / processed if processed else 0.0,
+                "last_inference_seconds": self._last_inference,
+            }
@@ -1,18 +1,52 @@
-from flask import Flask, request, jsonify
-import cv2
 import time
+
+from startup import LazyModule, StartupTimer
+
+# Started before anything heavy so phase timings are relative to process start
+startup_timer = StartupTimer()
+
+from flask import Flask, Response, request, jsonify
 from datetime import datetime
+import gc
+import importlib.util
+import math
 import os
+import socket
+import threading
 import warnings
-import numpy as np
 import requests
-import threading
-from supervision import Detections
-from ultralytics import YOLO
+from concurrent.futures import CancelledError
 from flask_cors import CORS
-import firebase_admin
-from firebase_admin import credentials, firestore
 import psutil
+from runtime_state import RuntimeState
+from preprocess import FramePreprocessor
+from inference_worker import InferenceWorker, PRIORITY_LIVE, PRIORITY_TEST, PRIORITY_BATCH
+from frame_gate import FrameChangeGate
+from frame_sources import create_frame_source
+from calibration import load_calibration, DEFAULT_CALIBRATION_FILE
+from actuator import create_actuator, PanTiltController
+from tracking import TrackingEstimator, TrackingStats
+from clock import SystemClock
+from session import SessionRecorder, RecordingFrameSource
+from clip_buffer import ClipBuffer
+from devices import Device, DeviceRegistry, DEFAULT_DEVICE_ID, parse_devices_spec
+from fleet_reporter import FleetReporter
+from forecast import CloudForecaster, frame_brightness
+from power import PowerManager
+from governor import ThermalGovernor, build_levels, read_cpu_temperature, read_throttle_flags
+from profiler import SamplingProfiler
+from frame_pool import FramePool
+from exposure import ExposureController, exposure_stats, precheck
+from active_learning import ActiveLearningCollector
+from solar import solar_position
+from rollups import Rollups
+from preview import PreviewPublisher, MJPEG_BOUNDARY
+from runtime_config import ConfigManager, ConfigError, DEFAULT_CONFIG_FILE
+
+# Heavy modules are imported on first use so the server can answer /status right away;
+# ultralytics, supervision and firebase_admin are imported inside the functions that need them
+cv2 = LazyModule("cv2")
+np = LazyModule("numpy")
 
 # Suppress warnings
 warnings.filterwarnings('ignore', category=UserWarning)
@@ -20,29 +54,190 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
 app = Flask(__name__)
 CORS(app)  # This enables CORS for all routes
-# Global variables
-camera_active = False
-camera_thread = None
-interval_time = 60  # Default interval in seconds
-last_detection_time = None
-model = None
-cap = None
-weather_data = None
-next_interval_time = None
+# Shared runtime state (model, camera, interval, weather and worker threads)
+state = RuntimeState(interval_time=60)  # Default interval in seconds
+
+CAMERA_WORKER = "camera"
+TEST_MODE_WORKER = "test_mode"
+TRACKING_WORKER = "tracking"
+WORKER_JOIN_TIMEOUT = 5.0
+
+# Tuning knobs that can change while running: a JSON file of overrides, re-read when it changes,
+# and PUT /config; readers take runtime_config.current once per frame or interval calculation
+CONFIG_FILE = os.environ.get("CONFIG_FILE", DEFAULT_CONFIG_FILE)  # Empty keeps API changes in memory only
+CONFIG_POLL_INTERVAL = float(os.environ.get("CONFIG_POLL_INTERVAL", "5"))  # Seconds between file checks
+CONFIG_WORKER = "config"
+
+def validate_config(values, previous):
+    """Cross-field checks the per-setting schema cannot express"""
+    errors = []
+    if values["clear_cloud_coverage"] > values["overcast_cloud_coverage"]:
+        errors.append("clear_cloud_coverage must not exceed overcast_cloud_coverage")
+    if values["forecast_min_interval"] > values["forecast_max_interval"]:
+        errors.append("forecast_min_interval must not exceed forecast_max_interval")
+    # A typo would only surface in the background reload, after the change was accepted
+    for name in ("model_path", "model_path_small"):
+        path = values[name]
+        if previous is not None and path != getattr(previous, name) and path and not os.path.exists(path):
+            errors.append(f"{name} not found: {path}")
+    return errors
+
+runtime_config = ConfigManager(path=CONFIG_FILE or None, validator=validate_config)
+runtime_config.reload_file()
+# Registered after the first load; the callbacks it needs are defined further down
+runtime_config.add_listener(lambda old, new, changed: apply_config_change(old, new, changed))
+runtime_config.add_listener(lambda old, new, changed: log_config_change(old, new, changed), after_lock=True)
+
+# Letterbox, colour conversion and normalisation fused into preallocated buffers on the worker thread
+FUSED_PREPROCESS = os.environ.get("FUSED_PREPROCESS", "1") == "1"
+MODEL_INPUT_SIZE = int(os.environ.get("MODEL_INPUT_SIZE", "640"))  # Must match the exported model
+
+# The fused path hands torch tensors to the model; without torch, Ultralytics preprocesses numpy frames itself
+if FUSED_PREPROCESS and importlib.util.find_spec("torch") is None:
+    print("torch is not installed, falling back to Ultralytics preprocessing")
+    FUSED_PREPROCESS = False
+
+frame_preprocessor = FramePreprocessor(MODEL_INPUT_SIZE) if FUSED_PREPROCESS else None
+
+# Capture and annotation buffers reused by the camera loops instead of allocated per frame
+FRAME_POOL_BUFFERS = int(os.environ.get("FRAME_POOL_BUFFERS", "8"))
+frame_pool = FramePool(max_buffers=FRAME_POOL_BUFFERS)
+
+# Manual exposure steered from the saturation histogram so the sun disc is not blown out;
+# only webcams accept it, other sources keep their frames as they are
+EXPOSURE_CONTROL = os.environ.get("EXPOSURE_CONTROL", "1") == "1"
+EXPOSURE_TARGET_LOW = float(os.environ.get("EXPOSURE_TARGET_LOW", "0.0002"))  # Fraction of saturated pixels
+EXPOSURE_TARGET_HIGH = float(os.environ.get("EXPOSURE_TARGET_HIGH", "0.002"))
+EXPOSURE_MIN = float(os.environ.get("EXPOSURE_MIN", "1"))  # Backend units, 100us steps on V4L2
+EXPOSURE_MAX = float(os.environ.get("EXPOSURE_MAX", "5000"))
+EXPOSURE_LOG_SCALE = os.environ.get("EXPOSURE_LOG_SCALE", "0") == "1"  # Set for backends taking log2 seconds
+EXPOSURE_PRECHECK = os.environ.get("EXPOSURE_PRECHECK", "1") == "1"  # Skip inference on sunless or blown-out frames
+
+# All model.predict calls go through this single worker; the model is not thread-safe
+# The governor is fed the time each job spends running, so a queue backed up behind test or tracking
+# frames does not read as slow inference
+inference_worker = InferenceWorker(
+    get_model=lambda: state.model, preprocessor=frame_preprocessor,
+    on_inference=lambda seconds: governor.observe_latency(seconds)
+)
+INFERENCE_TIMEOUT = 60.0
+
+# Per-source gates that reuse the last result when the fixed camera sees an unchanged scene
+FRAME_GATE_THRESHOLD = float(os.environ.get("FRAME_GATE_THRESHOLD", "3.0"))  # 0 disables the gate
+# Seconds before forcing inference; 0 derives it from the capture interval, since the camera loop
+# captures once per interval and any fixed age below that would expire every cached result
+FRAME_GATE_MAX_AGE = float(os.environ.get("FRAME_GATE_MAX_AGE", "0"))
+FRAME_GATE_MAX_REUSES = int(os.environ.get("FRAME_GATE_MAX_REUSES", "3"))  # Captures in a row served from cache
+# Limit for sources without a capture interval; test mode captures every test_mode_delay
+FRAME_GATE_FIXED_MAX_AGE = FRAME_GATE_MAX_AGE or 30.0
+
+def frame_gate_max_age(interval):
+    """Age limit for cached results of a source capturing every interval seconds"""
+    if FRAME_GATE_MAX_AGE > 0:
+        return FRAME_GATE_MAX_AGE
+    # Half an interval of slack so capture jitter does not expire the last allowed reuse
+    return (FRAME_GATE_MAX_REUSES + 0.5) * interval
+
+frame_gates = {
+    CAMERA_WORKER: FrameChangeGate(threshold=FRAME_GATE_THRESHOLD, max_age=FRAME_GATE_FIXED_MAX_AGE),
+    TEST_MODE_WORKER: FrameChangeGate(threshold=FRAME_GATE_THRESHOLD, max_age=FRAME_GATE_FIXED_MAX_AGE),
+}
 
 # Firebase setup - keep JSON method, remove storage bucket
 FIREBASE_CREDENTIALS = os.environ.get("FIREBASE_CREDENTIALS", "../firebase/firebase-credentials.json")
 # Remove storage bucket reference
 
-try:
-    cred = credentials.Certificate(FIREBASE_CREDENTIALS)
-    # Initialize without storage bucket
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
-    firebase_enabled = True
-except Exception as e:
-    print(f"Firebase initialization error: {e}")
-    firebase_enabled = False
+# Set by initialize_firebase() once the client is ready; logging is skipped until then
+db = None
+firebase_enabled = False
+
+def initialize_firebase():
+    """Initialize the Firebase client, run in the background during startup"""
+    global db, firebase_enabled
+    try:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        
+        cred = credentials.Certificate(FIREBASE_CREDENTIALS)
+        # Initialize without storage bucket
+        firebase_admin.initialize_app(cred)
+        db = firestore.client()
+        firebase_enabled = True
+    except Exception as e:
+        print(f"Firebase initialization error: {e}")
+        firebase_enabled = False
+
+# Frame source spec, e.g. "webcam:0", "video:../test/test.mp4", "images:../test" or "synthetic:speed=60"
+FRAME_SOURCE = os.environ.get("FRAME_SOURCE", "webcam:0")
+
+# Extra cameras/panels served by this process, e.g. "east=webcam:1|serial:/dev/ttyUSB1;west=webcam:2"
+DEVICES = os.environ.get("DEVICES", "")
+
+# All devices share the inference worker and model; the default device uses the global state
+device_registry = DeviceRegistry()
+default_device = device_registry.add(Device(DEFAULT_DEVICE_ID, FRAME_SOURCE, state=state, source_key=CAMERA_WORKER))
+
+# Camera calibration (pixel offsets -> degrees) and motor command output
+CALIBRATION_FILE = os.environ.get("CALIBRATION_FILE", DEFAULT_CALIBRATION_FILE)
+CAMERA_HFOV = float(os.environ.get("CAMERA_HFOV", "60"))  # Used when no calibration file exists
+ACTUATOR_OUTPUT = os.environ.get("ACTUATOR_OUTPUT", "none")  # "loopback", "serial:/dev/ttyUSB0:115200", "socket:host:port"
+ACTUATOR_STEPS_PER_DEGREE = float(os.environ.get("ACTUATOR_STEPS_PER_DEGREE", "10"))
+
+# Closed-loop tracking: fast control loop, detector only when the estimate gets uncertain
+TRACKING_RATE_HZ = float(os.environ.get("TRACKING_RATE_HZ", "20"))
+TRACKING_UNCERTAINTY_THRESHOLD = float(os.environ.get("TRACKING_UNCERTAINTY_THRESHOLD", "0.5"))  # Degrees
+
+# Set by initialize()
+calibration = None
+actuator_output = None
+pan_tilt_controller = None
+
+# Set while tracking mode runs, for status reporting
+tracking_estimator = None
+tracking_stats = None
+
+# Time source for the pipeline; replays swap in a VirtualClock
+clock = SystemClock()
+
+# When set, each camera start records frames, weather responses and outputs to a new session here
+RECORD_SESSION_DIR = os.environ.get("RECORD_SESSION_DIR")
+session_recorder = None
+
+# Rolling in-memory clip of recent frames, exported when tracking goes wrong
+CLIP_BUFFER_SECONDS = float(os.environ.get("CLIP_BUFFER_SECONDS", "30"))  # 0 disables the buffer
+# Frames kept regardless of age: the camera loop captures every 60-600 s, far apart for a 30 s window
+CLIP_MIN_FRAMES = int(os.environ.get("CLIP_MIN_FRAMES", "10"))
+CLIP_LOW_CONFIDENCE = float(os.environ.get("CLIP_LOW_CONFIDENCE", "0.4"))
+CLIP_MAX_ERROR_DEGREES = float(os.environ.get("CLIP_MAX_ERROR_DEGREES", "5"))
+CLIP_OUTPUT_DIR = "results/clips"
+# source -> ClipBuffer, so a clip never mixes frames from different cameras or loops
+clip_buffers = {}
+clip_buffers_lock = threading.Lock()
+# source -> whether the previous frame had a detection, to spot lost tracks
+clip_had_detection = {}
+
+def clip_buffer_for(source):
+    """The source's clip buffer, created on first use; None when clips are disabled"""
+    if CLIP_BUFFER_SECONDS <= 0:
+        return None
+    with clip_buffers_lock:
+        buffer = clip_buffers.get(source)
+        if buffer is None:
+            buffer = clip_buffers[source] = ClipBuffer(
+                seconds=CLIP_BUFFER_SECONDS, min_frames=CLIP_MIN_FRAMES,
+                output_dir=os.path.join(CLIP_OUTPUT_DIR, source.replace(":", "_")),
+            )
+        return buffer
+
+# When set, compact detection/telemetry batches go to the fleet aggregator instead of per-frame Firestore logs
+FLEET_AGGREGATOR_URL = os.environ.get("FLEET_AGGREGATOR_URL")
+fleet_reporter = FleetReporter(FLEET_AGGREGATOR_URL) if FLEET_AGGREGATOR_URL else None
+# Names this unit in the fleet; local device ids such as "default" repeat on every unit
+FLEET_DEVICE_ID = os.environ.get("FLEET_DEVICE_ID") or socket.gethostname()
+
+def fleet_device_id(device):
+    """Fleet-wide id of a local device, such as pi-roof:default"""
+    return f"{FLEET_DEVICE_ID}:{device.device_id}"
 
 # Weather API configuration 
 WEATHER_API_KEY = os.environ.get("WEATHER_API_KEY", "22ba524647a0d39172ebc63307bbf2f1")
@@ -50,9 +245,103 @@ WEATHER_API_KEY = os.environ.get("WEATHER_API_KEY", "22ba524647a0d39172ebc63307b
 LAT = float(os.environ.get("WEATHER_LAT", "37.7749"))  # Default latitude
 LON = float(os.environ.get("WEATHER_LON", "-122.4194"))  # Default longitude
 
+# Shared weather sidecar (weather_gateway.py) so devices at one site make a single upstream call
+WEATHER_GATEWAY_URL = os.environ.get("WEATHER_GATEWAY_URL")
+
+# Plan daytime captures from recent frames and the cloud trend instead of the current weather alone
+# (bounded by the forecast_min_interval/forecast_max_interval runtime settings). Off by default, since it
+# replaces the 60/180/300 s weather bands with 30-600 s intervals; /forecast is served either way
+FORECAST_SCHEDULING = os.environ.get("FORECAST_SCHEDULING", "0") == "1"
+cloud_forecaster = CloudForecaster(LAT, LON)
+# Runtime settings that only steer the weather-report fallback the forecaster replaces once it has frames
+WEATHER_BAND_SETTINGS = (
+    "interval_clear", "interval_partly_cloudy", "interval_overcast", "clear_cloud_coverage", "overcast_cloud_coverage"
+)
+
+def forecast_scheduling_active():
+    """Whether daytime intervals currently come from the forecaster rather than the weather bands"""
+    return FORECAST_SCHEDULING and cloud_forecaster.stats()["frames"] > 0
+
+def inactive_settings():
+    """Runtime settings the pipeline is ignoring right now, so changes to them are not silently lost"""
+    if forecast_scheduling_active():
+        return list(WEATHER_BAND_SETTINGS)
+    return [] if FORECAST_SCHEDULING else ["forecast_min_interval", "forecast_max_interval"]
+
+# When set, informative frames (low confidence, tracker disagreement, unseen conditions) are kept
+# here as a deduplicated YOLO-labelled sample set; export it with scripts/export_active_learning.py.
+# Disagreement needs a tracker prediction, so those samples only come from tracking mode
+ACTIVE_LEARNING_DIR = os.environ.get("ACTIVE_LEARNING_DIR")
+ACTIVE_LEARNING_MAX_MB = float(os.environ.get("ACTIVE_LEARNING_MAX_MB", "500"))
+ACTIVE_LEARNING_CONFIDENCE = float(os.environ.get("ACTIVE_LEARNING_CONFIDENCE", "0.5"))
+ACTIVE_LEARNING_DISAGREEMENT = float(os.environ.get("ACTIVE_LEARNING_DISAGREEMENT", "2"))  # Degrees
+# Tracker predictions only count against the detector while the tracker's own uncertainty is below this
+ACTIVE_LEARNING_MAX_UNCERTAINTY = float(os.environ.get("ACTIVE_LEARNING_MAX_UNCERTAINTY", "2"))  # Degrees
+active_learning = ActiveLearningCollector(
+    ACTIVE_LEARNING_DIR, max_bytes=int(ACTIVE_LEARNING_MAX_MB * 1024 * 1024),
+    low_confidence=ACTIVE_LEARNING_CONFIDENCE, disagreement_degrees=ACTIVE_LEARNING_DISAGREEMENT
+) if ACTIVE_LEARNING_DIR else None
+
+# Minute/hour/day history served by /history, so dashboards need not scan Firestore logs
+ROLLUPS_FILE = os.environ.get("ROLLUPS_FILE", "results/rollups.json")  # Empty keeps history in memory only
+ROLLUPS_SAVE_INTERVAL = float(os.environ.get("ROLLUPS_SAVE_INTERVAL", "300"))
+ROLLUPS_WORKER = "rollups"
+rollups = Rollups()
+
+# Small JPEG previews of the latest annotated frame for the dashboard, shared by all viewers
+PREVIEW_WIDTH = int(os.environ.get("PREVIEW_WIDTH", "320"))
+PREVIEW_QUALITY = int(os.environ.get("PREVIEW_QUALITY", "60"))
+PREVIEW_MAX_FPS = float(os.environ.get("PREVIEW_MAX_FPS", "2"))
+PREVIEW_MAX_VIEWERS = int(os.environ.get("PREVIEW_MAX_VIEWERS", "4"))
+
+def preview_for(device):
+    """The device's preview publisher, created on first use"""
+    if device.preview is None:
+        device.preview = PreviewPublisher(
+            max_width=PREVIEW_WIDTH, quality=PREVIEW_QUALITY, max_fps=PREVIEW_MAX_FPS, max_viewers=PREVIEW_MAX_VIEWERS
+        )
+    return device.preview
+
+# Release the camera and unload the model overnight or after a stretch without activity
+POWER_SAVE = os.environ.get("POWER_SAVE", "1") == "1"
+IDLE_AFTER = float(os.environ.get("IDLE_AFTER", "1800"))  # Seconds without requests or running loops
+PREWARM_LEAD = float(os.environ.get("PREWARM_LEAD", "600"))  # Seconds before sunrise to reload and reopen
+CAMERA_WARMUP_FRAMES = 5  # Frames discarded after reopening so exposure settles
+IDLE_WORKER = "idle_monitor"
+power_manager = PowerManager(LAT, LON, idle_after=IDLE_AFTER, prewarm_lead=PREWARM_LEAD)
+
+# Thermal/load governor: degrade step by step as the SoC heats up or inference slows down
+GOVERNOR_ENABLED = os.environ.get("GOVERNOR", "1") == "1"
+GOVERNOR_INTERVAL = float(os.environ.get("GOVERNOR_INTERVAL", "5"))  # Seconds between temperature samples
+GOVERNOR_TEMP_HIGH = float(os.environ.get("GOVERNOR_TEMP_HIGH", "75"))
+GOVERNOR_TEMP_LOW = float(os.environ.get("GOVERNOR_TEMP_LOW", "65"))
+# Only for models exported with dynamic input shapes; 0 leaves the input size alone
+GOVERNOR_INPUT_SIZE = int(os.environ.get("GOVERNOR_INPUT_SIZE", "0"))
+GOVERNOR_WORKER = "governor"
+
+# Admin endpoints (profiling) require this token in X-Admin-Token when set
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+profiler = SamplingProfiler(
+    interval=float(os.environ.get("PROFILER_INTERVAL", "0.01")),
+    max_overhead=float(os.environ.get("PROFILER_MAX_OVERHEAD", "0.02"))
+)
+
+def build_governor_levels(model_path_small):
+    """Degradation ladder for this deployment; the small-model step needs a small model"""
+    return build_levels(small_model_available=bool(model_path_small), reduced_input_size=GOVERNOR_INPUT_SIZE or None)
+
+governor = ThermalGovernor(
+    build_governor_levels(runtime_config.current.model_path_small),
+    temp_high=GOVERNOR_TEMP_HIGH,
+    temp_low=GOVERNOR_TEMP_LOW,
+    on_change=lambda old, new, reason: apply_degradation_level(old, new, reason)
+)
+
 # Keep utility functions from original code
-def draw_central_box(frame, box_size=50):
+def draw_central_box(frame, box_size=None):
     """Draws a central box on the frame."""
+    if box_size is None:
+        box_size = runtime_config.current.central_box_size
     height, width = frame.shape[:2]
     center_x, center_y = width // 2, height // 2
     top_left = (center_x - box_size // 2, center_y - box_size // 2)
@@ -78,7 +367,8 @@ def load_yolo_model(model_path):
     try:
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model file not found: {model_path}")
-            
+        
+        from ultralytics import YOLO
         model = YOLO(model_path)
         print(f"YOLO model loaded successfully from {model_path}")
         return model
@@ -97,6 +387,7 @@ def calculate_distance(center_x, center_y, bbox):
 
 def yolo_to_detections(yolo_result):
     """Convert YOLO results to Supervision Detections format"""
+    from supervision import Detections
     try:
         if yolo_result is None or len(yolo_result.boxes) == 0:
             return Detections.empty()
@@ -116,14 +407,26 @@ def yolo_to_detections(yolo_result):
         return Detections.empty()
 
 # Weather and interval management
+def fetch_weather_response():
+    """Fetch the raw OpenWeatherMap response for our location, through the site gateway if configured"""
+    if WEATHER_GATEWAY_URL:
+        url = f"{WEATHER_GATEWAY_URL.rstrip('/')}/weather?lat={LAT}&lon={LON}"
+    else:
+        url = f"https://api.openweathermap.org/data/2.5/weather?lat={LAT}&lon={LON}&appid={WEATHER_API_KEY}"
+    response = requests.get(url, timeout=10)
+    return response.json()
+
+# Replaceable so replays can serve recorded responses instead of calling the API
+weather_fetcher = fetch_weather_response
+
 def get_weather_data():
     """Fetch current weather data using a weather API"""
-    global weather_data
     try:
-        url = f"https://api.openweathermap.org/data/2.5/weather?lat={LAT}&lon={LON}&appid={WEATHER_API_KEY}"
-        response = requests.get(url)
-        data = response.json()
-        weather_data = {
+        data = weather_fetcher()
+        recorder = session_recorder
+        if recorder is not None:
+            recorder.record_weather(clock.time(), data)
+        weather = {
             "weather_condition": data["weather"][0]["main"],
             "weather_description": data["weather"][0]["description"],
             "temperature": data["main"]["temp"],
@@ -131,23 +434,30 @@ def get_weather_data():
             "wind_speed": data["wind"]["speed"],
             "sunrise": data["sys"]["sunrise"],
             "sunset": data["sys"]["sunset"],
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.fromtimestamp(clock.time()).isoformat()
         }
-        return weather_data
+        state.weather_data = weather
+        cloud_forecaster.add_weather(clock.time(), weather["clouds"])
+        return weather
     except Exception as e:
         print(f"Error fetching weather data: {e}")
         return None
 
-def calculate_next_interval():
+def calculate_next_interval(device_state=None):
     """Calculate the next interval time based on weather conditions and time of day"""
-    global interval_time, next_interval_time
+    if device_state is None:
+        device_state = state
     
+    # Weather is fetched once per site and shared by every device
+    weather_data = state.weather_data
     if weather_data is None:
-        get_weather_data()
+        weather_data = get_weather_data()
     
     if weather_data:
+        # One snapshot so every band and threshold comes from the same configuration
+        config = runtime_config.current
         # Get current time
-        current_time = time.time()
+        current_time = clock.time()
         sunrise = weather_data.get("sunrise")
         sunset = weather_data.get("sunset")
         
@@ -164,22 +474,35 @@ def calculate_next_interval():
             weather_condition = weather_data["weather_condition"].lower()
             cloud_coverage = weather_data.get("clouds", 0)
             
-            # Adjust interval based on weather conditions
-            if "clear" in weather_condition or cloud_coverage < 20:
+            # Adjust interval based on the forecast once frames have been seen, else on weather conditions
+            forecast_scheduled = forecast_scheduling_active()
+            if forecast_scheduled:
+                new_interval = int(round(cloud_forecaster.next_interval(
+                    now=current_time, min_interval=config.forecast_min_interval, max_interval=config.forecast_max_interval
+                )))
+            elif "clear" in weather_condition or cloud_coverage < config.clear_cloud_coverage:
                 # Clear sky or minimal clouds: shorter interval
-                new_interval = 60  # 1 minute
-            elif "cloud" in weather_condition or cloud_coverage < 70:
+                new_interval = config.interval_clear  # 1 minute by default
+            elif "cloud" in weather_condition or cloud_coverage < config.overcast_cloud_coverage:
                 # Partly cloudy: medium interval
-                new_interval = 180  # 3 minutes
+                new_interval = config.interval_partly_cloudy  # 3 minutes by default
             else:
                 # Overcast or rainy: longer interval
-                new_interval = 300  # 5 minutes
+                new_interval = config.interval_overcast  # 5 minutes by default
             
             interval_formula = f"Daytime - Based on {weather_condition} with {cloud_coverage}% cloud coverage"
+            
+            # The governor stretches the interval while the device is running hot
+            interval_scale = governor.level.interval_scale
+            if interval_scale != 1.0:
+                new_interval = int(new_interval * interval_scale)
+                interval_formula += f", stretched {interval_scale:g}x by the thermal governor"
+            if forecast_scheduled:
+                p_sun = cloud_forecaster.predict(current_time, now=current_time)["p_sun"]
+                interval_formula += f" and forecast sun probability {p_sun:.2f}"
         
         # Update the interval time
-        interval_time = new_interval
-        next_interval_time = datetime.now().timestamp() + interval_time
+        _, interval_time, next_interval_time = device_state.set_interval(new_interval, now=current_time)
         
         # Log the interval calculation to Firebase
         post_program_details_to_firebase(weather_data, interval_formula, next_interval_time)
@@ -187,67 +510,121 @@ def calculate_next_interval():
         return interval_time
     
     # Default interval if weather data is not available
-    interval_time = 120  # 2 minutes
-    next_interval_time = datetime.now().timestamp() + interval_time
+    _, interval_time, _ = device_state.set_interval(120, now=clock.time())  # 2 minutes
     return interval_time
 
 # Image and video processing functions
-def process_image_with_model(image, return_annotated=False):
-    """Process an image with the YOLO model and return results"""
+def extract_sun_detections(results, center_x, center_y):
+    """Convert a YOLO result into the sun detection dicts reported by the API"""
+    detections = []
+    if results is not None and results.boxes:
+        for box, cls_id, conf in zip(
+            results.boxes.xyxy.cpu().numpy(), 
+            results.boxes.cls.cpu().numpy().astype(int),
+            results.boxes.conf.cpu().numpy()
+        ):
+            # Process only class_0 (sun)
+            if cls_id == 0:
+                x1, y1, x2, y2 = map(int, box)
+                
+                # Calculate distances from the center
+                distance_x, distance_y = calculate_distance(center_x, center_y, (x1, y1, x2, y2))
+                
+                # Add to detections list
+                detections.append({
+                    "bbox": [float(x1), float(y1), float(x2), float(y2)],
+                    "confidence": float(conf),
+                    "class_id": int(cls_id),
+                    "distance_x": float(distance_x),
+                    "distance_y": float(distance_y)
+                })
+    return detections
+
+def process_image_with_model(image, return_annotated=False, priority=PRIORITY_BATCH, source=None,
+                             annotation_buffer=None, gate_max_age=None):
+    """Process an image with the YOLO model and return results.
+    
+    The annotated frame is drawn into annotation_buffer when one of the right shape is given;
+    gate_max_age overrides how old a reused result of the source's frame gate may be.
+    """
     try:
-        if model is None:
+        # Reloads the model if it was unloaded while idle
+        if not ensure_model_loaded():
             return {"error": "Model not loaded"}, None, None
             
-        # Create a copy of the image for processing
-        frame = image.copy()
-        
-        # Draw central box on the frame
-        center_x, center_y = draw_central_box(frame)
-        
-        # Process image with YOLO
-        results = model.predict(source=frame, conf=0.3, verbose=False)[0]
-        
-        # Process results
-        detections = []
-        if results is not None and results.boxes:
-            for box, cls_id, conf in zip(
-                results.boxes.xyxy.cpu().numpy(), 
-                results.boxes.cls.cpu().numpy().astype(int),
-                results.boxes.conf.cpu().numpy()
-            ):
-                # Process only class_0 (sun)
-                if cls_id == 0:
-                    x1, y1, x2, y2 = map(int, box)
-                    
-                    # Calculate distances from the center
-                    distance_x, distance_y = calculate_distance(center_x, center_y, (x1, y1, x2, y2))
-                    
-                    # Add to detections list
-                    detections.append({
-                        "bbox": [float(x1), float(y1), float(x2), float(y2)],
-                        "confidence": float(conf),
-                        "class_id": int(cls_id),
-                        "distance_x": float(distance_x),
-                        "distance_y": float(distance_y)
-                    })
-                    
-                    # Draw bounding box and distance info on the frame
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
-                    cv2.putText(
-                        frame,
-                        f"dx: {distance_x:.1f}, dy: {distance_y:.1f}",
-                        (x1 + 5, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.5,
-                        (255, 255, 0),
-                        1
-                    )
+        # At the lowest governor levels nothing is drawn or saved
+        level = governor.level
+        if level.annotate:
+            # Create a copy of the image for processing, reusing the caller's buffer if possible
+            if annotation_buffer is not None and annotation_buffer.shape == image.shape:
+                frame = annotation_buffer
+                np.copyto(frame, image)
+            else:
+                frame = image.copy()
+            
+            # Draw central box on the frame
+            center_x, center_y = draw_central_box(frame)
+        else:
+            frame = image
+            center_x, center_y = image.shape[1] // 2, image.shape[0] // 2
+        
+        # Reuse the last result if the scene has not changed since the last inference for this source
+        gate = frame_gates.get(source)
+        cached = gate.lookup(image, now=clock.time(), max_age=gate_max_age) if gate is not None else None
+        
+        if cached is not None:
+            detections, cache_age = cached
+        else:
+            cache_age = None
+            inference_started = time.time()
+            
+            # Process the clean capture (not the copy with the overlay drawn) on the shared inference worker
+            predict_kwargs = {"conf": runtime_config.current.confidence_threshold}
+            if level.input_size is not None and frame_preprocessor is None:
+                predict_kwargs["imgsz"] = level.input_size
+            future = inference_worker.submit(image, priority=priority, source=source, **predict_kwargs)
+            try:
+                results = future.result(timeout=INFERENCE_TIMEOUT)
+            except CancelledError:
+                return {"error": "Frame dropped, superseded by a newer frame"}, None, None
+            
+            detections = extract_sun_detections(results, center_x, center_y)
+            
+            # Convert pixel offsets to pointing errors in degrees
+            if calibration is not None:
+                height, width = frame.shape[:2]
+                for detection in detections:
+                    azimuth_error, elevation_error = calibration.detection_angles(detection, width, height)
+                    detection["azimuth_error"] = azimuth_error
+                    detection["elevation_error"] = elevation_error
+            if gate is not None:
+                gate.store(detections, time.time() - inference_started, now=clock.time())
+        
+        # Draw bounding box and distance info on the frame
+        for detection in (detections if level.annotate else []):
+            x1, y1, x2, y2 = map(int, detection["bbox"])
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
+            cv2.putText(
+                frame,
+                f"dx: {detection['distance_x']:.1f}, dy: {detection['distance_y']:.1f}",
+                (x1 + 5, y1 - 10),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                (255, 255, 0),
+                1
+            )
         
         # Prepare response
         response = {
             "detections": detections,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.fromtimestamp(clock.time()).isoformat(),
         }
+        if cache_age is not None:
+            response["cached"] = True
+            response["cache_age_seconds"] = cache_age
+        
+        if not level.annotate:
+            return response, None, None
         
         # Save the processed image
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -263,122 +640,353 @@ def process_image_with_model(image, return_annotated=False):
         print(f"Error processing image: {e}")
         return {"error": str(e)}, None, None
 
-# Modify the camera function to run directly instead of in a thread
-def camera_function():
-    """Function to run the camera and model detection"""
-    global camera_active, cap, last_detection_time, next_interval_time
+def send_actuator_command(detections, controller=None):
+    """Send a pan/tilt correction for the most confident detection, if an actuator is configured"""
+    if controller is None:
+        controller = pan_tilt_controller
+    if controller is None or not detections:
+        return None
+    best = max(detections, key=lambda detection: detection["confidence"])
+    if "azimuth_error" not in best:
+        return None
+    return controller.update(best["azimuth_error"], best["elevation_error"])
+
+def check_clip_events(source, detections, timestamp):
+    """Export the source's clip buffer when a detection is lost, has low confidence or shows a large tracking error"""
+    clip_buffer = clip_buffer_for(source)
+    if clip_buffer is None:
+        return None
+    
+    had_detection = clip_had_detection.get(source, False)
+    clip_had_detection[source] = bool(detections)
+    
+    reason, details = None, None
+    if not detections:
+        if had_detection:
+            reason = "lost_detection"
+    else:
+        best = max(detections, key=lambda detection: detection["confidence"])
+        error = math.hypot(best.get("azimuth_error", 0.0), best.get("elevation_error", 0.0))
+        if best["confidence"] < CLIP_LOW_CONFIDENCE:
+            reason, details = "low_confidence", {"confidence": best["confidence"]}
+        elif error > CLIP_MAX_ERROR_DEGREES:
+            reason, details = "tracking_error", {"error_degrees": error}
+    
+    if reason is None:
+        return None
+    details = dict(details or {}, source=source)
+    clip_buffer.trigger(reason, details, now=timestamp)
+    return reason
+
+def collection_condition(timestamp):
+    """Coarse weather and sun-elevation bucket a frame was taken in, for active learning"""
+    weather_data = state.weather_data
+    elevation = solar_position(timestamp, LAT, LON)[1]
+    condition = weather_data["weather_condition"].lower() if weather_data else "unknown"
+    clouds = weather_data.get("clouds", 0) if weather_data else 0
+    return f"{condition}|clouds={clouds // 25 * 25}|elevation={int(elevation // 15 * 15)}"
+
+# Camera loop, run in a worker thread owned by the runtime state
+def idle_until_sunrise(stop_event, device, cap, recorder=None):
+    """Release the device's camera, unload the model once nothing else is awake and sleep until the pre-warm time.
+    
+    Returns the frame source to continue with: the same one if the pre-warm window has already
+    started, a reopened one after the sleep, or None if stopped or the camera failed to reopen.
+    """
+    now = clock.time()
+    wake_time = power_manager.wake_time(now)
+    if wake_time is not None and wake_time <= now:
+        return cap
+    # Polar night: check again in a day
+    if wake_time is None:
+        wake_time = now + 86400
+    
+    print(f"Device {device.device_id} idling until {datetime.fromtimestamp(wake_time).isoformat()}")
+    cap.release()
+    device.state.cap = None
+    power_manager.set_awake(device.device_id, False)
+    if not power_manager.any_awake():
+        power_manager.enter_idle("night", now)
+        unload_model("night")
+    
+    # One long wait instead of waking every second
+    stopped = clock.wait(stop_event, wake_time - now)
+    power_manager.set_awake(device.device_id, True)
+    power_manager.exit_idle(clock.time())
+    if stopped:
+        return None
+    
+    # Pre-warm: reload the model and reopen the camera so the first daytime frame is served at full speed
+    ensure_model_loaded()
+    cap = create_frame_source(device.source_spec)
+    if recorder is not None:
+        cap = RecordingFrameSource(cap, recorder, clock)
+    if not cap.isOpened():
+        print(f"Error: Could not reopen camera for device {device.device_id}")
+        return None
+    if device.exposure is not None:
+        device.exposure.attach(cap)
+    for _ in range(CAMERA_WARMUP_FRAMES):
+        cap.read()
+    device.state.cap = cap
+    print(f"Device {device.device_id} pre-warmed for sunrise")
+    return cap
+
+def camera_function(stop_event, source=None, recorder=None, device=None):
+    """Function to run the camera and model detection for one device until stop_event is set.
     
+    source and recorder let the replay harness drive the loop with recorded frames and
+    collect its outputs; normally the source comes from the device's frame source spec.
+    """
+    global session_recorder
+    
+    if device is None:
+        device = default_device
+    device_state = device.state
+    is_default = device is default_device
+    
+    cap = None
+    capture_shape = None
+    pooled_buffers = []
+    power_manager.set_awake(device.device_id, True)
     try:
+        # Sessions record the site weather, so only the default device records them
+        if is_default:
+            if recorder is None and RECORD_SESSION_DIR:
+                recorder = SessionRecorder.create(RECORD_SESSION_DIR)
+                print(f"Recording session to {recorder.path}")
+            session_recorder = recorder
+        
         # Initialize camera
-        cap = cv2.VideoCapture(0)
+        cap = source if source is not None else create_frame_source(device.source_spec)
+        if recorder is not None:
+            cap = RecordingFrameSource(cap, recorder, clock)
+        device_state.cap = cap
         if not cap.isOpened():
-            print("Error: Could not open camera")
-            camera_active = False
+            print(f"Error: Could not open camera for device {device.device_id}")
             return
+        if EXPOSURE_CONTROL:
+            if device.exposure is None:
+                device.exposure = ExposureController(
+                    cap, min_exposure=EXPOSURE_MIN, max_exposure=EXPOSURE_MAX,
+                    target_low=EXPOSURE_TARGET_LOW, target_high=EXPOSURE_TARGET_HIGH,
+                    log_scale=EXPOSURE_LOG_SCALE,
+                    settle_frames=1  # Captures are seconds apart, so every frame shows the last correction
+                )
+            else:
+                device.exposure.attach(cap)
         
         # Initial calculations
-        calculate_next_interval()
+        calculate_next_interval(device_state)
         
         # Create results directory
         os.makedirs("results", exist_ok=True)
         
-        print("Camera started, beginning detection loop")
-        camera_active = True
+        print(f"Camera started for device {device.device_id}, beginning detection loop")
         
-        while camera_active:
+        while not stop_event.is_set():
             # Check if it's time to capture and process
-            current_time = datetime.now().timestamp()
+            current_time = clock.time()
+            power_manager.record_wakeup(current_time)
+            
+            # Overnight, release the camera and sleep until shortly before sunrise instead of polling
+            if POWER_SAVE and source is None and power_manager.is_night(current_time):
+                cap = idle_until_sunrise(stop_event, device, cap, recorder)
+                if cap is None:
+                    break
+                current_time = clock.time()
+            
+            next_interval_time = device_state.next_interval_time
             
             if next_interval_time is None or current_time >= next_interval_time:
-                print(f"Processing frame at {datetime.now().isoformat()}")
+                print(f"Processing frame for device {device.device_id} at {datetime.fromtimestamp(current_time).isoformat()}")
                 
-                # Capture frame
-                ret, frame = cap.read()
+                # Nothing keeps a frame past its cycle, so last cycle's buffers can go back to the pool
+                for buffer in pooled_buffers:
+                    frame_pool.release(buffer)
+                pooled_buffers.clear()
+                
+                # Capture frame, decoding into a pooled buffer once the frame size is known
+                capture_buffer = frame_pool.acquire(capture_shape) if capture_shape is not None else None
+                pooled_buffers.append(capture_buffer)
+                ret, frame = cap.read(capture_buffer)
                 if not ret:
                     print("Error: Failed to capture frame")
-                    time.sleep(1)
+                    clock.wait(stop_event, 1)
                     continue
+                capture_shape = frame.shape
                 
-                # Process the frame
-                results, annotated_frame, output_path = process_image_with_model(frame, return_annotated=True)
+                # Correct the exposure for the next frame and skip inference on frames the detector cannot use
+                skip_reason = None
+                exposure = device.exposure
+                if exposure is not None and exposure.enabled:
+                    frame_stats = exposure_stats(frame)
+                    exposure.update(frame_stats)
+                    if EXPOSURE_PRECHECK:
+                        skip_reason = precheck(frame_stats)
+                
+                if skip_reason is None:
+                    # Process the frame, annotating into a second pooled buffer
+                    annotation_buffer = frame_pool.acquire(frame.shape) if governor.level.annotate else None
+                    pooled_buffers.append(annotation_buffer)
+                    results, annotated_frame, output_path = process_image_with_model(
+                        frame, return_annotated=True, priority=PRIORITY_LIVE, source=device.source_key,
+                        annotation_buffer=annotation_buffer, gate_max_age=frame_gate_max_age(device_state.interval_time)
+                    )
+                else:
+                    print(f"Skipping inference for device {device.device_id}: {skip_reason}")
+                    exposure.record_skip(skip_reason)
+                    results = {"detections": [], "timestamp": datetime.now().isoformat(), "skipped": skip_reason}
+                    annotated_frame, output_path = None, None
                 
-                # Log results to Firebase using the internal function
-                if "error" not in results:
+                preview_for(device).publish(annotated_frame if annotated_frame is not None else frame, now=current_time)
+                
+                # A blown-out frame says nothing about where the sun is, so it is not acted on
+                usable = "error" not in results and skip_reason != "overexposed"
+                
+                # Keep recent frames in memory and dump them when something looks wrong
+                clip_buffer = clip_buffer_for(device.source_key)
+                if clip_buffer is not None:
+                    clip_buffer.add(annotated_frame if annotated_frame is not None else frame, current_time)
+                    if usable:
+                        check_clip_events(device.source_key, results["detections"], current_time)
+                
+                # Steer the panel towards the most confident detection. A cached result's errors were
+                # measured before the correction already sent for them, so acting again would overshoot
+                if usable:
+                    if not results.get("cached"):
+                        send_actuator_command(results["detections"], device.controller)
+                    cloud_forecaster.add_frame(current_time, frame_brightness(frame), results["detections"])
+                
+                # Keep the frame for labelling if the model could learn from it
+                if active_learning is not None and usable and skip_reason is None:
+                    active_learning.observe(
+                        frame, results["detections"], condition=collection_condition(current_time), now=current_time
+                    )
+                
+                if recorder is not None:
+                    recorder.record_output(current_time, "detections", results.get("detections", []))
+                
+                # CPU since the last cycle; read once, since each call resets psutil's measurement window
+                cpu_percent = psutil.cpu_percent()
+                
+                # Log results to the fleet aggregator, or directly to Firebase using the internal function
+                if usable:
                     # Get system info
                     system_info = {
-                        "cpu_percent": psutil.cpu_percent(),
+                        "cpu_percent": cpu_percent,
                         "memory_percent": psutil.virtual_memory().percent,
                         "disk_percent": psutil.disk_usage('/').percent
                     }
                     
-                    # Log model status using internal function
-                    post_current_status_to_firebase(
-                        model_details={
-                            "detections": results["detections"],
-                            "timestamp": results["timestamp"]
-                        },
-                        raspberry_details=system_info
-                    )
+                    if fleet_reporter is not None:
+                        fleet_reporter.record_detections(fleet_device_id(device), current_time, results["detections"])
+                        fleet_reporter.record_telemetry(fleet_device_id(device), current_time, system_info)
+                    else:
+                        # Log model status using internal function
+                        post_current_status_to_firebase(
+                            model_details={
+                                "detections": results["detections"],
+                                "timestamp": results["timestamp"],
+                                "device_id": device.device_id
+                            },
+                            raspberry_details=system_info
+                        )
                 
                 # Calculate next interval
                 get_weather_data()  # Update weather data
-                calculate_next_interval()
+                interval_time = calculate_next_interval(device_state)
+                
+                if recorder is not None:
+                    recorder.record_output(current_time, "interval", {
+                        "interval_time": interval_time,
+                        "next_interval_time": device_state.next_interval_time
+                    })
                 
-                last_detection_time = current_time
+                rollups.record(
+                    device.device_id, current_time, results["detections"] if usable else None,
+                    interval=interval_time, cpu_percent=cpu_percent
+                )
+                
+                device_state.last_detection_time = current_time
             
-            # Sleep for a short time to avoid high CPU usage
-            time.sleep(1)
+            # Sleep for a short time to avoid high CPU usage, waking early on stop
+            clock.wait(stop_event, 1)
         
     except Exception as e:
         print(f"Camera function error: {e}")
     finally:
         if cap is not None and cap.isOpened():
             cap.release()
-        camera_active = False
-        print("Camera stopped")
+        device_state.cap = None
+        for buffer in pooled_buffers:
+            frame_pool.release(buffer)
+        power_manager.set_awake(device.device_id, False)
+        if recorder is not None:
+            recorder.close()
+        if is_default:
+            session_recorder = None
+        print(f"Camera stopped for device {device.device_id}")
         
 # Flask API Endpoints
+def device_not_found_response(device_id):
+    return jsonify({
+        "status": "error",
+        "message": f"Unknown device '{device_id}'",
+        "timestamp": datetime.now().isoformat()
+    }), 404
+
 @app.route('/start_stop_camera', methods=['PUT'])
-def start_stop_camera():
-    """Endpoint to start or stop the camera and model detection"""
-    global camera_active
-    
+@app.route('/devices/<device_id>/start_stop_camera', methods=['PUT'])
+def start_stop_camera(device_id=DEFAULT_DEVICE_ID):
+    """Endpoint to start or stop the camera and model detection for a device"""
     try:
+        device = device_registry.get(device_id)
+        if device is None:
+            return device_not_found_response(device_id)
+        device_state = device.state
+        
         data = request.json
         action = data.get('action', '').lower()
         
-        if action == 'start' and not camera_active:
+        if action == 'start':
             # Initialize model if not loaded
-            if model is None:
-                return jsonify({"error": "Model not loaded"}), 500
+            if not ensure_model_loaded():
+                return model_status_response()
             
-            camera_thread = threading.Thread(target=camera_function)
-            camera_thread.daemon = True
-            camera_thread.start()
+            # Both loops drive the default actuator, so only one may run at a time
+            if device is default_device and state.is_running(TRACKING_WORKER):
+                return jsonify({
+                    "status": "error",
+                    "message": "Tracking mode is active, stop it before starting the camera loop",
+                    "timestamp": datetime.now().isoformat()
+                }), 409
             
-            return jsonify({
-                "status": "success",
-                "message": "Camera and model detection started",
-                "timestamp": datetime.now().isoformat()
-            })
+            # Check-and-start is atomic, so concurrent requests cannot launch two camera loops
+            target = lambda stop_event: camera_function(stop_event, device=device)
+            if device_state.start_worker(CAMERA_WORKER, target):
+                return jsonify({
+                    "status": "success",
+                    "message": "Camera and model detection started",
+                    "timestamp": datetime.now().isoformat()
+                })
             
-        elif action == 'stop' and camera_active:
-            # Signal the camera function to stop
-            camera_active = False
+        elif action == 'stop' and device_state.is_running(CAMERA_WORKER):
+            # Signal the camera function to stop and give it a moment to release the device
+            stopped = device_state.stop_worker(CAMERA_WORKER, timeout=WORKER_JOIN_TIMEOUT)
             
             return jsonify({
                 "status": "success",
-                "message": "Camera and model detection stopped",
+                "message": "Camera and model detection stopped" if stopped else "Camera stop requested, still shutting down",
                 "timestamp": datetime.now().isoformat()
             })
             
-        else:
-            return jsonify({
-                "status": "error",
-                "message": f"Invalid action '{action}' or camera already in requested state",
-                "camera_active": camera_active,
-                "timestamp": datetime.now().isoformat()
-            }), 400
+        return jsonify({
+            "status": "error",
+            "message": f"Invalid action '{action}' or camera already in requested state",
+            "camera_active": device_state.is_running(CAMERA_WORKER),
+            "timestamp": datetime.now().isoformat()
+        }), 400
             
     except Exception as e:
         return jsonify({
@@ -388,11 +996,14 @@ def start_stop_camera():
         }), 500
 
 @app.route('/change_interval', methods=['PUT'])
-def change_interval():
-    """Endpoint to change the interval time for camera operation"""
-    global interval_time, next_interval_time
-    
+@app.route('/devices/<device_id>/change_interval', methods=['PUT'])
+def change_interval(device_id=DEFAULT_DEVICE_ID):
+    """Endpoint to change the interval time for a device's camera operation"""
     try:
+        device = device_registry.get(device_id)
+        if device is None:
+            return device_not_found_response(device_id)
+        
         data = request.json
         new_interval = data.get('interval')
         
@@ -414,15 +1025,13 @@ def change_interval():
                 "timestamp": datetime.now().isoformat()
             }), 400
             
-        # Update interval time
-        old_interval = interval_time
-        interval_time = new_interval
-        next_interval_time = datetime.now().timestamp() + interval_time
+        # Update interval time and next capture time together
+        old_interval, interval_time, next_interval_time = device.state.set_interval(new_interval)
         
         # Log to Firebase using internal function
         post_program_details_to_firebase(
-            weather_response=weather_data,
-            interval_formula=f"Interval changed manually from {old_interval}s to {interval_time}s",
+            weather_response=state.weather_data,
+            interval_formula=f"Interval for device {device.device_id} changed manually from {old_interval}s to {interval_time}s",
             next_interval_time=next_interval_time
         )
         
@@ -440,64 +1049,48 @@ def change_interval():
             "timestamp": datetime.now().isoformat()
         }), 500
 
-# Add a global variable for test mode
-test_mode_active = False
-test_mode_thread = None
-
 @app.route('/test_model', methods=['POST'])
 def test_model():
     """Endpoint to toggle continuous test mode for the model"""
-    global test_mode_active, test_mode_thread
-    
     try:
         data = request.json
         active = data.get('active', False)
         
         # If requesting to activate test mode
-        if active and not test_mode_active:
+        if active:
             # Check if model is loaded
-            if model is None:
-                return jsonify({
-                    "status": "error",
-                    "message": "Model not loaded",
-                    "timestamp": datetime.now().isoformat()
-                }), 500
+            if not ensure_model_loaded():
+                return model_status_response()
             
             # Start test mode in a separate thread
-            test_mode_active = True
-            test_mode_thread = threading.Thread(target=test_mode_function)
-            test_mode_thread.daemon = True
-            test_mode_thread.start()
-            
-            return jsonify({
-                "status": "success",
-                "message": "Test mode started",
-                "test_mode_active": test_mode_active,
-                "timestamp": datetime.now().isoformat()
-            })
+            if state.start_worker(TEST_MODE_WORKER, test_mode_function):
+                return jsonify({
+                    "status": "success",
+                    "message": "Test mode started",
+                    "test_mode_active": True,
+                    "timestamp": datetime.now().isoformat()
+                })
             
         # If requesting to deactivate test mode
-        elif not active and test_mode_active:
+        elif state.is_running(TEST_MODE_WORKER):
             # Stop test mode
-            test_mode_active = False
-            if test_mode_thread:
-                test_mode_thread.join(timeout=5.0)
+            state.stop_worker(TEST_MODE_WORKER, timeout=WORKER_JOIN_TIMEOUT)
             
             return jsonify({
                 "status": "success",
                 "message": "Test mode stopped",
-                "test_mode_active": test_mode_active,
+                "test_mode_active": state.is_running(TEST_MODE_WORKER),
                 "timestamp": datetime.now().isoformat()
             })
             
         # If already in the requested state
-        else:
-            return jsonify({
-                "status": "info",
-                "message": f"Test mode already {'active' if test_mode_active else 'inactive'}",
-                "test_mode_active": test_mode_active,
-                "timestamp": datetime.now().isoformat()
-            })
+        test_mode_active = state.is_running(TEST_MODE_WORKER)
+        return jsonify({
+            "status": "info",
+            "message": f"Test mode already {'active' if test_mode_active else 'inactive'}",
+            "test_mode_active": test_mode_active,
+            "timestamp": datetime.now().isoformat()
+        })
             
     except Exception as e:
         return jsonify({
@@ -506,33 +1099,41 @@ def test_model():
             "timestamp": datetime.now().isoformat()
         }), 500
 
-def test_mode_function():
-    """Function to run continuous testing of the model"""
-    global test_mode_active
-    
+def test_mode_function(stop_event):
+    """Function to run continuous testing of the model until stop_event is set"""
+    test_cap = None
+    power_manager.set_awake(TEST_MODE_WORKER, True)
     try:
         # Initialize camera
-        test_cap = cv2.VideoCapture(0)
+        test_cap = create_frame_source(FRAME_SOURCE)
         if not test_cap.isOpened():
             print("Error: Could not open camera for test mode")
-            test_mode_active = False
             return
         
         print("Test mode started, beginning continuous testing")
         
         frame_count = 0
         
-        while test_mode_active:
+        while not stop_event.is_set():
             # Capture frame
             ret, frame = test_cap.read()
             if not ret:
                 print("Error: Failed to capture frame in test mode")
-                time.sleep(1)
+                stop_event.wait(1)
                 continue
             
             # Process the frame
-            frame_result, _, output_path = process_image_with_model(frame, return_annotated=True)
+            frame_result, annotated_frame, output_path = process_image_with_model(
+                frame, return_annotated=True, priority=PRIORITY_TEST, source=TEST_MODE_WORKER
+            )
             frame_count += 1
+            preview_for(default_device).publish(annotated_frame if annotated_frame is not None else frame)
+            
+            clip_buffer = clip_buffer_for(TEST_MODE_WORKER)
+            if clip_buffer is not None:
+                clip_buffer.add(annotated_frame if annotated_frame is not None else frame)
+                if "error" not in frame_result:
+                    check_clip_events(TEST_MODE_WORKER, frame_result["detections"], time.time())
             
             # Log to Firebase
             if "error" not in frame_result:
@@ -559,23 +1160,487 @@ def test_mode_function():
                 
                 # Log special test mode message
                 post_program_details_to_firebase(
-                    weather_response=weather_data,
+                    weather_response=state.weather_data,
                     interval_formula=f"Test mode active - frame {frame_count}",
                     next_interval_time=datetime.now().timestamp() + interval
                 )
             
             # Short delay between frames to avoid overwhelming the system
-            time.sleep(0.5)
+            stop_event.wait(runtime_config.current.test_mode_delay)
             
     except Exception as e:
         print(f"Test mode error: {e}")
     finally:
         if test_cap is not None and test_cap.isOpened():
             test_cap.release()
-        test_mode_active = False
+        power_manager.set_awake(TEST_MODE_WORKER, False)
         print("Test mode stopped")
 
 
+def tracking_function(stop_event, rate_hz=TRACKING_RATE_HZ, uncertainty_threshold=TRACKING_UNCERTAINTY_THRESHOLD):
+    """Closed-loop tracking: steer at a fixed rate from the predicted sun position, inferring only when uncertain"""
+    global tracking_estimator, tracking_stats
+    
+    cap = None
+    estimator = TrackingEstimator(LAT, LON)
+    stats = TrackingStats()
+    tracking_estimator, tracking_stats = estimator, stats
+    
+    # Commands every tick, so rate limiting is left to the loop period
+    period = 1.0 / rate_hz
+    controller = None
+    if actuator_output is not None:
+        controller = PanTiltController(
+            actuator_output, steps_per_degree=ACTUATOR_STEPS_PER_DEGREE, deadband=0.05, min_interval=0
+        )
+    
+    pending = None  # (future, capture_time, frame)
+    power_manager.set_awake(TRACKING_WORKER, True)
+    try:
+        cap = create_frame_source(FRAME_SOURCE)
+        if not cap.isOpened():
+            print("Error: Could not open camera for tracking mode")
+            return
+        
+        print(f"Tracking mode started at {rate_hz:.0f} Hz, uncertainty threshold {uncertainty_threshold} deg")
+        next_tick = time.time()
+        
+        while not stop_event.is_set():
+            now = time.time()
+            estimator.predict(now)
+            stats.record_tick()
+            
+            # Collect a finished detection and fuse it into the estimate
+            if pending is not None and pending[0].done():
+                future, capture_time, frame = pending
+                height, width = frame.shape[:2]
+                pending = None
+                pointing_error = None
+                tracker_error = None
+                try:
+                    detections = extract_sun_detections(future.result(), width // 2, height // 2)
+                except Exception as e:
+                    print(f"Tracking inference error: {e}")
+                    detections = []
+                
+                if detections and calibration is not None:
+                    best = max(detections, key=lambda detection: detection["confidence"])
+                    azimuth_error, elevation_error = calibration.detection_angles(best, width, height)
+                    best["azimuth_error"], best["elevation_error"] = azimuth_error, elevation_error
+                    # How far the detection lands from where the tracker expected the sun, once it had a settled estimate
+                    prior = estimator.snapshot()
+                    if prior["uncertainty"] < ACTIVE_LEARNING_MAX_UNCERTAINTY:
+                        tracker_error = math.hypot(azimuth_error - prior["azimuth_error"],
+                                                   elevation_error - prior["elevation_error"])
+                    estimator.update(azimuth_error, elevation_error)
+                    pointing_error = math.hypot(azimuth_error, elevation_error)
+                else:
+                    estimator.cancel_measurement()
+                stats.record_inference(time.time() - capture_time, pointing_error)
+                check_clip_events(TRACKING_WORKER, detections, time.time())
+                if active_learning is not None:
+                    active_learning.observe(frame, detections, tracker_error=tracker_error)
+            
+            # Only spend inference when the prediction can no longer be trusted
+            if pending is None and estimator.uncertainty > uncertainty_threshold:
+                ret, frame = cap.read()
+                if ret:
+                    clip_buffer = clip_buffer_for(TRACKING_WORKER)
+                    if clip_buffer is not None:
+                        clip_buffer.add(frame)
+                    estimator.begin_measurement()
+                    future = inference_worker.submit(frame, priority=PRIORITY_LIVE, source=TRACKING_WORKER,
+                                                     conf=runtime_config.current.confidence_threshold)
+                    pending = (future, time.time(), frame)
+            
+            # Steer towards the current estimate and feed the move back into it
+            if controller is not None:
+                estimate = estimator.snapshot()
+                command = controller.update(estimate["azimuth_error"], estimate["elevation_error"], now=now)
+                if command is not None:
+                    estimator.apply_command(
+                        command["pan_steps"] / ACTUATOR_STEPS_PER_DEGREE,
+                        command["tilt_steps"] / ACTUATOR_STEPS_PER_DEGREE
+                    )
+            
+            # Fixed-rate schedule; if a tick overran, skip ahead rather than bursting
+            next_tick += period
+            delay = next_tick - time.time()
+            if delay < 0:
+                next_tick = time.time()
+                delay = 0
+            stop_event.wait(delay)
+        
+    except Exception as e:
+        print(f"Tracking mode error: {e}")
+    finally:
+        if pending is not None:
+            pending[0].cancel()
+        if cap is not None and cap.isOpened():
+            cap.release()
+        power_manager.set_awake(TRACKING_WORKER, False)
+        print(f"Tracking mode stopped: {stats.report()}")
+
+@app.route('/tracking', methods=['PUT'])
+def tracking_mode():
+    """Endpoint to start or stop closed-loop tracking mode"""
+    try:
+        data = request.json
+        action = data.get('action', '').lower()
+        
+        if action == 'start':
+            if not ensure_model_loaded():
+                return model_status_response()
+            if state.is_running(CAMERA_WORKER):
+                return jsonify({
+                    "status": "error",
+                    "message": "Camera loop is active, stop it before starting tracking mode",
+                    "timestamp": datetime.now().isoformat()
+                }), 409
+            
+            try:
+                rate_hz = float(data.get('rate_hz', TRACKING_RATE_HZ))
+                uncertainty_threshold = float(data.get('uncertainty_threshold', TRACKING_UNCERTAINTY_THRESHOLD))
+                if rate_hz <= 0 or uncertainty_threshold <= 0:
+                    raise ValueError("Values must be positive")
+            except (ValueError, TypeError):
+                return jsonify({
+                    "status": "error",
+                    "message": "Invalid 'rate_hz' or 'uncertainty_threshold'. Must be positive numbers.",
+                    "timestamp": datetime.now().isoformat()
+                }), 400
+            
+            target = lambda stop_event: tracking_function(stop_event, rate_hz, uncertainty_threshold)
+            if state.start_worker(TRACKING_WORKER, target):
+                return jsonify({
+                    "status": "success",
+                    "message": f"Tracking mode started at {rate_hz} Hz",
+                    "timestamp": datetime.now().isoformat()
+                })
+        
+        elif action == 'stop' and state.is_running(TRACKING_WORKER):
+            state.stop_worker(TRACKING_WORKER, timeout=WORKER_JOIN_TIMEOUT)
+            return jsonify({
+                "status": "success",
+                "message": "Tracking mode stopped",
+                "tracking": tracking_stats.report() if tracking_stats is not None else None,
+                "timestamp": datetime.now().isoformat()
+            })
+        
+        return jsonify({
+            "status": "error",
+            "message": f"Invalid action '{action}' or tracking already in requested state",
+            "tracking_active": state.is_running(TRACKING_WORKER),
+            "timestamp": datetime.now().isoformat()
+        }), 400
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "timestamp": datetime.now().isoformat()
+        }), 500
+
+def device_status(device):
+    """Status of one device's schedule and camera loop"""
+    snapshot = device.state.snapshot()
+    return {
+        "device_id": device.device_id,
+        "source": device.source_spec,
+        "camera_active": device.state.is_running(CAMERA_WORKER),
+        "interval_time": snapshot["interval_time"],
+        "next_interval_time": snapshot["next_interval_time"],
+        "last_detection_time": snapshot["last_detection_time"],
+        "actuator": device.controller.stats() if device.controller is not None else None,
+    }
+
+def add_device(device_id, source_spec, actuator_spec="none"):
+    """Register a new camera/panel that shares the inference worker and model"""
+    controller = None
+    output = create_actuator(actuator_spec)
+    if output is not None:
+        controller = PanTiltController(output, steps_per_degree=ACTUATOR_STEPS_PER_DEGREE)
+    device = device_registry.add(Device(device_id, source_spec, controller=controller))
+    frame_gates[device.source_key] = FrameChangeGate(threshold=FRAME_GATE_THRESHOLD, max_age=FRAME_GATE_FIXED_MAX_AGE)
+    return device
+
+@app.route('/devices', methods=['GET', 'POST'])
+def devices():
+    """Endpoint to list devices, or add one with {"device_id", "source", "actuator"}"""
+    try:
+        if request.method == 'GET':
+            return jsonify({
+                "devices": [device_status(device) for device in device_registry.all()],
+                "timestamp": datetime.now().isoformat()
+            })
+        
+        data = request.json
+        device_id = str(data.get('device_id', '')).strip()
+        source_spec = data.get('source')
+        if not device_id or not source_spec:
+            return jsonify({
+                "status": "error",
+                "message": "Missing 'device_id' or 'source' parameter",
+                "timestamp": datetime.now().isoformat()
+            }), 400
+        
+        try:
+            device = add_device(device_id, source_spec, data.get('actuator', 'none'))
+        except ValueError as e:
+            return jsonify({
+                "status": "error",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat()
+            }), 400
+        
+        return jsonify({
+            "status": "success",
+            "device": device_status(device),
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "timestamp": datetime.now().isoformat()
+        }), 500
+
+@app.route('/devices/<device_id>/status', methods=['GET'])
+def single_device_status(device_id):
+    """Endpoint to report the status of one device"""
+    device = device_registry.get(device_id)
+    if device is None:
+        return device_not_found_response(device_id)
+    return jsonify(dict(device_status(device), timestamp=datetime.now().isoformat()))
+
+@app.route('/status', methods=['GET'])
+def status():
+    """Endpoint to report camera, interval, weather and startup readiness"""
+    snapshot = state.snapshot()
+    return jsonify({
+        "camera_active": state.is_running(CAMERA_WORKER),
+        "test_mode_active": state.is_running(TEST_MODE_WORKER),
+        "tracking_active": state.is_running(TRACKING_WORKER),
+        "interval_time": snapshot["interval_time"],
+        "next_interval_time": snapshot["next_interval_time"],
+        "last_detection_time": snapshot["last_detection_time"],
+        "model_loaded": snapshot["model_loaded"],
+        "firebase_enabled": firebase_enabled,
+        "weather_data": snapshot["weather_data"],
+        "devices": [device.device_id for device in device_registry.all()],
+        "startup": startup_timer.report(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Endpoint to report runtime metrics such as inference queue depth and wait time"""
+    return jsonify({
+        "inference": inference_worker.metrics(),
+        "frame_gate": {source: gate.stats() for source, gate in frame_gates.items()},
+        "actuator": pan_tilt_controller.stats() if pan_tilt_controller is not None else None,
+        "clip_buffer": {source: buffer.stats() for source, buffer in list(clip_buffers.items())},
+        "fleet": fleet_reporter.stats() if fleet_reporter is not None else None,
+        "power": power_manager.stats(),
+        "governor": governor.stats(),
+        "frame_pool": frame_pool.stats(),
+        "active_learning": active_learning.stats() if active_learning is not None else None,
+        "rollups": rollups.stats(),
+        "config": dict(runtime_config.stats(), model_path=loaded_model["path"], model_reload=loaded_model["reload"]),
+        "preview": {
+            device.device_id: device.preview.stats() for device in device_registry.all() if device.preview is not None
+        },
+        "exposure": {
+            device.device_id: device.exposure.stats() for device in device_registry.all() if device.exposure is not None
+        },
+        "tracking": dict(
+            tracking_stats.report(), estimate=tracking_estimator.snapshot()
+        ) if tracking_stats is not None else None,
+        "timestamp": datetime.now().isoformat()
+    })
+
+
+@app.route('/forecast', methods=['GET'])
+def forecast():
+    """Endpoint to report the cloud/irradiance forecast and planned captures for the next hour"""
+    now = clock.time()
+    config = runtime_config.current
+    horizon = request.args.get('horizon', default=3600.0, type=float)
+    return jsonify({
+        "enabled": FORECAST_SCHEDULING,
+        "observations": cloud_forecaster.stats(),
+        "schedule": cloud_forecaster.plan(
+            now=now, horizon=min(horizon, 86400.0),
+            min_interval=config.forecast_min_interval, max_interval=config.forecast_max_interval
+        ),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/history', methods=['GET'])
+@app.route('/devices/<device_id>/history', methods=['GET'])
+def history(device_id=DEFAULT_DEVICE_ID):
+    """Endpoint to serve a device's ?resolution=minute|hour|day rollups since ?since=<unix time>, with ETag revalidation"""
+    if device_registry.get(device_id) is None:
+        return device_not_found_response(device_id)
+    resolution = request.args.get('resolution', default='hour')
+    since = request.args.get('since', type=float)
+    try:
+        etag, body = rollups.history(device_id, resolution, since)
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "timestamp": datetime.now().isoformat()
+        }), 400
+
+    # Unchanged since the client's copy: answer 304 without serialising anything
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = jsonify(body)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route('/preview.jpg', methods=['GET'])
+@app.route('/devices/<device_id>/preview.jpg', methods=['GET'])
+def preview_image(device_id=DEFAULT_DEVICE_ID):
+    """Endpoint to serve a small JPEG of the device's latest annotated frame, with ETag revalidation"""
+    device = device_registry.get(device_id)
+    if device is None:
+        return device_not_found_response(device_id)
+    preview = preview_for(device)
+    sequence, jpeg = preview.latest()
+    if jpeg is None:
+        return jsonify({
+            "status": "error",
+            "message": "No frame captured yet",
+            "timestamp": datetime.now().isoformat()
+        }), 404
+    
+    etag = f"{preview.generation}-{sequence}"
+    response = Response(status=304) if etag in request.if_none_match else Response(jpeg, mimetype="image/jpeg")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.route('/preview/stream', methods=['GET'])
+@app.route('/devices/<device_id>/preview/stream', methods=['GET'])
+def preview_stream(device_id=DEFAULT_DEVICE_ID):
+    """Endpoint to stream the device's preview as MJPEG, rate-limited to PREVIEW_MAX_FPS"""
+    device = device_registry.get(device_id)
+    if device is None:
+        return device_not_found_response(device_id)
+    preview = preview_for(device)
+    if not preview.open_stream():
+        return jsonify({
+            "status": "error",
+            "message": f"Too many preview viewers (max {preview.max_viewers})",
+            "timestamp": datetime.now().isoformat()
+        }), 503
+    response = Response(
+        preview.stream(), mimetype=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-cache"}
+    )
+    # The server closes every response, including HEAD and early disconnects where the stream never starts
+    response.call_on_close(preview.close_stream)
+    return response
+
+
+def admin_token_error():
+    """The 403 response for admin endpoints when ADMIN_TOKEN is set and not given, else None"""
+    if ADMIN_TOKEN and request.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        return jsonify({
+            "status": "error",
+            "message": "Missing or invalid admin token",
+            "timestamp": datetime.now().isoformat()
+        }), 403
+    return None
+
+@app.route('/config', methods=['GET'])
+def get_config():
+    """Endpoint to report the runtime configuration, the overrides behind it and its schema"""
+    return jsonify(dict(
+        runtime_config.describe(),
+        inactive=inactive_settings(),
+        model_path=loaded_model["path"],
+        model_reload=loaded_model["reload"],
+        timestamp=datetime.now().isoformat()
+    ))
+
+@app.route('/config', methods=['PUT'])
+def update_config():
+    """Endpoint to change settings without a restart; the whole update is applied or none of it"""
+    error = admin_token_error()
+    if error is not None:
+        return error
+    
+    changes = request.get_json(silent=True)
+    try:
+        changed = runtime_config.update(changes)
+    except ConfigError as e:
+        return jsonify({
+            "status": "error",
+            "message": "Invalid configuration",
+            "errors": e.errors,
+            "timestamp": datetime.now().isoformat()
+        }), 400
+    except OSError as e:
+        # Applied in memory, but it will not survive a restart
+        return jsonify({
+            "status": "error",
+            "message": f"Configuration applied but not saved: {e}",
+            "config": runtime_config.current.to_dict(),
+            "timestamp": datetime.now().isoformat()
+        }), 500
+    
+    current = runtime_config.current
+    return jsonify({
+        "status": "success",
+        "changed": changed,
+        "config": current.to_dict(),
+        "version": current.version,
+        # Accepted and saved, but not steering anything until the scheduling mode changes
+        "inactive": [name for name in changed if name in inactive_settings()],
+        # Model changes load in the background; /config reports when the new model is serving
+        "model_reload_pending": current_model_path() != loaded_model["path"] and state.model is not None,
+        "timestamp": datetime.now().isoformat()
+    })
+
+
+@app.route('/debug/profile', methods=['POST'])
+def debug_profile():
+    """Endpoint to sample every server thread for ?seconds=N, returning collapsed stacks or ?format=json summary"""
+    error = admin_token_error()
+    if error is not None:
+        return error
+    
+    seconds = request.args.get('seconds', default=10.0, type=float)
+    output_format = request.args.get('format', default='collapsed')
+    
+    # Blocks this request thread for the duration; every other thread keeps running and is sampled
+    result = profiler.run(seconds)
+    if result is None:
+        return jsonify({
+            "status": "error",
+            "message": "A profile is already running",
+            "timestamp": datetime.now().isoformat()
+        }), 409
+    
+    summary = result.summary()
+    if output_format == 'json':
+        return jsonify(dict(summary, timestamp=datetime.now().isoformat()))
+    
+    filename = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"
+    return Response(result.collapsed(), mimetype='text/plain', headers={
+        "Content-Disposition": f"attachment; filename={filename}",
+        "X-Profile-Samples": str(summary["samples"]),
+        "X-Profile-Overhead": f"{summary['overhead']:.4f}",
+    })
+
+
 # Remove these API endpoints and convert to internal functions
 def post_current_status_to_firebase(model_details, raspberry_details=None):
     """Internal function to log current model and Raspberry Pi status to Firebase"""
@@ -629,25 +1694,257 @@ def post_program_details_to_firebase(weather_response, interval_formula, next_in
         return False
 
 # Initialize the application
-def initialize():
-    """Initialize the application, load model, etc."""
-    global model
-    
-    # Specify the default model path
-    model_path = os.environ.get("MODEL_PATH", "../models/sun_tracker_v3/sun_tracker_v3_float32.tflite")
-    
-    # Load the YOLO model
+MODEL_WARMUP_SIZE = 640
+
+def warm_model(model_path):
+    """Load the YOLO model and warm it with a blank frame without publishing it; None if it failed to load"""
     model = load_yolo_model(model_path)
     
     if model is None:
         print("Warning: Failed to load the model. Endpoints requiring model will not work.")
+        return None
+    
+    # The first predict pays for graph setup and allocations; do it before serving frames
+    try:
+        warmup_frame = np.zeros((MODEL_WARMUP_SIZE, MODEL_WARMUP_SIZE, 3), dtype=np.uint8)
+        model.predict(source=warmup_frame, conf=runtime_config.current.confidence_threshold, verbose=False)
+    except Exception as e:
+        print(f"Model warmup error: {e}")
+    return model
+
+def load_and_warm_model(model_path):
+    """Load the YOLO model, warm it with a blank frame and only then publish it as ready"""
+    model = warm_model(model_path)
+    if model is None:
+        return
+    state.model = model
+    loaded_model["path"] = model_path
+
+# Serializes idle unloads with on-demand reloads and the swap-in of a reloaded model
+model_lock = threading.Lock()
+# One background reload at a time, so two models are never being loaded side by side
+model_reload_lock = threading.Lock()
+model_unloaded = False
+# Which file the published model came from, and the outcome of the last configuration-driven reload
+loaded_model = {"path": None, "reload": None}
+
+def unload_model(reason):
+    """Drop the model to free RAM while idle; it is reloaded on the next frame or before sunrise"""
+    global model_unloaded
+    with model_lock:
+        if state.model is None:
+            return False
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        state.model = None
+        model_unloaded = True
+        gc.collect()
+        rss_after = process.memory_info().rss
+    power_manager.record_unload(rss_before, rss_after)
+    print(f"Model unloaded ({reason}), RSS {rss_before / 1e6:.0f} MB -> {rss_after / 1e6:.0f} MB")
+    return True
+
+def ensure_model_loaded():
+    """Return True once the model is available, reloading it if it was unloaded while idle"""
+    global model_unloaded
+    if state.model is not None:
+        return True
+    # Still loading at startup, or the load failed: nothing to reload
+    if not model_unloaded:
+        return False
+    with model_lock:
+        if state.model is None:
+            started = time.time()
+            load_and_warm_model(current_model_path())
+            if state.model is None:
+                return False
+            model_unloaded = False
+            power_manager.record_prewarm(time.time() - started)
+            power_manager.exit_idle(clock.time())
+    return True
+
+def current_model_path(config=None):
+    """Model file for the governor's current level"""
+    if config is None:
+        config = runtime_config.current
+    return config.model_path_small if governor.level.small_model and config.model_path_small else config.model_path
+
+def load_model_at_startup():
+    """Initial load, under model_lock so a configuration change made meanwhile reloads after it"""
+    with model_lock:
+        load_and_warm_model(current_model_path())
+
+def reload_model_in_background(reason):
+    """Load the configured model on its own thread; the old model keeps serving until the new one is warm"""
+    def reload():
+        with model_reload_lock:
+            path = current_model_path()
+            # Unloaded models pick up the new path when next loaded; a queued reload may already be done
+            if state.model is None or loaded_model["path"] == path:
+                return
+            # Loading and warming take seconds; model_lock is only held for the swap, so idle
+            # unloads and wakeups are not held up meanwhile
+            started = time.time()
+            model = warm_model(path)
+            with model_lock:
+                # Unloaded meanwhile, reloaded on wakeup already, or another change wants a different model
+                if state.model is None or loaded_model["path"] == path or current_model_path() != path:
+                    return
+                if model is not None:
+                    state.model = model
+                    loaded_model["path"] = path
+                loaded_model["reload"] = {
+                    "path": path,
+                    "reason": reason,
+                    "ok": model is not None,
+                    "seconds": time.time() - started,
+                    "finished_at": clock.time(),
+                }
+        print(f"Model reload ({reason}) {'done' if model is not None else 'failed, kept the old model'}: {path}")
+    threading.Thread(target=reload, name="model-reload", daemon=True).start()
+
+def apply_config_change(old, new, changed):
+    """Config listener; frame and interval settings are read per use, so only caches and the model need work"""
+    print(f"Configuration v{new.version}: {', '.join(changed)} changed")
+    if "confidence_threshold" in changed:
+        # Cached results were filtered with the old threshold
+        for gate in frame_gates.values():
+            gate.reset()
+    old_model_path = current_model_path(old)
+    if bool(new.model_path_small) != bool(old.model_path_small):
+        # The small-model step only exists while a small model is configured
+        _, level = governor.set_levels(build_governor_levels(new.model_path_small))
+        if frame_preprocessor is not None:
+            frame_preprocessor.imgsz = level.input_size or MODEL_INPUT_SIZE
+    if current_model_path(new) != old_model_path:
+        reload_model_in_background(f"configuration v{new.version}")
+
+def log_config_change(old, new, changed):
+    """Config listener run outside the config lock, so PUT /config does not wait on Firebase"""
+    post_program_details_to_firebase(
+        weather_response=state.weather_data,
+        interval_formula=f"Configuration v{new.version}: {', '.join(changed)} changed",
+        next_interval_time=state.next_interval_time
+    )
+
+def config_watch_function(stop_event):
+    """Apply edits to CONFIG_FILE without a restart; an invalid file is reported and ignored"""
+    while not stop_event.wait(CONFIG_POLL_INTERVAL):
+        runtime_config.reload_file()
+
+def apply_degradation_level(old, new, reason):
+    """Governor callback; interval and annotation settings are read per frame, model and input size are swapped here"""
+    if frame_preprocessor is not None:
+        frame_preprocessor.imgsz = new.input_size or MODEL_INPUT_SIZE
+    if old.small_model != new.small_model:
+        # In the background, so the governor keeps sampling and the old model serves until the new one is warm
+        reload_model_in_background(f"governor level {new.name}")
+    post_program_details_to_firebase(
+        weather_response=state.weather_data,
+        interval_formula=f"Governor level {old.name} -> {new.name}: {reason}",
+        next_interval_time=state.next_interval_time
+    )
+
+def governor_function(stop_event):
+    """Sample SoC temperature and throttle flags and let the governor adjust the degradation level"""
+    while True:
+        governor.update(temperature=read_cpu_temperature(), throttle_flags=read_throttle_flags())
+        if stop_event.wait(GOVERNOR_INTERVAL):
+            return
+
+def rollups_save_function(stop_event):
+    """Periodically write the rollups to ROLLUPS_FILE so history survives restarts"""
+    while True:
+        stopped = stop_event.wait(ROLLUPS_SAVE_INTERVAL)
+        try:
+            rollups.save(ROLLUPS_FILE)
+        except OSError as e:
+            print(f"Rollups save error: {e}")
+        if stopped:
+            return
+
+def idle_monitor_function(stop_event):
+    """Unload the model after IDLE_AFTER seconds with no requests and no running loops"""
+    while True:
+        now = clock.time()
+        if power_manager.is_inactive(now) and state.model is not None:
+            power_manager.enter_idle("inactive", now)
+            unload_model("inactive")
+        # Sleep until the inactivity deadline could next be reached rather than polling
+        wait = power_manager.seconds_until_inactive(now) or IDLE_AFTER
+        if stop_event.wait(wait):
+            return
+
+@app.before_request
+def record_activity():
+    # Dashboard polling is not activity; anything that changes state is
+    if request.method != 'GET':
+        power_manager.touch(clock.time())
+
+def model_status_response():
+    """Return the error response for model-dependent endpoints, distinguishing loading from failed"""
+    if not startup_timer.is_done("model"):
+        return jsonify({
+            "status": "error",
+            "message": "Model is still loading",
+            "timestamp": datetime.now().isoformat()
+        }), 503
+    return jsonify({
+        "status": "error",
+        "message": "Model not loaded",
+        "timestamp": datetime.now().isoformat()
+    }), 500
+
+def initialize():
+    """Initialize the application without blocking; model, Firebase and weather load in the background"""
+    global calibration, actuator_output, pan_tilt_controller
+    
+    # Start the shared inference worker; it reports "Model not loaded" until the model is ready
+    with startup_timer.phase("inference_worker"):
+        inference_worker.start()
+    
+    # Calibration is a small JSON file; the lookup maps are built on the first frame
+    with startup_timer.phase("calibration"):
+        calibration = load_calibration(CALIBRATION_FILE, horizontal_fov=CAMERA_HFOV)
+    
+    with startup_timer.phase("actuator"):
+        try:
+            actuator_output = create_actuator(ACTUATOR_OUTPUT)
+            if actuator_output is not None:
+                pan_tilt_controller = PanTiltController(actuator_output, steps_per_degree=ACTUATOR_STEPS_PER_DEGREE)
+        except Exception as e:
+            print(f"Actuator initialization error: {e}")
+    default_device.controller = pan_tilt_controller
+    
+    if fleet_reporter is not None:
+        fleet_reporter.start()
+    if POWER_SAVE:
+        state.start_worker(IDLE_WORKER, idle_monitor_function)
+    if GOVERNOR_ENABLED:
+        state.start_worker(GOVERNOR_WORKER, governor_function)
+    if runtime_config.path:
+        state.start_worker(CONFIG_WORKER, config_watch_function)
+    if ROLLUPS_FILE:
+        with startup_timer.phase("rollups"):
+            rollups.load(ROLLUPS_FILE)
+        state.start_worker(ROLLUPS_WORKER, rollups_save_function)
+    
+    with startup_timer.phase("devices"):
+        for device_id, source_spec, actuator_spec in parse_devices_spec(DEVICES):
+            try:
+                add_device(device_id, source_spec, actuator_spec)
+            except Exception as e:
+                print(f"Device '{device_id}' initialization error: {e}")
     
-    # Get initial weather data
-    get_weather_data()
+    # Slow initialization runs in parallel in the background
+    startup_timer.run_in_background("model", load_model_at_startup)
+    startup_timer.run_in_background("firebase", initialize_firebase)
+    startup_timer.run_in_background("weather", get_weather_data)
     
-    print("Initialization complete")
+    print("Initialization started, serving requests while loading")
 
 # Run the application
 if __name__ == '__main__':
     initialize()
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # The reloader would import and initialize everything twice, doubling the cold start
+    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import deque
+
+from solar import is_sun_up, next_sunrise
+
+# Sun at the horizon, allowing for refraction and the solar disc
+SUNRISE_ELEVATION = -0.833
+
+
+class PowerManager:
+    """Decides when the tracker idles (night or no activity) and when to pre-warm before sunrise.
+
+    Holders (camera loops, test mode, tracking) mark themselves awake while they need the camera
+    and model; once none are awake the model can be unloaded.
+    """
+
+    def __init__(self, lat, lon, idle_after=1800.0, prewarm_lead=600.0, min_elevation=SUNRISE_ELEVATION):
+        self.lat = lat
+        self.lon = lon
+        self.idle_after = idle_after
+        self.prewarm_lead = prewarm_lead
+        self.min_elevation = min_elevation
+        self._lock = threading.Lock()
+        self._awake = set()
+        self._last_activity = time.time()
+        self._wakeups = deque()  # Timestamps of loop wakeups over the last hour
+
+        # Stats
+        self.idle_since = None
+        self.idle_reason = None
+        self.idle_seconds = 0.0
+        self.idle_rss = None
+        self.active_rss = None
+        self.model_unloads = 0
+        self.prewarms = 0
+        self.last_prewarm_seconds = None
+
+    def touch(self, now=None):
+        """Record outside activity, such as an API request"""
+        with self._lock:
+            self._last_activity = now if now is not None else time.time()
+
+    def is_night(self, now):
+        return not is_sun_up(now, self.lat, self.lon, self.min_elevation)
+
+    def wake_time(self, now):
+        """When to start pre-warming for the next sunrise; None if the sun does not rise within two days"""
+        sunrise = next_sunrise(now, self.lat, self.lon, self.min_elevation)
+        return sunrise - self.prewarm_lead if sunrise is not None else None
+
+    def is_inactive(self, now):
+        with self._lock:
+            return not self._awake and now - self._last_activity >= self.idle_after
+
+    def seconds_until_inactive(self, now):
+        with self._lock:
+            return max(0.0, self._last_activity + self.idle_after - now)
+
+    def set_awake(self, holder, awake, now=None):
+        """Mark a holder as needing (or no longer needing) the camera and model"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            if awake:
+                self._awake.add(holder)
+                self._last_activity = now
+            else:
+                self._awake.discard(holder)
+
+    def any_awake(self):
+        with self._lock:
+            return bool(self._awake)
+
+    def record_wakeup(self, now):
+        with self._lock:
+            self._wakeups.append(now)
+            while self._wakeups and now - self._wakeups[0] > 3600:
+                self._wakeups.popleft()
+
+    def enter_idle(self, reason, now, rss=None):
+        with self._lock:
+            if self.idle_since is None:
+                self.idle_since = now
+            self.idle_reason = reason
+            if rss is not None:
+                self.idle_rss = rss
+
+    def exit_idle(self, now):
+        with self._lock:
+            if self.idle_since is not None:
+                self.idle_seconds += now - self.idle_since
+            self.idle_since = None
+            self.idle_reason = None
+
+    def record_unload(self, rss_before, rss_after):
+        with self._lock:
+            self.model_unloads += 1
+            self.active_rss = rss_before
+            self.idle_rss = rss_after
+
+    def record_prewarm(self, seconds):
+        with self._lock:
+            self.prewarms += 1
+            self.last_prewarm_seconds = seconds
+
+    def stats(self, now=None):
+        if now is None:
+            now = time.time()
+        with self._lock:
+            wakeups = sum(1 for t in self._wakeups if now - t <= 3600)
+            return {
+                "idle": self.idle_since is not None,
+                "idle_reason": self.idle_reason,
+                "idle_since": self.idle_since,
+                "idle_seconds_total": self.idle_seconds + (now - self.idle_since if self.idle_since else 0.0),
+                "awake": sorted(self._awake),
+                "wakeups_last_hour": wakeups,
+                "active_rss_mb": self.active_rss / 1e6 if self.active_rss else None,
+                "idle_rss_mb": self.idle_rss / 1e6 if self.idle_rss else None,
+                "model_unloads": self.model_unloads,
+                "prewarms": self.prewarms,
+                "last_prewarm_seconds": self.last_prewarm_seconds,
+            }
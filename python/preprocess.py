@@ -0,0 +1,83 @@
+from startup import LazyModule
+
+cv2 = LazyModule("cv2")
+np = LazyModule("numpy")
+
+LETTERBOX_PAD_VALUE = 114  # Same grey padding Ultralytics uses
+
+
+class Letterbox:
+    """Geometry of a letterboxed frame, used to map boxes back to frame pixels"""
+
+    def __init__(self, frame_shape, scale, pad_x, pad_y):
+        self.frame_shape = frame_shape
+        self.scale = scale
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+
+    def to_frame(self, xyxy):
+        """Map an (N, 4) array of model-input boxes back onto the original frame, in place.
+
+        Pass a copy of tensors Ultralytics returns: they are inference tensors, which torch does
+        not allow to be modified outside inference mode.
+        """
+        height, width = self.frame_shape[:2]
+        xyxy[:, [0, 2]] -= self.pad_x
+        xyxy[:, [1, 3]] -= self.pad_y
+        xyxy /= self.scale
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height)
+        return xyxy
+
+
+class FramePreprocessor:
+    """Turns a BGR frame into the model's NCHW float input in a few OpenCV passes over preallocated buffers.
+
+    The frame is resized straight into the padded canvas, its channels are copied into RGB
+    planes (the BGR->RGB swap folded into the copy), and the planes are converted to float and
+    scaled to 0-1 straight into the input tensor in one step. The buffers are reused between
+    calls, so one preprocessor must only be used from one thread (the inference worker).
+    """
+
+    def __init__(self, imgsz=640):
+        # May be changed between calls (e.g. by the thermal governor); buffers follow on the next call
+        self.imgsz = imgsz
+        # Allocated on first use so creating a preprocessor does not import numpy
+        self._canvas = None
+        self._planes = None
+        self._tensor = None
+        self._geometry = None
+
+    def __call__(self, frame):
+        """Return (tensor, letterbox); the tensor is overwritten by the next call"""
+        imgsz = self.imgsz
+        height, width = frame.shape[:2]
+        scale = min(imgsz / height, imgsz / width)
+        new_width, new_height = round(width * scale), round(height * scale)
+        pad_x, pad_y = (imgsz - new_width) // 2, (imgsz - new_height) // 2
+
+        if self._canvas is None or self._canvas.shape[0] != imgsz:
+            self._canvas = np.empty((imgsz, imgsz, 3), dtype=np.uint8)
+            self._planes = np.empty((3, imgsz, imgsz), dtype=np.uint8)
+            self._tensor = np.empty((1, 3, imgsz, imgsz), dtype=np.float32)
+            self._geometry = None
+
+        geometry = (new_width, new_height, pad_x, pad_y)
+        if geometry != self._geometry:
+            # Only the border needs repainting when the frame size changes
+            self._canvas.fill(LETTERBOX_PAD_VALUE)
+            self._geometry = geometry
+
+        region = self._canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width]
+        if (new_width, new_height) == (width, height):
+            region[...] = frame
+        else:
+            cv2.resize(frame, (new_width, new_height), dst=region, interpolation=cv2.INTER_LINEAR)
+
+        # Split into the preallocated planes in reverse order, so blue lands in plane 2 and red in plane 0
+        cv2.split(self._canvas, [self._planes[2], self._planes[1], self._planes[0]])
+        # The planes and the tensor are contiguous, so one call converts all three as a (3 * imgsz, imgsz) image
+        cv2.multiply(self._planes.reshape(3 * imgsz, imgsz), 1.0 / 255.0,
+                     dst=self._tensor.reshape(3 * imgsz, imgsz), dtype=cv2.CV_32F)
+
+        return self._tensor, Letterbox(frame.shape, scale, pad_x, pad_y)
@@ -0,0 +1,119 @@
+import threading
+import time
+import uuid
+
+from startup import LazyModule
+
+cv2 = LazyModule("cv2")
+
+MJPEG_BOUNDARY = "frame"
+
+
+class PreviewPublisher:
+    """Latest frame of a device as a small JPEG, encoded once and shared by every thumbnail request and stream.
+
+    publish() only keeps a downscaled copy (the caller's buffers are reused by the next cycle);
+    the JPEG is encoded on the first request after a new frame, so nothing is encoded while
+    nobody is watching.
+    """
+
+    def __init__(self, max_width=320, quality=60, max_fps=2.0, keepalive=10.0, max_viewers=4):
+        self.max_width = max_width
+        self.quality = quality
+        self.max_fps = max_fps
+        # Streams resend the last frame this often, so dead clients are noticed between slow captures
+        self.keepalive = keepalive
+        self.max_viewers = max_viewers
+        self._condition = threading.Condition()
+        # Sequence numbers restart with the process, so ETags carry a per-process generation
+        self.generation = uuid.uuid4().hex[:8]
+        self._thumbnail = None
+        self._sequence = 0
+        self._published_at = None
+        self._jpeg = None
+        self._jpeg_sequence = None
+        self._viewers = 0
+
+        # Stats
+        self.published = 0
+        self.encoded = 0
+        self.served = 0
+
+    def publish(self, frame, now=None):
+        """Offer a new frame; the thumbnail is taken right away, encoding waits for a viewer"""
+        height, width = frame.shape[:2]
+        if width > self.max_width:
+            size = (self.max_width, max(1, round(height * self.max_width / width)))
+            thumbnail = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        else:
+            thumbnail = frame.copy()
+        with self._condition:
+            self._thumbnail = thumbnail
+            self._sequence += 1
+            self._published_at = now if now is not None else time.time()
+            self.published += 1
+            self._condition.notify_all()
+
+    def latest(self):
+        """(sequence, JPEG bytes) of the newest frame, or (0, None) before the first one"""
+        with self._condition:
+            if self._thumbnail is None:
+                return 0, None
+            if self._jpeg_sequence != self._sequence:
+                ok, encoded = cv2.imencode(".jpg", self._thumbnail, [
+                    cv2.IMWRITE_JPEG_QUALITY, self.quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1
+                ])
+                if not ok:
+                    return 0, None
+                self._jpeg = encoded.tobytes()
+                self._jpeg_sequence = self._sequence
+                self.encoded += 1
+            self.served += 1
+            return self._sequence, self._jpeg
+
+    def open_stream(self):
+        """Reserve a viewer slot; returns False when max_viewers streams are already open.
+
+        Every successful call must be paired with close_stream(), whether or not stream() ever runs
+        (HEAD requests and clients that leave before the first chunk never start the generator).
+        """
+        with self._condition:
+            if self._viewers >= self.max_viewers:
+                return False
+            self._viewers += 1
+            return True
+
+    def close_stream(self):
+        """Release a slot taken by open_stream()"""
+        with self._condition:
+            self._viewers = max(0, self._viewers - 1)
+
+    def stream(self):
+        """MJPEG multipart chunks of new frames, at most max_fps; the slot is released by close_stream()"""
+        last_sequence = 0
+        last_sent = 0.0
+        while True:
+            # Frame-rate limit per viewer; frames published in between are skipped, not queued
+            delay = last_sent + 1.0 / self.max_fps - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with self._condition:
+                self._condition.wait_for(lambda: self._sequence != last_sequence, timeout=self.keepalive)
+            sequence, jpeg = self.latest()
+            if jpeg is None:
+                continue
+            last_sequence, last_sent = sequence, time.monotonic()
+            yield (f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                   f"Content-Length: {len(jpeg)}\r\n\r\n").encode() + jpeg + b"\r\n"
+
+    def stats(self):
+        with self._condition:
+            return {
+                "sequence": self._sequence,
+                "published_at": self._published_at,
+                "viewers": self._viewers,
+                "bytes": len(self._jpeg) if self._jpeg is not None else None,
+                "published": self.published,
+                "encoded": self.encoded,
+                "served": self.served,
+            }
@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_PROFILE_SECONDS = 120.0
+
+
+class SamplingProfiler:
+    """Statistical profiler that periodically samples the stacks of every thread from a background thread.
+
+    Sampling only reads sys._current_frames(), so the profiled threads are never instrumented.
+    The sampler measures its own cost and backs off so it stays under max_overhead of one core.
+    Only one profile runs at a time.
+    """
+
+    def __init__(self, interval=0.01, max_overhead=0.02, max_depth=64):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_depth = max_depth
+        self._busy = threading.Lock()
+
+    def is_running(self):
+        return self._busy.locked()
+
+    def run(self, seconds):
+        """Profile for seconds and return the result, or None if another profile is already running"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            return self._sample(min(max(seconds, 0.1), MAX_PROFILE_SECONDS))
+        finally:
+            self._busy.release()
+
+    def _sample(self, seconds):
+        stacks = Counter()
+        own_ident = threading.get_ident()
+        interval = self.interval
+        samples = 0
+        sampling_time = 0.0
+        started = time.perf_counter()
+        deadline = started + seconds
+
+        while True:
+            tick = time.perf_counter()
+            if tick >= deadline:
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stacks[self._collapse(names.get(ident, f"thread-{ident}"), frame)] += 1
+            samples += 1
+            cost = time.perf_counter() - tick
+            sampling_time += cost
+
+            # Keep cost / (interval) under the overhead budget by sampling less often when stacks are deep
+            interval = max(self.interval, cost / self.max_overhead)
+            time.sleep(max(0.0, min(interval - cost, deadline - time.perf_counter())))
+
+        elapsed = time.perf_counter() - started
+        return ProfileResult(stacks, samples, elapsed, sampling_time, interval)
+
+    def _collapse(self, thread_name, frame):
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        frames.append(thread_name)
+        return ";".join(reversed(frames))
+
+
+class ProfileResult:
+    """Sampled stacks in collapsed form, as consumed by flamegraph.pl and speedscope"""
+
+    def __init__(self, stacks, samples, elapsed, sampling_time, final_interval):
+        self.stacks = stacks
+        self.samples = samples
+        self.elapsed = elapsed
+        self.sampling_time = sampling_time
+        self.final_interval = final_interval
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top=20):
+        """Sampling stats plus the functions most often on top of a stack"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(self.stacks.values())
+        return {
+            "samples": self.samples,
+            "seconds": self.elapsed,
+            "overhead": self.sampling_time / self.elapsed if self.elapsed else 0.0,
+            "final_interval_seconds": self.final_interval,
+            "distinct_stacks": len(self.stacks),
+            "top_functions": [
+                {"function": name, "samples": count, "fraction": count / total}
+                for name, count in leaves.most_common(top)
+            ],
+        }
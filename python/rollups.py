@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+import uuid
+
+# Bucket width in seconds and how many buckets are kept, per resolution
+RESOLUTIONS = {
+    "minute": (60, 24 * 60),  # 1 day
+    "hour": (3600, 30 * 24),  # 30 days
+    "day": (86400, 365),  # 1 year
+}
+
+
+class RollupBucket:
+    """Running totals for one device over one time bucket; means are derived when serving"""
+
+    __slots__ = ("start", "frames", "detected", "confidence_sum", "offset_count", "abs_dx_sum", "abs_dy_sum",
+                 "interval_sum", "interval_count", "cpu_sum", "cpu_count")
+
+    def __init__(self, start):
+        self.start = start
+        for name in self.__slots__[1:]:
+            setattr(self, name, 0)
+
+    def add(self, seen, best, interval, cpu_percent):
+        """seen is False for cycles without a detector result, which still count towards interval and CPU"""
+        if seen:
+            self.frames += 1
+        if best is not None:
+            self.detected += 1
+            self.confidence_sum += best["confidence"]
+            if "distance_x" in best:
+                self.offset_count += 1
+                self.abs_dx_sum += abs(best["distance_x"])
+                self.abs_dy_sum += abs(best["distance_y"])
+        if interval is not None:
+            self.interval_sum += interval
+            self.interval_count += 1
+        if cpu_percent is not None:
+            self.cpu_sum += cpu_percent
+            self.cpu_count += 1
+
+    def to_dict(self):
+        return {
+            "start": self.start,
+            "frames": self.frames,
+            "detection_rate": self.detected / self.frames if self.frames else None,
+            "mean_confidence": self.confidence_sum / self.detected if self.detected else None,
+            "mean_abs_dx": self.abs_dx_sum / self.offset_count if self.offset_count else None,
+            "mean_abs_dy": self.abs_dy_sum / self.offset_count if self.offset_count else None,
+            "mean_interval": self.interval_sum / self.interval_count if self.interval_count else None,
+            "cpu_percent": self.cpu_sum / self.cpu_count if self.cpu_count else None,
+        }
+
+    def to_state(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_state(cls, values):
+        bucket = cls(values[0])
+        for name, value in zip(cls.__slots__[1:], values[1:]):
+            setattr(bucket, name, value)
+        return bucket
+
+
+class Rollups:
+    """Per-device minute, hour and day rollups of the detection pipeline, updated as each frame is processed.
+
+    Every update bumps a version, which serves as the ETag of all history responses; serialised
+    responses are cached until the next update, so repeated dashboard loads cost a dict lookup.
+    """
+
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.resolutions = resolutions
+        self._lock = threading.Lock()
+        self._buckets = {}  # (device_id, resolution) -> {start: RollupBucket}
+        # A new generation per process so ETags from before a restart never match
+        self._generation = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._updated_at = None
+        self._cache = {}  # (device_id, resolution, since) -> response body for the current version
+
+    def record(self, device_id, t, detections, interval=None, cpu_percent=None):
+        """Fold one processed frame into every resolution; detections is None for frames with no result"""
+        best = max(detections, key=lambda detection: detection["confidence"]) if detections else None
+        with self._lock:
+            for resolution, (seconds, retention) in self.resolutions.items():
+                buckets = self._buckets.setdefault((device_id, resolution), {})
+                start = t - t % seconds
+                bucket = buckets.get(start)
+                if bucket is None:
+                    bucket = buckets[start] = RollupBucket(start)
+                    cutoff = start - seconds * retention
+                    for old in [old for old in buckets if old <= cutoff]:
+                        del buckets[old]
+                bucket.add(detections is not None, best, interval, cpu_percent)
+            self._version += 1
+            self._updated_at = t
+            self._cache.clear()
+
+    def history(self, device_id, resolution, since=None):
+        """(etag, response body) for a device's buckets at one resolution, oldest first"""
+        if resolution not in self.resolutions:
+            raise ValueError(f"Unknown resolution '{resolution}', expected one of {', '.join(self.resolutions)}")
+        key = (device_id, resolution, since)
+        with self._lock:
+            etag = f"{self._generation}-{self._version}"
+            body = self._cache.get(key)
+            if body is None:
+                buckets = self._buckets.get((device_id, resolution), {})
+                seconds = self.resolutions[resolution][0]
+                body = self._cache[key] = {
+                    "device_id": device_id,
+                    "resolution": resolution,
+                    "bucket_seconds": seconds,
+                    "updated_at": self._updated_at,
+                    "buckets": [
+                        buckets[start].to_dict() for start in sorted(buckets)
+                        if since is None or start + seconds > since
+                    ],
+                }
+            return etag, body
+
+    def save(self, path):
+        """Write all buckets to a JSON file atomically"""
+        with self._lock:
+            data = {
+                "updated_at": self._updated_at,
+                "buckets": [
+                    {"device_id": device_id, "resolution": resolution,
+                     "buckets": [bucket.to_state() for bucket in buckets.values()]}
+                    for (device_id, resolution), buckets in self._buckets.items()
+                ],
+            }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        """Restore buckets saved by save(); returns False if there is nothing to load"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        with self._lock:
+            for entry in data.get("buckets", []):
+                if entry["resolution"] not in self.resolutions:
+                    continue
+                buckets = self._buckets.setdefault((entry["device_id"], entry["resolution"]), {})
+                for values in entry["buckets"]:
+                    buckets[values[0]] = RollupBucket.from_state(values)
+            self._updated_at = data.get("updated_at")
+            self._version += 1
+            self._cache.clear()
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "series": len(self._buckets),
+                "buckets": sum(len(buckets) for buckets in self._buckets.values()),
+                "version": self._version,
+                "cached_responses": len(self._cache),
+                "updated_at": self._updated_at,
+            }
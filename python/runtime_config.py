@@ -0,0 +1,284 @@
+import json
+import os
+import threading
+import time
+
+DEFAULT_CONFIG_FILE = "runtime_config.json"
+
+
+class ConfigError(ValueError):
+    """A rejected configuration; errors lists every problem found, not just the first"""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class Setting:
+    """One typed, range-checked tuning knob; reload_model marks settings that only apply after a model reload"""
+
+    def __init__(self, name, kind, default, minimum=None, maximum=None, optional=False, reload_model=False,
+                 env=None, description=""):
+        self.name = name
+        self.kind = kind
+        # Environment variables that predate the config file still provide the default
+        self.default = kind(os.environ[env]) if env and os.environ.get(env) else default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.optional = optional
+        self.reload_model = reload_model
+        self.env = env
+        self.description = description
+
+    def parse(self, value):
+        """The value converted to this setting's type, or ValueError saying why it is not acceptable"""
+        if value is None:
+            if self.optional:
+                return None
+            raise ValueError(f"{self.name} is required")
+        # bool is an int subclass, so it is checked explicitly everywhere
+        if self.kind is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f"{self.name} must be true or false")
+        elif self.kind is int:
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"{self.name} must be an integer")
+        elif self.kind is float:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{self.name} must be a number")
+            value = float(value)
+        elif not isinstance(value, self.kind):
+            raise ValueError(f"{self.name} must be a {self.kind.__name__}")
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{self.name} must be at least {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{self.name} must be at most {self.maximum}")
+        return value
+
+    def to_dict(self):
+        return {
+            "type": self.kind.__name__,
+            "default": self.default,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "optional": self.optional,
+            "reload_model": self.reload_model,
+            "env": self.env,
+            "description": self.description,
+        }
+
+
+SETTINGS = [
+    Setting("confidence_threshold", float, 0.3, minimum=0.0, maximum=1.0,
+            description="Minimum detection confidence passed to the model"),
+    Setting("central_box_size", int, 50, minimum=0, description="Side in pixels of the centre box drawn on frames"),
+    # Weather-report bands; with forecast scheduling on they only apply until the forecaster has seen a frame
+    Setting("interval_clear", int, 60, minimum=1,
+            description="Daytime capture interval in seconds under clear sky, when not forecast-scheduled"),
+    Setting("interval_partly_cloudy", int, 180, minimum=1,
+            description="Daytime capture interval when partly cloudy, when not forecast-scheduled"),
+    Setting("interval_overcast", int, 300, minimum=1,
+            description="Daytime capture interval when overcast or rainy, when not forecast-scheduled"),
+    Setting("clear_cloud_coverage", float, 20.0, minimum=0.0, maximum=100.0,
+            description="Cloud coverage percentage below which the sky counts as clear, when not forecast-scheduled"),
+    Setting("overcast_cloud_coverage", float, 70.0, minimum=0.0, maximum=100.0,
+            description="Cloud coverage percentage from which the sky counts as overcast, when not forecast-scheduled"),
+    Setting("forecast_min_interval", float, 30.0, minimum=1.0, env="FORECAST_MIN_INTERVAL",
+            description="Shortest capture interval the forecast scheduler plans"),
+    Setting("forecast_max_interval", float, 600.0, minimum=1.0, env="FORECAST_MAX_INTERVAL",
+            description="Longest wait between forecast-scheduled captures, probe captures included"),
+    Setting("test_mode_delay", float, 0.5, minimum=0.0, maximum=60.0, description="Seconds between test-mode frames"),
+    Setting("model_path", str, "../models/sun_tracker_v3/sun_tracker_v3_float32.tflite", reload_model=True,
+            env="MODEL_PATH", description="YOLO model used at full quality"),
+    Setting("model_path_small", str, None, optional=True, reload_model=True, env="MODEL_PATH_SMALL",
+            description="Smaller model variant the thermal governor can fall back to"),
+]
+
+
+class RuntimeConfig:
+    """Read-only snapshot of every setting; a change builds a new snapshot instead of editing this one"""
+
+    def __init__(self, values, version=0):
+        object.__setattr__(self, "_values", dict(values))
+        object.__setattr__(self, "version", version)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RuntimeConfig snapshots are read-only")
+
+    def to_dict(self):
+        return dict(self._values)
+
+
+class ConfigManager:
+    """Validated runtime configuration from schema defaults, a JSON override file and API updates.
+
+    Readers take `current` once and use that snapshot for the whole operation, so a change is
+    seen all at once or not at all. Updates are validated as a whole before the snapshot is
+    swapped; listeners run after the swap, in the order changes were applied, while the lock is
+    held. Listeners added with after_lock=True run once it is released, for slow work such as
+    network calls that should not hold up other updates.
+    """
+
+    def __init__(self, settings=SETTINGS, path=None, validator=None):
+        self.settings = {setting.name: setting for setting in settings}
+        self.path = path
+        # Cross-field checks: validator(values, previous_snapshot_or_None) -> list of error strings
+        self.validator = validator
+        # Held while applying a change and notifying listeners, so notifications stay in order
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._late_listeners = []
+        self._overrides = {}
+        self._file_mtime = None
+        self._current = self._build({}, None)
+
+        # Stats
+        self.updates = 0
+        self.rejected = 0
+        self.file_reloads = 0
+        self.last_error = None
+        self.updated_at = None
+
+    @property
+    def current(self):
+        # A single reference read; snapshots are never modified once published
+        return self._current
+
+    def add_listener(self, listener, after_lock=False):
+        """Call listener(old, new, changed_names) after every change that alters a value"""
+        (self._late_listeners if after_lock else self._listeners).append(listener)
+
+    @staticmethod
+    def _notify(listeners, old, new, changed):
+        for listener in listeners:
+            try:
+                listener(old, new, changed)
+            except Exception as e:
+                print(f"Config listener error: {e}")
+
+    def _build(self, overrides, previous):
+        errors = [f"Unknown setting '{name}'" for name in overrides if name not in self.settings]
+        values = {}
+        for name, setting in self.settings.items():
+            try:
+                values[name] = setting.parse(overrides.get(name, setting.default))
+            except ValueError as e:
+                errors.append(str(e))
+        if not errors and self.validator is not None:
+            errors.extend(self.validator(values, previous))
+        if errors:
+            raise ConfigError(errors)
+        return RuntimeConfig(values, version=previous.version + 1 if previous is not None else 0)
+
+    def _apply(self, overrides):
+        """Validate and publish a full set of overrides; returns (old, new, names of the settings that changed)"""
+        with self._lock:
+            old = self._current
+            try:
+                new = self._build(overrides, old)
+            except ConfigError as e:
+                self.rejected += 1
+                self.last_error = str(e)
+                raise
+            self._overrides = overrides
+            changed = [name for name in self.settings if getattr(new, name) != getattr(old, name)]
+            if not changed:
+                return old, old, []
+            self._current = new
+            self.updates += 1
+            self.updated_at = time.time()
+            self._notify(self._listeners, old, new, changed)
+            return old, new, changed
+
+    def update(self, changes, persist=True):
+        """Apply a partial update (name -> value, null resets to the default) and write it to the file"""
+        if not isinstance(changes, dict):
+            raise ConfigError(["Expected an object of setting names to values"])
+        old = new = None
+        changed = []
+        try:
+            with self._lock:
+                overrides = dict(self._overrides)
+                for name, value in changes.items():
+                    setting = self.settings.get(name)
+                    if value is None and setting is not None and not setting.optional:
+                        overrides.pop(name, None)
+                    else:
+                        overrides[name] = value
+                old, new, changed = self._apply(overrides)
+                if persist and self.path:
+                    self._write_file(overrides)
+        finally:
+            # Already applied, so late listeners hear about it even if saving the file failed
+            if changed:
+                self._notify(self._late_listeners, old, new, changed)
+        return changed
+
+    def reload_file(self, force=False):
+        """Re-read the override file if it changed; returns the changed names, or None if nothing was applied.
+
+        A file that cannot be parsed or fails validation leaves the running configuration untouched.
+        """
+        if not self.path:
+            return None
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return None
+            if mtime == self._file_mtime and not force:
+                return None
+            self._file_mtime = mtime
+            try:
+                with open(self.path) as f:
+                    overrides = json.load(f)
+                if not isinstance(overrides, dict):
+                    raise ConfigError(["Config file must contain a JSON object"])
+                old, new, changed = self._apply(overrides)
+            except (OSError, ValueError) as e:
+                # ConfigError is a ValueError, as is a JSON syntax error
+                self.last_error = f"{self.path}: {e}"
+                print(f"Config file rejected, keeping the running configuration: {self.last_error}")
+                return None
+            self.file_reloads += 1
+        if changed:
+            self._notify(self._late_listeners, old, new, changed)
+        return changed
+
+    def _write_file(self, overrides):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(overrides, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+        # Our own write is already applied; the file watcher need not reload it
+        self._file_mtime = os.path.getmtime(self.path)
+
+    def describe(self):
+        """Current values, the overrides behind them and the schema"""
+        with self._lock:
+            return {
+                "config": self._current.to_dict(),
+                "overrides": dict(self._overrides),
+                "version": self._current.version,
+                "path": self.path,
+                "schema": {name: setting.to_dict() for name, setting in self.settings.items()},
+            }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self._current.version,
+                "overrides": len(self._overrides),
+                "updates": self.updates,
+                "rejected": self.rejected,
+                "file_reloads": self.file_reloads,
+                "last_error": self.last_error,
+                "updated_at": self.updated_at,
+            }
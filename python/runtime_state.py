@@ -0,0 +1,152 @@
+import threading
+from datetime import datetime
+
+
+class RuntimeState:
+    """Thread-safe container for the state shared by the Flask handlers and worker threads"""
+
+    def __init__(self, interval_time=60):
+        # Single lock guarding every field below; reentrant so helpers can nest
+        self._lock = threading.RLock()
+        self._interval_time = interval_time
+        self._next_interval_time = None
+        self._last_detection_time = None
+        self._weather_data = None
+        self._model = None
+        self._cap = None
+        # name -> (thread, stop_event) for every background worker we own
+        self._workers = {}
+
+    # Simple guarded fields
+    @property
+    def model(self):
+        with self._lock:
+            return self._model
+
+    @model.setter
+    def model(self, value):
+        with self._lock:
+            self._model = value
+
+    @property
+    def cap(self):
+        with self._lock:
+            return self._cap
+
+    @cap.setter
+    def cap(self, value):
+        with self._lock:
+            self._cap = value
+
+    @property
+    def weather_data(self):
+        with self._lock:
+            return self._weather_data
+
+    @weather_data.setter
+    def weather_data(self, value):
+        # Weather dicts are replaced whole, never mutated, so readers always see a complete snapshot
+        with self._lock:
+            self._weather_data = value
+
+    @property
+    def last_detection_time(self):
+        with self._lock:
+            return self._last_detection_time
+
+    @last_detection_time.setter
+    def last_detection_time(self, value):
+        with self._lock:
+            self._last_detection_time = value
+
+    @property
+    def interval_time(self):
+        with self._lock:
+            return self._interval_time
+
+    @property
+    def next_interval_time(self):
+        with self._lock:
+            return self._next_interval_time
+
+    # Interval management
+    def set_interval(self, new_interval, now=None):
+        """Atomically update the interval and the next capture time, returning (old, new, next)"""
+        if now is None:
+            now = datetime.now().timestamp()
+        with self._lock:
+            old_interval = self._interval_time
+            self._interval_time = new_interval
+            self._next_interval_time = now + new_interval
+            return old_interval, new_interval, self._next_interval_time
+
+    def snapshot(self):
+        """Return a consistent copy of the shared state for status reporting"""
+        with self._lock:
+            return {
+                "interval_time": self._interval_time,
+                "next_interval_time": self._next_interval_time,
+                "last_detection_time": self._last_detection_time,
+                "weather_data": self._weather_data,
+                "model_loaded": self._model is not None,
+                "workers": {name: self._is_running_locked(name) for name in self._workers},
+            }
+
+    # Worker lifecycle
+    def _is_running_locked(self, name):
+        worker = self._workers.get(name)
+        if worker is None:
+            return False
+        thread, stop_event = worker
+        return thread.is_alive() and not stop_event.is_set()
+
+    def is_running(self, name):
+        """Check whether the named worker is alive and has not been asked to stop"""
+        with self._lock:
+            return self._is_running_locked(name)
+
+    def start_worker(self, name, target):
+        """Start target(stop_event) in a daemon thread unless a worker with this name is already running"""
+        with self._lock:
+            worker = self._workers.get(name)
+            if worker is not None and worker[0].is_alive():
+                # Either running, or still winding down after a stop request
+                return False
+
+            stop_event = threading.Event()
+            thread = threading.Thread(target=target, args=(stop_event,), name=name)
+            thread.daemon = True
+            self._workers[name] = (thread, stop_event)
+            thread.start()
+            return True
+
+    def stop_worker(self, name, timeout=None):
+        """Signal the named worker to stop and optionally wait for it, returning True once it has exited"""
+        with self._lock:
+            worker = self._workers.get(name)
+            if worker is None:
+                return True
+            thread, stop_event = worker
+            stop_event.set()
+
+        # Join outside the lock so the worker can still read shared state while shutting down
+        if timeout is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        return not thread.is_alive()
+
+    def join_worker(self, name, timeout=None):
+        """Wait for the named worker to exit, returning True if it is no longer alive"""
+        with self._lock:
+            worker = self._workers.get(name)
+        if worker is None:
+            return True
+        thread = worker[0]
+        if thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        return not thread.is_alive()
+
+    def stop_all(self, timeout=5.0):
+        """Stop every worker, used on shutdown"""
+        with self._lock:
+            names = list(self._workers)
+        return all([self.stop_worker(name, timeout=timeout) for name in names])
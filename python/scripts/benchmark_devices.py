@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+import psutil
+
+# Allow importing the server modules from the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import main
+
+
+def sample_usage(process, seconds):
+    """Average CPU percent and final RSS of the process over a window"""
+    process.cpu_percent(None)
+    time.sleep(seconds)
+    return process.cpu_percent(None), process.memory_info().rss
+
+
+def run_benchmark(num_devices, interval, settle, model_path, source_spec):
+    """Add synthetic cameras one at a time and report the memory and CPU cost of each"""
+    main.load_and_warm_model(model_path)
+    if main.state.model is None:
+        print("Error: Failed to load the model")
+        return False
+    main.inference_worker.start()
+
+    process = psutil.Process()
+    cpu, rss = sample_usage(process, settle)
+    rows = [(0, cpu, rss)]
+    print(f"Baseline with model loaded: RSS {rss / 1e6:.1f} MB, CPU {cpu:.1f}%")
+
+    # Measure the daytime load even when run at night
+    main.POWER_SAVE = False
+    # Keep every camera on a short fixed interval instead of the weather-based one
+    main.calculate_next_interval = lambda device_state=None: device_state.set_interval(interval)[1]
+
+    devices = []
+    try:
+        for i in range(num_devices):
+            device = main.add_device(f"bench{i}", f"{source_spec},seed={i}")
+            device.state.start_worker(main.CAMERA_WORKER,
+                                      lambda stop_event, d=device: main.camera_function(stop_event, device=d))
+            devices.append(device)
+
+            cpu, rss = sample_usage(process, settle)
+            prev_rss = rows[-1][2]
+            rows.append((i + 1, cpu, rss))
+            print(f"{i + 1} cameras: RSS {rss / 1e6:.1f} MB (+{(rss - prev_rss) / 1e6:.1f} MB), "
+                  f"CPU {cpu:.1f}%, threads {threading.active_count()}")
+    finally:
+        for device in devices:
+            device.state.stop_all(timeout=main.WORKER_JOIN_TIMEOUT)
+        main.inference_worker.stop()
+
+    if len(rows) > 1:
+        per_camera = (rows[-1][2] - rows[0][2]) / (len(rows) - 1)
+        print(f"Average marginal memory per camera: {per_camera / 1e6:.1f} MB")
+    print(f"Inference: {main.inference_worker.metrics()}")
+    return True
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Measure the per-camera cost of running several devices in one process")
+    parser.add_argument("--devices", type=int, default=4, help="Number of synthetic cameras to add")
+    parser.add_argument("--interval", type=float, default=2.0, help="Capture interval of each camera in seconds")
+    parser.add_argument("--settle", type=float, default=10.0, help="Seconds to sample after adding each camera")
+    parser.add_argument("--source", default="synthetic:speed=60,cloud_cover=0.3",
+                        help="Synthetic frame source spec; a per-device seed is appended")
+    parser.add_argument("--model", default=os.environ.get(
+        "MODEL_PATH", "../models/sun_tracker_v3/sun_tracker_v3_float32.tflite"), help="Path to the YOLO model")
+    args = parser.parse_args()
+
+    ok = run_benchmark(args.devices, args.interval, args.settle, args.model, args.source)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Allow importing the server modules from the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import draw_central_box
+from preprocess import FramePreprocessor, LETTERBOX_PAD_VALUE
+
+
+def letterbox(image, imgsz):
+    """Ultralytics' LetterBox if installed, else the same resize and pad with OpenCV"""
+    try:
+        from ultralytics.data.augment import LetterBox
+        return LetterBox((imgsz, imgsz), auto=False)(image=image)
+    except ImportError:
+        height, width = image.shape[:2]
+        scale = min(imgsz / height, imgsz / width)
+        new_width, new_height = round(width * scale), round(height * scale)
+        pad_x, pad_y = (imgsz - new_width) // 2, (imgsz - new_height) // 2
+        resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+        return cv2.copyMakeBorder(resized, pad_y, imgsz - new_height - pad_y, pad_x, imgsz - new_width - pad_x,
+                                  cv2.BORDER_CONSTANT, value=(LETTERBOX_PAD_VALUE,) * 3)
+
+
+def current_path(image, imgsz, draw=True):
+    """The existing steps: copy, overlay, letterbox, then Ultralytics' numpy preprocessing"""
+    frame = image.copy()
+    if draw:
+        draw_central_box(frame)
+    batch = np.stack([letterbox(frame, imgsz)])
+    batch = batch[..., ::-1].transpose((0, 3, 1, 2))  # BGR to RGB, BHWC to BCHW
+    batch = np.ascontiguousarray(batch)
+    return batch.astype(np.float32) / 255.0
+
+
+def time_per_call(fn, repeats):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def run_benchmark(frame_sizes, input_sizes, repeats):
+    rng = np.random.default_rng(0)
+    print(f"{'frame':>11} {'input':>5} {'current ms':>11} {'fused ms':>9} {'speedup':>8} {'max diff':>9}")
+    for width, height in frame_sizes:
+        image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        for imgsz in input_sizes:
+            preprocessor = FramePreprocessor(imgsz)
+            current = time_per_call(lambda: current_path(image, imgsz), repeats)
+            fused = time_per_call(lambda: preprocessor(image), repeats)
+            # Compare against the reference without the overlay, which the fused path no longer feeds in
+            difference = np.abs(current_path(image, imgsz, draw=False) - preprocessor(image)[0]).max()
+            print(f"{width:>5}x{height:<5} {imgsz:>5} {current * 1000:>11.2f} {fused * 1000:>9.2f} "
+                  f"{current / fused:>7.2f}x {difference:>9.4f}")
+    return True
+
+
+def parse_size(text):
+    width, _, height = text.partition("x")
+    return int(width), int(height)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Compare the fused preprocessing against the current path")
+    parser.add_argument("--frame-sizes", nargs="+", type=parse_size, default=[(1920, 1080), (1280, 720), (640, 480)],
+                        help="Capture sizes as WIDTHxHEIGHT")
+    parser.add_argument("--input-sizes", nargs="+", type=int, default=[640, 480, 320], help="Model input sizes")
+    parser.add_argument("--repeats", type=int, default=100, help="Calls timed per combination")
+    parser.add_argument("--threads", type=int, default=None, help="OpenCV thread count (the Pi has 4 cores)")
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+    print(f"OpenCV {cv2.__version__}, {cv2.getNumThreads()} threads, "
+          f"optimizations {'on' if cv2.useOptimized() else 'off'}")
+    return 0 if run_benchmark(args.frame_sizes, args.input_sizes, args.repeats) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
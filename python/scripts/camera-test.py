@@ -1,35 +1,37 @@
 import cv2
 import os 
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from frame_sources import create_frame_source
 
 def test_video_capture_and_save():
     """Test the webcam by displaying a live feed and saving it to a file."""
+    output_filename = "webcam_recording.mp4"
     try:
-        # Open the default camera (index 0)
-        cap = cv2.VideoCapture(0)
+        # Open the default camera (index 0), or the frame source FRAME_SOURCE names
+        cap = create_frame_source(os.environ.get("FRAME_SOURCE", "webcam:0"))
 
         if not cap.isOpened():
             print("Error: Unable to access the camera.")
             return
 
-        # Get video properties
-        frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30  # Default to 30 FPS if unavailable
+        # Get video properties; only webcams report them, other sources are sized from their first frame
+        ret, frame = cap.read()
+        if not ret:
+            print("Error: Unable to read from the camera.")
+            return
+        frame_height, frame_width = frame.shape[:2]
+        fps = (int(cap.get(cv2.CAP_PROP_FPS)) if hasattr(cap, "get") else 0) or 30  # Default to 30 FPS if unavailable
 
         # Define the codec and create VideoWriter object
-        output_filename = "webcam_recording.mp4"
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')  # Codec for MP4
         out = cv2.VideoWriter(output_filename, fourcc, fps, (frame_width, frame_height))
 
         print("Recording... Press 'q' to stop.")
 
         while True:
-            # Capture frame-by-frame
-            ret, frame = cap.read()
-            if not ret:
-                print("Error: Unable to read from the camera.")
-                break
-
             # Write the frame to the output file
             out.write(frame)
 
@@ -41,6 +43,12 @@ def test_video_capture_and_save():
                 print("Stopping recording...")
                 break
 
+            # Capture frame-by-frame
+            ret, frame = cap.read()
+            if not ret:
+                print("Error: Unable to read from the camera.")
+                break
+
     except Exception as e:
         print(f"An error occurred: {e}")
 
@@ -2,10 +2,15 @@ import cv2
 import time
 from datetime import datetime
 import os
+import sys
 import warnings
 from supervision import Detections
 from ultralytics import YOLO 
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from frame_sources import create_frame_source
+
 warnings.filterwarnings('ignore', category=UserWarning)
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'  
@@ -200,18 +205,21 @@ def test_video(video_path, model):
     cap.release()
     cv2.destroyAllWindows()
 
-def run_webcam(model):
-    """Process webcam feed with YOLO"""
+def run_webcam(model, source=None):
+    """Process a live feed with YOLO; source is a frame source spec, FRAME_SOURCE or the default webcam if omitted"""
     try:
-        # Open webcam
-        cap = cv2.VideoCapture(0)
+        # Open webcam, or whatever FRAME_SOURCE points at (video:, images:, synthetic:)
+        cap = create_frame_source(source or os.environ.get("FRAME_SOURCE", "webcam:0"))
         if not cap.isOpened():
             print("Error opening webcam")
             return
             
-        # Get video properties
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # Frame size from the first frame, since not every source reports it
+        ret, frame = cap.read()
+        if not ret:
+            print("Error reading from webcam")
+            return
+        height, width = frame.shape[:2]
         
         # Create output directory
         os.makedirs("results", exist_ok=True)
@@ -229,10 +237,11 @@ def run_webcam(model):
         start_time = time.time()
         
         while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("Error reading from webcam")
-                break
+            if frame_count > 0:
+                ret, frame = cap.read()
+                if not ret:
+                    print("Error reading from webcam")
+                    break
                 
             try:
                 # Run inference with YOLO
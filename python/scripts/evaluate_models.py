@@ -0,0 +1,249 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+# One inference thread per worker process; parallelism comes from the pool, not from BLAS/torch
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+# Allow importing the server modules from the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import cv2
+import numpy as np
+
+from custom_script import load_yolo_model, calculate_distance
+from rescore_video import start_warm_pool
+from evaluation import (IOU_THRESHOLDS, find_labeled_images, load_yolo_labels, match_predictions,
+                        detection_metrics, distribution, box_iou)
+
+DEFAULT_MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "models")
+MODEL_PATTERNS = ("*.pt", "*.tflite", "*.onnx", "*.engine", "*_saved_model", "*_openvino_model")
+
+# Low floor so the precision/recall curve behind mAP covers the whole confidence range
+MAP_CONF_FLOOR = 0.001
+
+# Per-process model, loaded and warmed once by the pool initializer
+_worker_model = None
+_worker_imgsz = 640
+
+
+def discover_models(models_dir):
+    """name -> path for every exported model under models/<version>/"""
+    models = {}
+    for pattern in MODEL_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(models_dir, "*", pattern))):
+            models[os.path.splitext(os.path.basename(path))[0]] = path
+    return models
+
+
+def parse_model_args(values, models_dir):
+    """Models from repeated --model NAME=PATH (or bare PATH) arguments, else every model in models_dir"""
+    if not values:
+        return discover_models(models_dir)
+    models = {}
+    for value in values:
+        name, _, path = value.rpartition("=") if "=" in value else ("", "", value)
+        models[name or os.path.splitext(os.path.basename(path.rstrip("/")))[0]] = path
+    return models
+
+
+def _init_worker(ready, model_path, imgsz):
+    """Pool initializer: load one model per worker process, warm it on a blank frame and wait at the barrier"""
+    global _worker_model, _worker_imgsz
+    try:
+        cv2.setNumThreads(1)
+        _worker_imgsz = imgsz
+        _worker_model = load_yolo_model(model_path)
+        if _worker_model is None:
+            raise RuntimeError(f"Failed to load model in worker {os.getpid()}")
+        warmup = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        _worker_model.predict(source=warmup, imgsz=imgsz, conf=MAP_CONF_FLOOR, verbose=False)
+    except BaseException:
+        # Release the parent and the other workers instead of leaving them waiting forever
+        ready.abort()
+        raise
+    ready.wait()
+
+
+def _evaluate_chunk(pairs):
+    """Run the model on (image, label) pairs and return one record per image"""
+    records = []
+    for image_path, label_path in pairs:
+        frame = cv2.imread(image_path)
+        if frame is None:
+            print(f"Skipping unreadable image {image_path}")
+            continue
+        height, width = frame.shape[:2]
+
+        started = time.perf_counter()
+        results = _worker_model.predict(source=frame, imgsz=_worker_imgsz, conf=MAP_CONF_FLOOR, verbose=False)[0]
+        latency = time.perf_counter() - started
+
+        predictions = np.zeros((0, 5))
+        if results is not None and results.boxes:
+            boxes = results.boxes
+            # Only class_0 (sun) is scored
+            sun = boxes.cls.cpu().numpy().astype(int) == 0
+            predictions = np.column_stack([boxes.xyxy.cpu().numpy()[sun], boxes.conf.cpu().numpy()[sun]])
+
+        records.append({
+            "image": image_path,
+            "shape": (height, width),
+            "predictions": predictions,
+            "ground_truth": load_yolo_labels(label_path, width, height),
+            "latency": latency,
+        })
+    return records
+
+
+def run_model(model_path, pairs, workers, imgsz, chunk_size=8):
+    """Score every image with one model across a process pool; returns (records, wall seconds)"""
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+
+    # Every worker has loaded and warmed its model before timing starts, so it covers inference only
+    with start_warm_pool(workers, _init_worker, (model_path, imgsz)) as pool:
+        start_time = time.time()
+        records = []
+        for chunk_records in pool.map(_evaluate_chunk, chunks):
+            records.extend(chunk_records)
+        elapsed = time.time() - start_time
+    return records, elapsed
+
+
+def score_records(records, conf):
+    """Detection metrics, pixel error of the best detection's distance from centre, and latency"""
+    tp = np.concatenate([np.zeros((0, len(IOU_THRESHOLDS)), dtype=bool)] + [
+        match_predictions(record["predictions"][:, :4], record["ground_truth"]) for record in records
+    ])
+    confidences = np.concatenate([np.zeros(0)] + [record["predictions"][:, 4] for record in records])
+    num_gt = sum(len(record["ground_truth"]) for record in records)
+    metrics = detection_metrics(tp, confidences, num_gt, operating_conf=conf)
+
+    # The pipeline steers on the most confident detection, so that is the one whose offset matters
+    errors_x, errors_y = [], []
+    missed = false_alarms = 0
+    for record in records:
+        predictions = record["predictions"][record["predictions"][:, 4] >= conf]
+        ground_truth = record["ground_truth"]
+        if not len(ground_truth):
+            false_alarms += bool(len(predictions))
+            continue
+        if not len(predictions):
+            missed += 1
+            continue
+        best = predictions[predictions[:, 4].argmax(), :4]
+        target = ground_truth[box_iou(best[None], ground_truth)[0].argmax()]
+        height, width = record["shape"]
+        predicted = calculate_distance(width // 2, height // 2, best)
+        actual = calculate_distance(width // 2, height // 2, target)
+        errors_x.append(predicted[0] - actual[0])
+        errors_y.append(predicted[1] - actual[1])
+
+    return {
+        "metrics": metrics,
+        "distance_error_px": {
+            "x": distribution(np.abs(errors_x)),
+            "y": distribution(np.abs(errors_y)),
+            "bias_x": float(np.mean(errors_x)) if errors_x else None,
+            "bias_y": float(np.mean(errors_y)) if errors_y else None,
+        },
+        "missed_images": missed,
+        "false_alarm_images": false_alarms,
+        "latency_ms": distribution([record["latency"] * 1000 for record in records]),
+    }
+
+
+def evaluate(models, images_dir, workers, conf, imgsz, max_images=None):
+    """Evaluate every model on the same labeled images and return the comparable report"""
+    pairs = find_labeled_images(images_dir)[:max_images]
+    print(f"{images_dir}: {len(pairs)} images, {len(models)} models, {workers} workers")
+
+    report = {
+        "dataset": {"images_dir": os.path.abspath(images_dir), "images": len(pairs)},
+        "settings": {"conf": conf, "imgsz": imgsz, "workers": workers, "map_conf_floor": MAP_CONF_FLOOR},
+        "host": {
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "models": {},
+        "timestamp": datetime.now().isoformat(),
+    }
+    for name, path in models.items():
+        print(f"Evaluating {name} ({path})")
+        records, elapsed = run_model(path, pairs, workers, imgsz)
+        result = score_records(records, conf)
+        result["path"] = os.path.abspath(path)
+        result["size_bytes"] = _path_size(path)
+        result["wall_seconds"] = elapsed
+        result["images_per_second"] = len(records) / elapsed if elapsed > 0 else 0.0
+        report["models"][name] = result
+    return report
+
+
+def _path_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+
+def print_summary(report):
+    print("\nmodel                          P      R   mAP50  mAP50-95  err_x p95  err_y p95  latency p50  img/s")
+    for name, result in report["models"].items():
+        metrics = result["metrics"]
+        error = result["distance_error_px"]
+        latency = result["latency_ms"]
+        print(f"{name:28s} {metrics['precision']:5.3f}  {metrics['recall']:5.3f}  {metrics['map50']:5.3f}  "
+              f"{metrics['map50_95']:8.3f}  {error['x'].get('p95', float('nan')):9.1f}  "
+              f"{error['y'].get('p95', float('nan')):9.1f}  {latency.get('p50', float('nan')):9.1f}ms  "
+              f"{result['images_per_second']:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score models on a labeled image set: mAP, pixel error and latency")
+    parser.add_argument("images", help="Images directory of a YOLO dataset split (labels/ sits next to it)")
+    parser.add_argument("--model", action="append", default=None,
+                        help="NAME=PATH or PATH of a model to evaluate; repeat to compare "
+                             "(default: every export under models/)")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR, help="Where to look for models by default")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (1 gives uncontended per-image latency)")
+    parser.add_argument("--conf", type=float, default=0.3, help="Operating confidence for precision, recall and error")
+    parser.add_argument("--imgsz", type=int, default=640, help="Model input size")
+    parser.add_argument("--max-images", type=int, default=None, help="Only evaluate the first N images")
+    parser.add_argument("--output", default=None, help="JSON report path (default: results/evaluation_<time>.json)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.images):
+        print(f"Error: Images directory not found: {args.images}")
+        return 1
+    models = parse_model_args(args.model, args.models_dir)
+    if not models:
+        print("Error: No models to evaluate")
+        return 1
+    for name, path in models.items():
+        if not os.path.exists(path):
+            print(f"Error: Model file not found for {name}: {path}")
+            return 1
+
+    report = evaluate(models, args.images, args.workers, args.conf, args.imgsz, args.max_images)
+    print_summary(report)
+
+    output_path = args.output or f"results/evaluation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved report to: {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
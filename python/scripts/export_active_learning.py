@@ -0,0 +1,42 @@
+import argparse
+import os
+import sys
+
+# Allow importing the server modules from the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from active_learning import export_shard, load_samples
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(
+        description="Export the frames kept by the active-learning collector as a YOLO dataset shard")
+    parser.add_argument("--collector", default=os.environ.get("ACTIVE_LEARNING_DIR", "results/active_learning"),
+                        help="Collector directory (ACTIVE_LEARNING_DIR on the device)")
+    parser.add_argument("--output", required=True, help="Directory to write the shard to")
+    parser.add_argument("--val-fraction", type=float, default=0.2, help="Fraction of samples in the val split")
+    parser.add_argument("--max-mb", type=float, default=None, help="Cap the shard size, newest samples first")
+    parser.add_argument("--args-template", default="../models/sun_tracker_v3/v3_train/args.yaml",
+                        help="Training args.yaml to copy with its data path pointed at the shard ('' to skip)")
+    parser.add_argument("--model", default=None, help="Weights to fine-tune from, written into the args copy")
+    args = parser.parse_args()
+
+    if not load_samples(args.collector):
+        print(f"Error: No samples in {args.collector}")
+        return 1
+    template = args.args_template or None
+    if template is not None and not os.path.exists(template):
+        print(f"Error: Args template not found: {template}")
+        return 1
+
+    max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+    dataset_path = export_shard(args.collector, args.output, val_fraction=args.val_fraction,
+                                args_template=template, model=args.model, max_bytes=max_bytes)
+    print(f"Dataset config: {dataset_path}")
+    if template is not None:
+        print(f"Train with: yolo cfg={os.path.join(args.output, 'args.yaml')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,88 @@
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import time
+
+# Allow importing the server modules from the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import main
+from frame_sources import create_frame_source
+from inference_worker import PRIORITY_LIVE
+
+
+def run_load_test(source_spec, num_frames, model_path):
+    """Push frames from a source through the server's detection pipeline and report throughput"""
+    main.load_and_warm_model(model_path)
+    if main.state.model is None:
+        print("Error: Failed to load the model")
+        return False
+    main.inference_worker.start()
+
+    source = create_frame_source(source_spec)
+    if not source.isOpened():
+        print(f"Error: Could not open frame source {source_spec}")
+        return False
+
+    latencies = []
+    errors = 0
+    start_time = time.time()
+    try:
+        for _ in range(num_frames):
+            ret, frame = source.read()
+            if not ret:
+                break
+
+            frame_start = time.time()
+            results, _, _ = main.process_image_with_model(
+                frame, return_annotated=True, priority=PRIORITY_LIVE, source=main.CAMERA_WORKER
+            )
+            latencies.append(time.time() - frame_start)
+            if "error" in results:
+                errors += 1
+    finally:
+        source.release()
+        main.inference_worker.stop()
+
+    elapsed = time.time() - start_time
+    latencies.sort()
+    count = len(latencies)
+    if count == 0:
+        print("No frames processed")
+        return False
+
+    print(f"Processed {count} frames from {source_spec} in {elapsed:.2f} seconds ({count / elapsed:.2f} FPS)")
+    print(f"Latency p50: {latencies[count // 2] * 1000:.1f} ms, "
+          f"p95: {latencies[min(count - 1, int(count * 0.95))] * 1000:.1f} ms, "
+          f"max: {latencies[-1] * 1000:.1f} ms")
+    print(f"Errors: {errors}")
+    print(f"Inference: {main.inference_worker.metrics()}")
+    print(f"Frame gate: {main.frame_gates[main.CAMERA_WORKER].stats()}")
+    return True
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Headless load test of the detection pipeline")
+    parser.add_argument("--source", default="synthetic:speed=60,cloud_cover=0.3",
+                        help="Frame source spec (webcam:0, video:<path>, images:<dir>, synthetic:...)")
+    parser.add_argument("--frames", type=int, default=300, help="Number of frames to process")
+    parser.add_argument("--model", default=os.environ.get(
+        "MODEL_PATH", "../models/sun_tracker_v3/sun_tracker_v3_float32.tflite"), help="Path to the YOLO model")
+    parser.add_argument("--profile", default=None, help="Write cProfile stats to this file and print the top entries")
+    args = parser.parse_args()
+
+    if args.profile:
+        profiler = cProfile.Profile()
+        ok = profiler.runcall(run_load_test, args.source, args.frames, args.model)
+        profiler.dump_stats(args.profile)
+        pstats.Stats(args.profile).sort_stats("cumulative").print_stats(25)
+        print(f"Profile saved to: {args.profile}")
+    else:
+        ok = run_load_test(args.source, args.frames, args.model)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,77 @@
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+# Allow importing the server modules from the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from weather_gateway import FakeUpstream, WeatherGateway
+
+
+def run_load_test(devices, sites, rounds, latency, failure_rate, ttl):
+    """Many devices spread over a few sites poll the gateway at once; count the upstream calls it makes"""
+    upstream = FakeUpstream(latency=latency, failure_rate=failure_rate, seed=0)
+    gateway = WeatherGateway(upstream, ttl=ttl)
+    rng = random.Random(0)
+    site_coords = [(rng.uniform(-60, 60), rng.uniform(-180, 180)) for _ in range(sites)]
+    # Devices at a site are within a few hundred metres of each other
+    device_coords = [
+        (lat + rng.uniform(-0.002, 0.002), lon + rng.uniform(-0.002, 0.002))
+        for lat, lon in (site_coords[i % sites] for i in range(devices))
+    ]
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(devices)
+
+    def device(lat, lon):
+        for _ in range(rounds):
+            # Line everyone up so requests really are concurrent
+            barrier.wait()
+            start = time.time()
+            try:
+                gateway.get(lat, lon)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            with lock:
+                latencies.append(time.time() - start)
+
+    threads = [threading.Thread(target=device, args=coords) for coords in device_coords]
+    start_time = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start_time
+
+    latencies.sort()
+    count = len(latencies)
+    stats = gateway.stats()
+    print(f"{devices} devices at {sites} sites, {rounds} rounds: {count} requests in {elapsed:.2f} seconds")
+    print(f"Upstream calls: {upstream.calls} (without the gateway: {count}), "
+          f"buckets: {stats['buckets']}, errors: {errors[0]}")
+    print(f"Latency p50: {latencies[count // 2] * 1000:.1f} ms, max: {latencies[-1] * 1000:.1f} ms")
+    print(f"Gateway: {stats}")
+    return True
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline load test of the weather gateway against a fake upstream")
+    parser.add_argument("--devices", type=int, default=100, help="Number of concurrent devices")
+    parser.add_argument("--sites", type=int, default=5, help="Number of distinct sites the devices are spread over")
+    parser.add_argument("--rounds", type=int, default=5, help="Requests per device")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake upstream latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of fake upstream calls that fail")
+    parser.add_argument("--ttl", type=float, default=600.0, help="Cache TTL in seconds (0 only coalesces)")
+    args = parser.parse_args()
+    ok = run_load_test(args.devices, args.sites, args.rounds, args.latency, args.failure_rate, args.ttl)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+# Allow importing the server modules from the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import main
+from clock import VirtualClock
+from session import SessionRecorder, ReplaySession, ReplayFrameSource, load_events, compare_outputs
+
+
+class ReplayStopEvent(threading.Event):
+    """Stop event that also reports set once the virtual clock passes the end of the session"""
+
+    def __init__(self, clock, end_time):
+        super().__init__()
+        self._clock = clock
+        self._end_time = end_time
+
+    def is_set(self):
+        return super().is_set() or self._clock.time() > self._end_time
+
+
+def replay(session_path, output_path, model_path):
+    """Run a recorded session through camera_function on a virtual clock, recording the outputs"""
+    session = ReplaySession(session_path)
+    if session.start_time is None:
+        print(f"Error: Session {session_path} has no frames or weather to replay")
+        return None
+    print(f"Replaying {len(session.frames)} frames and {len(session.weather)} weather responses "
+          f"spanning {session.end_time - session.start_time:.0f} seconds")
+
+    # Swap the pipeline's time and weather sources for the recorded ones
+    clock = VirtualClock(session.start_time)
+    main.clock = clock
+    main.weather_fetcher = lambda: session.weather_at(clock.time())
+
+    main.load_and_warm_model(model_path)
+    if main.state.model is None:
+        print("Error: Failed to load the model")
+        return None
+    main.inference_worker.start()
+
+    recorder = SessionRecorder(output_path, save_frames=False)
+    stop_event = ReplayStopEvent(clock, session.end_time)
+
+    start_time = time.time()
+    try:
+        main.camera_function(stop_event, source=ReplayFrameSource(session, clock), recorder=recorder)
+    finally:
+        main.inference_worker.stop()
+    elapsed = time.time() - start_time
+
+    span = session.end_time - session.start_time
+    print(f"Replayed {span:.0f} virtual seconds in {elapsed:.2f} wall seconds "
+          f"({span / elapsed if elapsed > 0 else 0:.0f}x real time)")
+    print(f"Inference: {main.inference_worker.metrics()}")
+    return session
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the detection pipeline")
+    parser.add_argument("session", help="Session directory recorded with RECORD_SESSION_DIR")
+    parser.add_argument("--output", default=None, help="Directory for the replay's outputs")
+    parser.add_argument("--model", default=os.environ.get(
+        "MODEL_PATH", "../models/sun_tracker_v3/sun_tracker_v3_float32.tflite"), help="Path to the YOLO model")
+    parser.add_argument("--compare", default=None,
+                        help="Session or replay directory to compare against (default: the recorded outputs)")
+    parser.add_argument("--pixel-tolerance", type=float, default=2.0,
+                        help="Largest dx/dy difference in pixels still counted as a match")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(
+        "results", f"replay_{os.path.basename(os.path.normpath(args.session))}_{int(time.time())}"
+    )
+    session = replay(args.session, output_path, args.model)
+    if session is None:
+        return 1
+
+    baseline = session.outputs
+    if args.compare:
+        baseline = [event for event in load_events(args.compare) if event["type"] == "output"]
+    candidate = [event for event in load_events(output_path) if event["type"] == "output"]
+
+    summary = compare_outputs(baseline, candidate, pixel_tolerance=args.pixel_tolerance)
+    print(json.dumps(summary, indent=2))
+    print(f"Replay outputs saved to: {output_path}")
+    return 0 if all(kind["mismatches"] == 0 for kind in summary.values()) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,301 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+# One inference thread per worker process; parallelism comes from the pool, not from BLAS/torch
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import cv2
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from custom_script import load_yolo_model, calculate_distance
+
+DEFAULT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "models", "sun_tracker_v3", "sun_tracker_v3_float32.tflite"
+)
+
+DETECTION_COLUMNS = [
+    "frame_index", "timestamp_s", "class_id", "confidence",
+    "x1", "y1", "x2", "y2", "distance_x", "distance_y",
+]
+
+# Seconds workers get to load and warm their models; a worker killed outright (OOM, segfault) never
+# reaches the barrier, so without a limit the rest of the pool would wait for it forever
+WORKER_INIT_TIMEOUT = 600.0
+
+# Per-process model, loaded and warmed once by the pool initializer
+_worker_model = None
+_worker_conf = 0.3
+
+
+def get_video_info(video_path):
+    """Return (frame_count, fps, width, height) for a video file"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file {video_path}")
+    try:
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return frame_count, fps, width, height
+    finally:
+        cap.release()
+
+
+def find_keyframes(video_path, fps):
+    """Return the presentation-order frame indices of keyframes, or None if ffprobe is unavailable"""
+    # Packets come in decode order, which differs from frame order with B-frames; decoded frames carry
+    # their presentation timestamp, and skipping non-key frames keeps the probe to a fraction of a decode
+    try:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0", "-skip_frame", "nokey",
+             "-show_entries", "stream=start_time:frame=pict_type,best_effort_timestamp_time",
+             "-of", "json", video_path],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        probe = json.loads(output)
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        print(f"Keyframe probe unavailable ({e}), falling back to uniform segments")
+        return None
+
+    streams = probe.get("streams") or [{}]
+    start_time = float(streams[0].get("start_time") or 0.0)
+    keyframes = set()
+    for frame in probe.get("frames", []):
+        timestamp = frame.get("best_effort_timestamp_time")
+        if frame.get("pict_type") != "I" or timestamp in (None, "N/A"):
+            continue
+        keyframes.add(max(0, round((float(timestamp) - start_time) * fps)))
+    return sorted(keyframes)
+
+
+def plan_segments(frame_count, num_segments, keyframes=None):
+    """Split [0, frame_count) into about num_segments ranges, starting each on a keyframe when known"""
+    if frame_count <= 0:
+        return []
+    num_segments = max(1, min(num_segments, frame_count))
+    targets = [round(i * frame_count / num_segments) for i in range(num_segments)]
+
+    if keyframes:
+        # Snap every target start to the closest keyframe at or before it, so seeks decode no extra frames
+        keyframes = np.asarray(sorted(k for k in keyframes if k < frame_count))
+        positions = np.searchsorted(keyframes, targets, side="right") - 1
+        starts = sorted({int(keyframes[p]) if p >= 0 else 0 for p in positions})
+    else:
+        starts = sorted(set(targets))
+
+    if starts[0] != 0:
+        starts.insert(0, 0)
+    ends = starts[1:] + [frame_count]
+    return [(start, end) for start, end in zip(starts, ends) if end > start]
+
+
+def _init_worker(ready, model_path, conf, imgsz):
+    """Pool initializer: load one model per worker process, warm it on a blank frame and wait at the barrier"""
+    global _worker_model, _worker_conf
+    try:
+        cv2.setNumThreads(1)
+        _worker_conf = conf
+        _worker_model = load_yolo_model(model_path)
+        if _worker_model is None:
+            raise RuntimeError(f"Failed to load model in worker {os.getpid()}")
+        warmup = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        _worker_model.predict(source=warmup, conf=conf, verbose=False)
+    except BaseException:
+        # Release the parent and the other workers instead of leaving them waiting forever
+        ready.abort()
+        raise
+    ready.wait()
+
+
+def _noop():
+    pass
+
+
+def start_warm_pool(workers, initializer, initargs, timeout=WORKER_INIT_TIMEOUT):
+    """ProcessPoolExecutor whose workers have all run initializer(barrier, *initargs) before it is returned.
+
+    The pool starts workers on demand, so one no-op task per worker makes it start all of them.
+    Workers wait at the barrier until the last one is initialized, so the no-op tasks only finish
+    once every worker is warm. A worker that raises, dies or overruns the timeout breaks the pool
+    or the barrier, and this raises RuntimeError instead of hanging.
+    """
+    # Spawn keeps workers clean of the parent's threads and model state
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(workers, timeout=timeout)
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=context, initializer=initializer, initargs=(ready,) + tuple(initargs),
+    )
+    try:
+        futures = [pool.submit(_noop) for _ in range(workers)]
+        # A little longer than the barrier, so a worker timing out there reports as a broken pool
+        _, pending = wait(futures, timeout=timeout + 10.0)
+        if pending:
+            raise RuntimeError(f"Workers did not initialize within {timeout:g} seconds")
+        for future in futures:
+            future.result()
+    except BrokenProcessPool:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise RuntimeError("A worker failed to initialize") from None
+    except RuntimeError:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    return pool
+
+
+def _process_segment(video_path, start, end, fps):
+    """Run detection on frames [start, end) and return (rows, frames_processed)"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file {video_path}")
+
+    rows = []
+    processed = 0
+    try:
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+        for frame_index in range(start, end):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            processed += 1
+
+            height, width = frame.shape[:2]
+            center_x, center_y = width // 2, height // 2
+            results = _worker_model.predict(source=frame, conf=_worker_conf, verbose=False)[0]
+            if results is None or not results.boxes:
+                continue
+
+            for box, cls_id, conf in zip(
+                results.boxes.xyxy.cpu().numpy(),
+                results.boxes.cls.cpu().numpy().astype(int),
+                results.boxes.conf.cpu().numpy()
+            ):
+                # Process only class_0 (sun)
+                if cls_id != 0:
+                    continue
+                x1, y1, x2, y2 = map(int, box)
+                distance_x, distance_y = calculate_distance(center_x, center_y, (x1, y1, x2, y2))
+                rows.append((
+                    frame_index, frame_index / fps, int(cls_id), float(conf),
+                    x1, y1, x2, y2, float(distance_x), float(distance_y),
+                ))
+    finally:
+        cap.release()
+
+    return rows, processed
+
+
+def rescore_video(video_path, model_path, workers, conf=0.3, imgsz=640, segments_per_worker=4, max_frames=None):
+    """Re-score a video across a process pool and return (ordered rows, frames processed, seconds)"""
+    frame_count, fps, _, _ = get_video_info(video_path)
+    if max_frames is not None:
+        frame_count = min(frame_count, max_frames)
+
+    keyframes = find_keyframes(video_path, fps)
+    segments = plan_segments(frame_count, workers * segments_per_worker, keyframes)
+    print(f"{video_path}: {frame_count} frames in {len(segments)} segments across {workers} workers")
+
+    # Every worker has loaded and warmed its model before timing starts, so it covers inference only
+    with start_warm_pool(workers, _init_worker, (model_path, conf, imgsz)) as pool:
+        start_time = time.time()
+        futures = [pool.submit(_process_segment, video_path, start, end, fps) for start, end in segments]
+        rows = []
+        frames_processed = 0
+        for future in futures:
+            segment_rows, processed = future.result()
+            rows.extend(segment_rows)
+            frames_processed += processed
+        elapsed = time.time() - start_time
+
+    # Segments are disjoint, so a stable sort by frame keeps per-frame detection order
+    rows.sort(key=lambda row: row[0])
+    return rows, frames_processed, elapsed
+
+
+def write_detection_table(rows, output_path):
+    """Write the merged detections to a CSV file"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(DETECTION_COLUMNS)
+        writer.writerows(rows)
+    print(f"Saved {len(rows)} detections to: {output_path}")
+
+
+def run_benchmark(video_path, model_path, conf, imgsz, max_frames):
+    """Re-score the same footage with 1, 2, 4, ... workers and print the scaling curve"""
+    cpu_count = os.cpu_count() or 1
+    worker_counts = []
+    n = 1
+    while n < cpu_count:
+        worker_counts.append(n)
+        n *= 2
+    worker_counts.append(cpu_count)
+
+    print(f"Benchmarking on {cpu_count} CPUs with worker counts {worker_counts}")
+    baseline_fps = None
+    curve = []
+    for workers in worker_counts:
+        _, frames, elapsed = rescore_video(video_path, model_path, workers, conf=conf, imgsz=imgsz, max_frames=max_frames)
+        fps = frames / elapsed if elapsed > 0 else 0.0
+        if baseline_fps is None:
+            baseline_fps = fps
+        speedup = fps / baseline_fps if baseline_fps else 0.0
+        curve.append((workers, frames, elapsed, fps, speedup))
+
+    print("\nworkers  frames  seconds  frames/s  speedup  efficiency")
+    for workers, frames, elapsed, fps, speedup in curve:
+        print(f"{workers:7d}  {frames:6d}  {elapsed:7.2f}  {fps:8.2f}  {speedup:6.2f}x  {speedup / workers:9.0%}")
+    return curve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score recorded footage in parallel across CPU cores")
+    parser.add_argument("video", help="Path to the video file to re-score")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Path to the YOLO model")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--conf", type=float, default=0.3, help="Detection confidence threshold")
+    parser.add_argument("--imgsz", type=int, default=640, help="Input size used to warm up each worker")
+    parser.add_argument("--max-frames", type=int, default=None, help="Only process the first N frames")
+    parser.add_argument("--output", default=None, help="CSV output path (default: results/rescore_<video>.csv)")
+    parser.add_argument("--benchmark", action="store_true", help="Measure throughput for increasing worker counts")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.video):
+        print(f"Error: Video file not found: {args.video}")
+        return 1
+    if not os.path.exists(args.model):
+        print(f"Error: Model file not found: {args.model}")
+        return 1
+
+    if args.benchmark:
+        run_benchmark(args.video, args.model, args.conf, args.imgsz, args.max_frames)
+        return 0
+
+    rows, frames, elapsed = rescore_video(
+        args.video, args.model, args.workers, conf=args.conf, imgsz=args.imgsz, max_frames=args.max_frames
+    )
+    print(f"Processed {frames} frames in {elapsed:.2f} seconds ({frames / elapsed if elapsed > 0 else 0:.2f} FPS)")
+
+    output_path = args.output
+    if output_path is None:
+        name = os.path.splitext(os.path.basename(args.video))[0]
+        output_path = f"results/rescore_{name}.csv"
+    write_detection_table(rows, output_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
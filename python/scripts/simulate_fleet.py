@@ -0,0 +1,83 @@
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+# Allow importing the server modules from the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import aggregator_service
+from fleet_reporter import FleetReporter
+
+
+def simulate(num_devices, hours, interval, port):
+    """Run the aggregator locally and push simulated history from many devices through FleetReporters"""
+    server = make_server("127.0.0.1", port, aggregator_service.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name="aggregator")
+    thread.daemon = True
+    thread.start()
+
+    url = f"http://127.0.0.1:{port}"
+    reporters = [FleetReporter(url, batch_size=200) for _ in range(num_devices)]
+    rng = random.Random(0)
+    end = time.time()
+    start = end - hours * 3600
+
+    start_time = time.time()
+    records = 0
+    try:
+        for i, reporter in enumerate(reporters):
+            # Each reporter stands for one unit running a single local "default" device
+            device_id = f"pi-{i:03d}:default"
+            t = start
+            while t < end:
+                detections = []
+                if rng.random() < 0.8:
+                    detections.append({
+                        "confidence": rng.uniform(0.3, 0.95),
+                        "azimuth_error": rng.gauss(0, 1.0),
+                        "elevation_error": rng.gauss(0, 1.0),
+                    })
+                reporter.record_detections(device_id, t, detections)
+                reporter.record_telemetry(device_id, t, {
+                    "cpu_percent": rng.uniform(10, 90),
+                    "memory_percent": rng.uniform(30, 70),
+                    "disk_percent": 50.0,
+                })
+                records += 2
+                t += interval
+            reporter.flush()
+        elapsed = time.time() - start_time
+
+        client = aggregator_service.app.test_client()
+        status = client.get("/fleet/status").get_json()
+        history = client.get("/fleet/devices/pi-000:default/history?resolution=3600").get_json()
+    finally:
+        server.shutdown()
+
+    print(f"Pushed {records} records from {num_devices} devices in {elapsed:.2f} seconds "
+          f"({records / elapsed:.0f} records/s)")
+    print(f"Fleet: {status['devices']} devices, {status['online']} online, "
+          f"{status['frames']} frames in the last hour, detection rate {status['detection_rate']}")
+    print(f"pi-000:default hourly history: {len(history['buckets'])} buckets")
+    for reporter in reporters[:1]:
+        print(f"Reporter: {reporter.stats()}")
+    return True
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Simulate a fleet of trackers pushing to a local aggregator")
+    parser.add_argument("--devices", type=int, default=50, help="Number of simulated devices")
+    parser.add_argument("--hours", type=float, default=6.0, help="Hours of history each device pushes")
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between frames per device")
+    parser.add_argument("--port", type=int, default=5199, help="Port for the local aggregator")
+    args = parser.parse_args()
+    return 0 if simulate(args.devices, args.hours, args.interval, args.port) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
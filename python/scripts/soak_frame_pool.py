@@ -0,0 +1,100 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+import psutil
+
+# Allow importing the server modules from the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import main
+from clock import VirtualClock
+from frame_pool import FramePool
+
+
+class SoakStopEvent(threading.Event):
+    """Stop event that also reports set once the soak has run long enough"""
+
+    def __init__(self, deadline):
+        super().__init__()
+        self._deadline = deadline
+
+    def is_set(self):
+        return super().is_set() or time.time() > self._deadline
+
+
+def run_soak(minutes, sample_seconds, source_spec, model_path, use_pool):
+    """Run the camera loop flat out on a virtual clock and sample RSS to check it stays flat"""
+    main.load_and_warm_model(model_path)
+    if main.state.model is None:
+        print("Error: Failed to load the model")
+        return False
+    main.inference_worker.start()
+
+    # The virtual clock turns the loop's waits into no-ops, so frames are processed back to back
+    main.clock = VirtualClock(time.time())
+    main.POWER_SAVE = False
+    main.calculate_next_interval = lambda device_state=None: device_state.set_interval(0)[1]
+    main.default_device.source_spec = source_spec
+    if not use_pool:
+        # A pool that owns nothing hands out a fresh array every time, like the old per-frame allocations
+        main.frame_pool = FramePool(max_buffers=0)
+
+    frames = [0]
+    process_image_with_model = main.process_image_with_model
+
+    def counted(*args, **kwargs):
+        frames[0] += 1
+        return process_image_with_model(*args, **kwargs)
+    main.process_image_with_model = counted
+
+    process = psutil.Process()
+    stop_event = SoakStopEvent(time.time() + minutes * 60)
+    loop = threading.Thread(target=main.camera_function, args=(stop_event,), name="soak-camera")
+    loop.start()
+
+    samples = []
+    start_time = time.time()
+    while True:
+        loop.join(sample_seconds)
+        if not loop.is_alive():
+            break
+        elapsed = time.time() - start_time
+        rss = process.memory_info().rss
+        samples.append((elapsed, rss))
+        print(f"{elapsed:7.0f}s  RSS {rss / 1e6:7.1f} MB  frames {frames[0]}")
+    main.inference_worker.stop()
+
+    if len(samples) < 3:
+        print("Not enough samples, run for longer")
+        return False
+    # Skip the first third while caches and the pool warm up, then fit a line through the rest
+    steady = samples[len(samples) // 3:]
+    mean_t = sum(t for t, _ in steady) / len(steady)
+    mean_rss = sum(rss for _, rss in steady) / len(steady)
+    var = sum((t - mean_t) ** 2 for t, _ in steady)
+    slope = sum((t - mean_t) * (rss - mean_rss) for t, rss in steady) / var if var > 0 else 0.0
+    print(f"Steady-state RSS {mean_rss / 1e6:.1f} MB, trend {slope * 3600 / 1e6:+.2f} MB/hour "
+          f"({'pooled' if use_pool else 'unpooled'})")
+    print(f"Frame pool: {main.frame_pool.stats()}")
+    return True
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Long-running soak of the camera loop to check memory stays flat")
+    parser.add_argument("--minutes", type=float, default=30.0, help="How long to run")
+    parser.add_argument("--sample-seconds", type=float, default=10.0, help="Seconds between RSS samples")
+    parser.add_argument("--source", default="synthetic:speed=60,cloud_cover=0.3",
+                        help="Frame source spec for the camera loop")
+    parser.add_argument("--model", default=os.environ.get(
+        "MODEL_PATH", "../models/sun_tracker_v3/sun_tracker_v3_float32.tflite"), help="Path to the YOLO model")
+    parser.add_argument("--no-pool", action="store_true", help="Allocate every frame, for comparison")
+    args = parser.parse_args()
+    ok = run_soak(args.minutes, args.sample_seconds, args.source, args.model, not args.no_pool)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,101 @@
+import os
+import random
+import sys
+import threading
+import time
+
+# Allow importing the server modules from the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from runtime_state import RuntimeState
+
+CAMERA_WORKER = "camera"
+
+def run_stress_test(num_requests=500, num_threads=32):
+    """Fire concurrent start/stop/interval requests at a RuntimeState and check its invariants."""
+    state = RuntimeState(interval_time=60)
+    counter_lock = threading.Lock()
+    live_workers = 0
+    max_live_workers = 0
+    started = 0
+    violations = []
+
+    def fake_camera_function(stop_event):
+        """Stand-in for camera_function that only tracks how many loops are alive at once"""
+        nonlocal live_workers, max_live_workers
+        with counter_lock:
+            live_workers += 1
+            max_live_workers = max(max_live_workers, live_workers)
+        try:
+            while not stop_event.is_set():
+                stop_event.wait(0.001)
+        finally:
+            with counter_lock:
+                live_workers -= 1
+
+    def check_interval_snapshot():
+        # Every update uses now = 1000 * interval, so a consistent pair has next == 1001 * interval
+        snapshot = state.snapshot()
+        interval = snapshot["interval_time"]
+        next_time = snapshot["next_interval_time"]
+        if next_time is not None and next_time != 1001 * interval:
+            violations.append(f"Torn interval update: interval={interval}, next={next_time}")
+
+    def request(i):
+        nonlocal started
+        action = random.choice(["start", "stop", "interval", "status"])
+        if action == "start":
+            if state.start_worker(CAMERA_WORKER, fake_camera_function):
+                with counter_lock:
+                    started += 1
+        elif action == "stop":
+            state.stop_worker(CAMERA_WORKER, timeout=1.0)
+        elif action == "interval":
+            interval = random.randint(1, 3600)
+            state.set_interval(interval, now=1000 * interval)
+        check_interval_snapshot()
+
+    request_ids = list(range(num_requests))
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                if not request_ids:
+                    return
+                i = request_ids.pop()
+            request(i)
+
+    start_time = time.time()
+    clients = [threading.Thread(target=client) for _ in range(num_threads)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+
+    # Lifecycle must always converge to a fully stopped state
+    if not state.stop_all(timeout=5.0):
+        violations.append("Worker did not exit within timeout after stop_all")
+    if state.is_running(CAMERA_WORKER):
+        violations.append("Camera worker still reported running after stop_all")
+    if max_live_workers > 1:
+        violations.append(f"{max_live_workers} camera loops were alive at the same time")
+    if live_workers != 0:
+        violations.append(f"{live_workers} camera loops leaked after shutdown")
+
+    elapsed = time.time() - start_time
+    print(f"Processed {num_requests} requests on {num_threads} threads in {elapsed:.2f} seconds")
+    print(f"Camera loops started: {started}, max concurrently alive: {max_live_workers}")
+
+    if violations:
+        print(f"FAILED with {len(violations)} invariant violations:")
+        for violation in violations[:20]:
+            print(f"  {violation}")
+        return False
+
+    print("All invariants held")
+    return True
+
+if __name__ == "__main__":
+    requests_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    sys.exit(0 if run_stress_test(num_requests=requests_count) else 1)
@@ -0,0 +1,192 @@
+import bisect
+import json
+import os
+import threading
+from datetime import datetime
+
+from startup import LazyModule
+from frame_sources import FrameSource
+
+cv2 = LazyModule("cv2")
+
+EVENTS_FILE = "events.jsonl"
+FRAMES_DIR = "frames"
+
+
+class SessionRecorder:
+    """Records frames (as JPEG), weather responses and pipeline outputs with timestamps to a session directory"""
+
+    def __init__(self, path, save_frames=True, jpeg_quality=90):
+        self.path = path
+        self.save_frames = save_frames
+        self.jpeg_quality = jpeg_quality
+        self._lock = threading.Lock()
+        self._frame_count = 0
+        os.makedirs(os.path.join(path, FRAMES_DIR), exist_ok=True)
+        # Line-buffered append so a crash still leaves a usable session
+        self._events = open(os.path.join(path, EVENTS_FILE), "a", buffering=1)
+
+    @classmethod
+    def create(cls, base_dir, **kwargs):
+        """Start a new timestamped session under base_dir"""
+        name = datetime.now().strftime('session_%Y%m%d_%H%M%S')
+        return cls(os.path.join(base_dir, name), **kwargs)
+
+    def _write(self, event):
+        with self._lock:
+            if self._events is not None:
+                self._events.write(json.dumps(event) + "\n")
+
+    def record_frame(self, timestamp, frame):
+        if not self.save_frames:
+            return
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return
+        with self._lock:
+            self._frame_count += 1
+            name = os.path.join(FRAMES_DIR, f"{self._frame_count:06d}.jpg")
+        with open(os.path.join(self.path, name), "wb") as f:
+            f.write(encoded.tobytes())
+        self._write({"type": "frame", "t": timestamp, "file": name})
+
+    def record_weather(self, timestamp, response):
+        self._write({"type": "weather", "t": timestamp, "data": response})
+
+    def record_output(self, timestamp, kind, data):
+        """Record a pipeline output (e.g. detections or interval) for comparing versions"""
+        self._write({"type": "output", "t": timestamp, "kind": kind, "data": data})
+
+    def close(self):
+        with self._lock:
+            if self._events is not None:
+                self._events.close()
+                self._events = None
+
+
+class RecordingFrameSource(FrameSource):
+    """Wraps a frame source and records every frame read from it"""
+
+    def __init__(self, source, recorder, clock):
+        self._source = source
+        self._recorder = recorder
+        self._clock = clock
+
+    def isOpened(self):
+        return self._source.isOpened()
+
+    def read(self, image=None):
+        ret, frame = self._source.read(image)
+        if ret:
+            self._recorder.record_frame(self._clock.time(), frame)
+        return ret, frame
+
+    def get(self, prop):
+        return self._source.get(prop) if hasattr(self._source, "get") else -1
+
+    def set(self, prop, value):
+        # Lets camera controls such as exposure reach a wrapped webcam
+        return hasattr(self._source, "set") and self._source.set(prop, value)
+
+    def release(self):
+        self._source.release()
+
+
+def load_events(path):
+    """Read all events of a session, sorted by timestamp"""
+    events = []
+    with open(os.path.join(path, EVENTS_FILE)) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    events.sort(key=lambda event: event["t"])
+    return events
+
+
+class ReplaySession:
+    """Serves a recorded session's frames and weather back according to a (virtual) clock"""
+
+    def __init__(self, path):
+        self.path = path
+        events = load_events(path)
+        self.frames = [event for event in events if event["type"] == "frame"]
+        self.weather = [event for event in events if event["type"] == "weather"]
+        self.outputs = [event for event in events if event["type"] == "output"]
+        self._frame_times = [event["t"] for event in self.frames]
+        self._weather_times = [event["t"] for event in self.weather]
+
+        times = self._frame_times + self._weather_times
+        self.start_time = min(times) if times else None
+        self.end_time = max(times) if times else None
+
+    def frame_at(self, timestamp):
+        """Decode the latest recorded frame at or before timestamp, as a live camera would show it"""
+        index = bisect.bisect_right(self._frame_times, timestamp) - 1
+        if index < 0:
+            index = 0 if self.frames else None
+        if index is None:
+            return None
+        return cv2.imread(os.path.join(self.path, self.frames[index]["file"]))
+
+    def weather_at(self, timestamp):
+        """Return the latest recorded weather response at or before timestamp"""
+        index = bisect.bisect_right(self._weather_times, timestamp) - 1
+        if index < 0:
+            return self.weather[0]["data"] if self.weather else None
+        return self.weather[index]["data"]
+
+
+class ReplayFrameSource(FrameSource):
+    """Frame source that returns the recorded frame for the current time of a clock"""
+
+    def __init__(self, session, clock):
+        self._session = session
+        self._clock = clock
+        self._open = bool(session.frames)
+
+    def isOpened(self):
+        return self._open
+
+    def read(self, image=None):
+        if not self._open:
+            return False, None
+        frame = self._session.frame_at(self._clock.time())
+        if frame is not None and image is not None and image.shape == frame.shape:
+            image[...] = frame
+            frame = image
+        return frame is not None, frame
+
+    def release(self):
+        self._open = False
+
+
+def compare_outputs(baseline, candidate, pixel_tolerance=2.0):
+    """Compare two output event lists, matching events of each kind in order, and summarise the differences"""
+    summary = {}
+    for kind in sorted({event["kind"] for event in baseline + candidate}):
+        base = [event for event in baseline if event["kind"] == kind]
+        cand = [event for event in candidate if event["kind"] == kind]
+        mismatches = []
+        for i, (b, c) in enumerate(zip(base, cand)):
+            if kind == "detections":
+                b_dets, c_dets = b["data"], c["data"]
+                if len(b_dets) != len(c_dets):
+                    mismatches.append({"index": i, "t": b["t"], "baseline": len(b_dets), "candidate": len(c_dets)})
+                    continue
+                for bd, cd in zip(b_dets, c_dets):
+                    dx = abs(bd["distance_x"] - cd["distance_x"])
+                    dy = abs(bd["distance_y"] - cd["distance_y"])
+                    if dx > pixel_tolerance or dy > pixel_tolerance:
+                        mismatches.append({"index": i, "t": b["t"], "dx": dx, "dy": dy})
+                        break
+            elif b["data"] != c["data"]:
+                mismatches.append({"index": i, "t": b["t"], "baseline": b["data"], "candidate": c["data"]})
+
+        summary[kind] = {
+            "baseline_count": len(base),
+            "candidate_count": len(cand),
+            "mismatches": len(mismatches),
+            "examples": mismatches[:10],
+        }
+    return summary
@@ -0,0 +1,71 @@
+import math
+from datetime import datetime, timezone
+
+
+def solar_position(timestamp, lat, lon):
+    """Return the sun's (azimuth, elevation) in degrees for a unix timestamp and location.
+
+    Uses the NOAA low-precision equations, accurate to well under a degree, which is
+    plenty for simulating and predicting the sun's path across the camera frame.
+    Azimuth is measured clockwise from north.
+    """
+    dt = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    day_of_year = dt.timetuple().tm_yday
+    hour = dt.hour + dt.minute / 60 + dt.second / 3600
+
+    # Fractional year in radians
+    gamma = 2 * math.pi / 365 * (day_of_year - 1 + (hour - 12) / 24)
+
+    # Equation of time (minutes) and solar declination (radians)
+    eqtime = 229.18 * (0.000075 + 0.001868 * math.cos(gamma) - 0.032077 * math.sin(gamma)
+                       - 0.014615 * math.cos(2 * gamma) - 0.040849 * math.sin(2 * gamma))
+    decl = (0.006918 - 0.399912 * math.cos(gamma) + 0.070257 * math.sin(gamma)
+            - 0.006758 * math.cos(2 * gamma) + 0.000907 * math.sin(2 * gamma)
+            - 0.002697 * math.cos(3 * gamma) + 0.00148 * math.sin(3 * gamma))
+
+    # True solar time (minutes) and hour angle (radians)
+    true_solar_time = hour * 60 + eqtime + 4 * lon
+    hour_angle = math.radians(true_solar_time / 4 - 180)
+
+    lat_rad = math.radians(lat)
+    cos_zenith = (math.sin(lat_rad) * math.sin(decl)
+                  + math.cos(lat_rad) * math.cos(decl) * math.cos(hour_angle))
+    cos_zenith = max(-1.0, min(1.0, cos_zenith))
+    zenith = math.acos(cos_zenith)
+    elevation = 90 - math.degrees(zenith)
+
+    # Azimuth clockwise from north
+    azimuth = math.degrees(math.atan2(
+        math.sin(hour_angle),
+        math.cos(hour_angle) * math.sin(lat_rad) - math.tan(decl) * math.cos(lat_rad)
+    )) + 180
+    return azimuth % 360, elevation
+
+
+def is_sun_up(timestamp, lat, lon, min_elevation=0.0):
+    """Check whether the sun is above the given elevation at a time and place"""
+    return solar_position(timestamp, lat, lon)[1] > min_elevation
+
+
+def next_sunrise(timestamp, lat, lon, min_elevation=0.0, step=300.0, max_search=2 * 86400.0):
+    """Return the next time after timestamp the sun rises above min_elevation, or None (polar night).
+
+    Scans forward in coarse steps for the first below->above crossing, then bisects to the second.
+    """
+    previous_t = timestamp
+    previous_up = is_sun_up(previous_t, lat, lon, min_elevation)
+    t = timestamp
+    while t < timestamp + max_search:
+        t += step
+        up = is_sun_up(t, lat, lon, min_elevation)
+        if up and not previous_up:
+            low, high = previous_t, t
+            while high - low > 1.0:
+                mid = (low + high) / 2
+                if is_sun_up(mid, lat, lon, min_elevation):
+                    high = mid
+                else:
+                    low = mid
+            return high
+        previous_t, previous_up = t, up
+    return None
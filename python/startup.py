@@ -0,0 +1,90 @@
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+class StartupTimer:
+    """Records how long each startup phase takes, including phases run in background threads"""
+
+    def __init__(self):
+        self._started = time.time()
+        self._lock = threading.Lock()
+        # name -> {"status", "started_at", "seconds", "error"}
+        self._phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of startup work under the given phase name"""
+        started = time.time()
+        with self._lock:
+            self._phases[name] = {"status": "running", "started_at": started - self._started, "seconds": None, "error": None}
+        status, error = "done", None
+        try:
+            yield
+        except Exception as e:
+            status, error = "failed", str(e)
+            raise
+        finally:
+            seconds = time.time() - started
+            with self._lock:
+                self._phases[name].update(status=status, seconds=seconds, error=error)
+            print(f"Startup phase '{name}' {status} in {seconds:.2f}s")
+
+    def run_in_background(self, name, target, *args):
+        """Run target(*args) as a timed phase in a daemon thread so it does not block startup"""
+        with self._lock:
+            self._phases[name] = {"status": "pending", "started_at": None, "seconds": None, "error": None}
+
+        def runner():
+            try:
+                with self.phase(name):
+                    target(*args)
+            except Exception as e:
+                print(f"Startup phase '{name}' error: {e}")
+
+        thread = threading.Thread(target=runner, name=f"startup-{name}")
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def is_done(self, name):
+        """Check whether the named phase has finished, successfully or not"""
+        with self._lock:
+            phase = self._phases.get(name)
+            return phase is not None and phase["status"] in ("done", "failed")
+
+    def report(self):
+        """Return the state and duration of every phase recorded so far"""
+        with self._lock:
+            phases = {name: dict(phase) for name, phase in self._phases.items()}
+        return {
+            "started_at": datetime.fromtimestamp(self._started).isoformat(),
+            "uptime_seconds": time.time() - self._started,
+            "ready": all(phase["status"] in ("done", "failed") for phase in phases.values()),
+            "phases": phases,
+        }
@@ -0,0 +1,142 @@
+import math
+import threading
+import time
+
+from solar import solar_position
+
+
+class TrackingEstimator:
+    """Per-axis Kalman estimate of the pointing error (degrees) between the camera axis and the sun.
+
+    Between detections the error is propagated with the sun's predicted motion from the solar
+    ephemeris and with the moves we command on the actuator, while its variance grows. Detections
+    are fused in when they arrive, corrected for whatever moved while inference was running.
+    """
+
+    def __init__(self, lat, lon, process_noise=0.002, measurement_noise=0.05, actuator_noise=0.05,
+                 initial_variance=100.0):
+        self.lat = lat
+        self.lon = lon
+        self.process_noise = process_noise  # deg^2 of drift per second
+        self.measurement_noise = measurement_noise  # deg^2 per detection
+        self.actuator_noise = actuator_noise  # fraction of each commanded move that is uncertain
+        self._lock = threading.Lock()
+
+        self.error = [0.0, 0.0]  # (azimuth, elevation)
+        self.variance = [initial_variance, initial_variance]
+        self._last_time = None
+        self._last_sun = None
+        # Error change since the frame currently being inferred was captured
+        self._pending_motion = None
+
+    def predict(self, now):
+        """Advance the estimate to time now using the sun's predicted motion"""
+        with self._lock:
+            sun = solar_position(now, self.lat, self.lon)
+            if self._last_time is not None:
+                dt = max(0.0, now - self._last_time)
+                # Azimuth changes shrink by cos(elevation) when projected onto the camera's horizontal axis
+                d_az = ((sun[0] - self._last_sun[0] + 180) % 360 - 180) * math.cos(math.radians(sun[1]))
+                d_el = sun[1] - self._last_sun[1]
+                self._shift(d_az, d_el)
+                for axis in (0, 1):
+                    self.variance[axis] += self.process_noise * dt
+            self._last_time = now
+            self._last_sun = sun
+
+    def apply_command(self, d_az, d_el):
+        """Account for a commanded camera move in degrees (positive moves towards positive error)"""
+        with self._lock:
+            self._shift(-d_az, -d_el)
+            self.variance[0] += (self.actuator_noise * d_az) ** 2
+            self.variance[1] += (self.actuator_noise * d_el) ** 2
+
+    def _shift(self, d_az, d_el):
+        self.error[0] += d_az
+        self.error[1] += d_el
+        if self._pending_motion is not None:
+            self._pending_motion[0] += d_az
+            self._pending_motion[1] += d_el
+
+    def begin_measurement(self):
+        """Mark the capture time of a frame about to be sent for inference"""
+        with self._lock:
+            self._pending_motion = [0.0, 0.0]
+
+    def update(self, azimuth_error, elevation_error):
+        """Fuse a detection measured at the last begin_measurement() into the estimate"""
+        with self._lock:
+            motion = self._pending_motion or [0.0, 0.0]
+            self._pending_motion = None
+            for axis, measured in enumerate((azimuth_error, elevation_error)):
+                # Move the measurement forward to now by what changed since capture
+                measured += motion[axis]
+                gain = self.variance[axis] / (self.variance[axis] + self.measurement_noise)
+                self.error[axis] += gain * (measured - self.error[axis])
+                self.variance[axis] *= (1 - gain)
+
+    def cancel_measurement(self):
+        """Forget a pending measurement, e.g. when no sun was detected"""
+        with self._lock:
+            self._pending_motion = None
+
+    @property
+    def uncertainty(self):
+        """Largest per-axis standard deviation of the estimate in degrees"""
+        with self._lock:
+            return math.sqrt(max(self.variance))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "azimuth_error": self.error[0],
+                "elevation_error": self.error[1],
+                "uncertainty": math.sqrt(max(self.variance)),
+            }
+
+
+class TrackingStats:
+    """Pointing error and inference duty cycle for a tracking session"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.ticks = 0
+        self.inferences = 0
+        self.detections = 0
+        self.inference_seconds = 0.0
+        self._error_sq_sum = 0.0
+        self._error_max = 0.0
+        self.last_pointing_error = None
+
+    def record_tick(self):
+        with self._lock:
+            self.ticks += 1
+
+    def record_inference(self, seconds, pointing_error=None):
+        """Record one inference; pointing_error is the measured total error in degrees if the sun was found"""
+        with self._lock:
+            self.inferences += 1
+            self.inference_seconds += seconds
+            if pointing_error is not None:
+                self.detections += 1
+                self._error_sq_sum += pointing_error ** 2
+                self._error_max = max(self._error_max, pointing_error)
+                self.last_pointing_error = pointing_error
+
+    def report(self):
+        with self._lock:
+            elapsed = time.time() - self.started_at
+            return {
+                "elapsed_seconds": elapsed,
+                "control_ticks": self.ticks,
+                "control_rate_hz": self.ticks / elapsed if elapsed > 0 else 0.0,
+                "inferences": self.inferences,
+                "detections": self.detections,
+                "inference_rate_hz": self.inferences / elapsed if elapsed > 0 else 0.0,
+                # Fraction of wall time the detector was busy on behalf of tracking
+                "inference_duty_cycle": self.inference_seconds / elapsed if elapsed > 0 else 0.0,
+                "rms_pointing_error": math.sqrt(self._error_sq_sum / self.detections) if self.detections else None,
+                "max_pointing_error": self._error_max if self.detections else None,
+                "last_pointing_error": self.last_pointing_error,
+            }
@@ -0,0 +1,214 @@
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+import requests
+from flask import Flask, jsonify, request
+
+
+def bucket_key(lat, lon, precision=2):
+    """Round coordinates to a grid cell; 2 decimals is about 1 km, well inside one weather station"""
+    return round(float(lat), precision), round(float(lon), precision)
+
+
+class OpenWeatherMapUpstream:
+    """Fetches current weather from OpenWeatherMap"""
+
+    def __init__(self, api_key, timeout=10):
+        self.api_key = api_key
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def __call__(self, lat, lon):
+        response = self._session.get("https://api.openweathermap.org/data/2.5/weather", params={
+            "lat": lat, "lon": lon, "appid": self.api_key
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+class FakeUpstream:
+    """Offline stand-in returning OpenWeatherMap-shaped responses, with optional latency and failures"""
+
+    def __init__(self, latency=0.2, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, lat, lon):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.failure_rate
+        time.sleep(self.latency)
+        if fail:
+            raise RuntimeError("Fake upstream failure")
+
+        now = time.time()
+        # Rough sunrise/sunset: 06:00 and 18:00 local solar time
+        solar_noon = now - (now + lon / 360.0 * 86400) % 86400 + 43200
+        clouds = int(50 + 40 * math.sin(now / 3600.0 + lat))
+        return {
+            "coord": {"lat": lat, "lon": lon},
+            "weather": [{"main": "Clouds" if clouds > 20 else "Clear",
+                         "description": f"fake weather, {clouds}% clouds"}],
+            "main": {"temp": 290.0},
+            "clouds": {"all": clouds},
+            "wind": {"speed": 3.0},
+            "sys": {"sunrise": int(solar_noon - 21600), "sunset": int(solar_noon + 21600)},
+            "dt": int(now),
+        }
+
+
+class WeatherGateway:
+    """Caches upstream weather per coordinate bucket and merges concurrent requests into one upstream call"""
+
+    def __init__(self, upstream, precision=2, ttl=600.0, stale_ttl=3600.0):
+        self.upstream = upstream
+        self.precision = precision
+        self.ttl = ttl
+        # On upstream errors a cached response up to this old is served rather than failing
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._cache = {}  # key -> (fetched_at, response)
+        self._inflight = {}  # key -> Future
+
+        # Stats
+        self.requests = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.stale_served = 0
+
+    def get(self, lat, lon, now=None):
+        """Return (response, info) for the bucket containing lat/lon"""
+        key = bucket_key(lat, lon, self.precision)
+        if now is None:
+            now = time.time()
+
+        with self._lock:
+            self.requests += 1
+            cached = self._cache.get(key)
+            if cached is not None and now - cached[0] < self.ttl:
+                self.hits += 1
+                return cached[1], {"bucket": key, "cache": "hit", "age": now - cached[0]}
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # Another request is already fetching this bucket; wait for its result
+            return future.result()
+
+        try:
+            result = self._fetch(key, cached, now)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _fetch(self, key, cached, now):
+        try:
+            with self._lock:
+                self.upstream_calls += 1
+            # Query the bucket centre so every device in the bucket gets the identical answer
+            response = self.upstream(*key)
+        except Exception:
+            with self._lock:
+                self.upstream_errors += 1
+                if cached is not None and now - cached[0] < self.stale_ttl:
+                    self.stale_served += 1
+                    return cached[1], {"bucket": key, "cache": "stale", "age": now - cached[0]}
+            raise
+
+        with self._lock:
+            self._cache[key] = (time.time(), response)
+        return response, {"bucket": key, "cache": "miss", "age": 0.0}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "buckets": len(self._cache),
+                "requests": self.requests,
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "upstream_calls": self.upstream_calls,
+                "upstream_errors": self.upstream_errors,
+                "stale_served": self.stale_served,
+            }
+
+
+def create_upstream(spec, api_key=None):
+    """Create an upstream from "openweathermap" or "fake[:latency[:failure_rate]]" """
+    kind, _, rest = spec.partition(":")
+    if kind == "openweathermap":
+        return OpenWeatherMapUpstream(api_key)
+    if kind == "fake":
+        latency, _, failure_rate = rest.partition(":")
+        return FakeUpstream(latency=float(latency or 0.2), failure_rate=float(failure_rate or 0.0))
+    raise ValueError(f"Unknown weather upstream '{spec}'")
+
+
+# Sidecar serving devices at one site; point them at it with WEATHER_GATEWAY_URL
+app = Flask(__name__)
+
+WEATHER_UPSTREAM = os.environ.get("WEATHER_UPSTREAM", "openweathermap")
+WEATHER_API_KEY = os.environ.get("WEATHER_API_KEY", "22ba524647a0d39172ebc63307bbf2f1")
+WEATHER_BUCKET_PRECISION = int(os.environ.get("WEATHER_BUCKET_PRECISION", "2"))
+WEATHER_CACHE_TTL = float(os.environ.get("WEATHER_CACHE_TTL", "600"))
+
+gateway = WeatherGateway(
+    create_upstream(WEATHER_UPSTREAM, WEATHER_API_KEY),
+    precision=WEATHER_BUCKET_PRECISION,
+    ttl=WEATHER_CACHE_TTL,
+)
+
+
+@app.route('/weather', methods=['GET'])
+def weather():
+    """Endpoint returning the OpenWeatherMap-shaped response for ?lat=&lon="""
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is None or lon is None:
+        return jsonify({
+            "status": "error",
+            "message": "Missing 'lat' or 'lon' parameter",
+            "timestamp": datetime.now().isoformat()
+        }), 400
+    try:
+        response, info = gateway.get(lat, lon)
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Upstream weather error: {e}",
+            "timestamp": datetime.now().isoformat()
+        }), 502
+    # Same body as the upstream so devices can switch to the gateway transparently
+    result = jsonify(response)
+    result.headers["X-Weather-Cache"] = info["cache"]
+    result.headers["X-Weather-Age"] = f"{info['age']:.0f}"
+    return result
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Endpoint reporting cache and coalescing counters"""
+    return jsonify(dict(gateway.stats(), timestamp=datetime.now().isoformat()))
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=int(os.environ.get("WEATHER_GATEWAY_PORT", "5200")), threaded=True, use_reloader=False)